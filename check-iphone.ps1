@@ -1,4 +1,5 @@
 Set-Location $PSScriptRoot
+. .\control-status.ps1
 Write-Host "=== iPHONE DIAGNOSTICS ===" -ForegroundColor Cyan
 Write-Host ""
 
@@ -29,11 +30,13 @@ if ($listeners) {
 
 Write-Host ""
 Write-Host "[4] ESTABLISHED TO 127.10.10.10:" -ForegroundColor Yellow
-$estab = .\plink.exe -4 -hostkey $fp -ssh -batch -P 2222 -pw icemat root@127.0.0.1 'netstat -an | grep "127.10.10.10.*ESTABLISHED"'
-if ($estab) {
-    $estab
-} else {
-    Write-Host "  (none)" -ForegroundColor Gray
+if ($null -eq (Test-StreamFromControlApi)) {
+    $estab = .\plink.exe -4 -hostkey $fp -ssh -batch -P 2222 -pw icemat root@127.0.0.1 'netstat -an | grep "127.10.10.10.*ESTABLISHED"'
+    if ($estab) {
+        $estab
+    } else {
+        Write-Host "  (none)" -ForegroundColor Gray
+    }
 }
 
 Write-Host ""
@@ -0,0 +1,46 @@
+# PC-side stream state from the loopback control APIs (scripts/control_api.py)
+# Dot-sourced by check-iphone.ps1, check-established.ps1 and test-tunnel.ps1 so they
+# only fall back to netstat over SSH when neither USB tool is running.
+#   1990 = usb_tethering_monitor.py (controller), 1991 = usb_usbmux_listener.py (bridge)
+
+function Get-ControlStatus([int]$Port) {
+    try {
+        return Invoke-RestMethod -Uri "http://127.0.0.1:$Port/status" -TimeoutSec 1 -ErrorAction Stop
+    } catch {
+        return $null
+    }
+}
+
+# Prints what the controller and bridge report; $true if a stream is arriving,
+# $false if one answered but nothing is publishing, $null if neither is running
+function Test-StreamFromControlApi {
+    $controller = Get-ControlStatus 1990
+    $bridge = Get-ControlStatus 1991
+    if (-not $controller -and -not $bridge) {
+        Write-Host "  (control APIs not answering - falling back to SSH)" -ForegroundColor Gray
+        return $null
+    }
+
+    $flowing = $false
+    if ($bridge) {
+        $kbps = [math]::Round($bridge.up_bps * 8 / 1000)
+        if ($bridge.bridge_active) {
+            Write-Host "  USB bridge: ACTIVE -> $($bridge.srs_target), $kbps kbps from iPhone" -ForegroundColor Green
+            if ($bridge.up_bps -gt 0) { $flowing = $true }
+        } else {
+            Write-Host "  USB bridge: waiting for the iPhone (target $($bridge.srs_target))" -ForegroundColor Gray
+        }
+    }
+    if ($controller) {
+        $streaming = @($controller.devices | Where-Object { $_.state -eq 'streaming' })
+        foreach ($device in $streaming) {
+            Write-Host "  Publishing: $($device.rtmp_url)" -ForegroundColor Green
+        }
+        if ($streaming.Count -gt 0) {
+            $flowing = $true
+        } else {
+            Write-Host "  Controller: no publisher (state: $($controller.state))" -ForegroundColor Gray
+        }
+    }
+    return $flowing
+}
@@ -1524,17 +1524,22 @@ function Start-MonibucaViaSshUsb {
                     Write-Host "  ⬚  Port 80: Could not check" -ForegroundColor Gray
                 }
 
-                # Check RTMP port 1935 (filter for Listen state)
-                try {
-                    $rtmp = Get-NetTCPConnection -LocalPort 1935 -State Listen -ErrorAction SilentlyContinue
-                    if ($rtmp) {
-                        $proc = Get-Process -Id $rtmp[0].OwningProcess -ErrorAction SilentlyContinue
-                        Write-Host "  ✅ Port 1935: $($proc.ProcessName) (PID: $($rtmp[0].OwningProcess))" -ForegroundColor Green
-                    } else {
-                        Write-Host "  ⬚  Port 1935: Not listening" -ForegroundColor Gray
+                # Check RTMP port 1935: the USB controller's status first, then the listen table
+                $controllerState = Get-ControlApiStatus $script:ControllerControlPort
+                if ($controllerState -and $controllerState.srs -and $controllerState.srs.running) {
+                    Write-Host "  ✅ Port $($controllerState.srs.rtmp_port): $($controllerState.srs.backend) (PID: $($controllerState.srs.pid), via USB controller)" -ForegroundColor Green
+                } else {
+                    try {
+                        $rtmp = Get-NetTCPConnection -LocalPort 1935 -State Listen -ErrorAction SilentlyContinue
+                        if ($rtmp) {
+                            $proc = Get-Process -Id $rtmp[0].OwningProcess -ErrorAction SilentlyContinue
+                            Write-Host "  ✅ Port 1935: $($proc.ProcessName) (PID: $($rtmp[0].OwningProcess))" -ForegroundColor Green
+                        } else {
+                            Write-Host "  ⬚  Port 1935: Not listening" -ForegroundColor Gray
+                        }
+                    } catch {
+                        Write-Host "  ⬚  Port 1935: Could not check" -ForegroundColor Gray
                     }
-                } catch {
-                    Write-Host "  ⬚  Port 1935: Could not check" -ForegroundColor Gray
                 }
 
                 Write-Host ""
@@ -2856,6 +2861,24 @@ function Resolve-ExecutablePath {
     return $null
 }
 
+# Cached state served on loopback by usb_tethering_monitor.py (1990) and
+# usb_usbmux_listener.py (1991), see scripts/control_api.py. $null when the
+# tool is not running, so callers fall back to scanning processes/ports.
+$script:ControllerControlPort = 1990
+$script:ListenerControlPort = 1991
+
+function Get-ControlApiStatus {
+    param(
+        [int]$Port
+    )
+
+    try {
+        return Invoke-RestMethod -Uri "http://127.0.0.1:$Port/status" -TimeoutSec 1 -ErrorAction Stop
+    } catch {
+        return $null
+    }
+}
+
 function Show-USBValidation {
     param(
         [switch]$Auto
@@ -2912,14 +2935,21 @@ function Show-USBValidation {
     Write-Host "  $pscpStatus pscp.exe$pscpInfo" -ForegroundColor Gray
     Write-Host ""
 
+    # The controller knows its media server's PID and RTMP port; only probe
+    # processes and ports when it is not running
+    $controllerState = Get-ControlApiStatus $script:ControllerControlPort
     $srsRunning = $false
-    try { if (Get-Process -Name "srs" -ErrorAction SilentlyContinue) { $srsRunning = $true } } catch { }
-
     $rtmpListening = $false
     $flaskListening = $false
     $prevProgress = $ProgressPreference
     $ProgressPreference = "SilentlyContinue"
-    try { $rtmpListening = [bool](Test-NetConnection -ComputerName 127.0.0.1 -Port 1935 -InformationLevel Quiet -WarningAction SilentlyContinue) } catch { }
+    if ($controllerState -and $controllerState.srs) {
+        $srsRunning = [bool]$controllerState.srs.running
+        $rtmpListening = $srsRunning -and $controllerState.srs.rtmp_port -eq 1935
+    } else {
+        try { if (Get-Process -Name "srs" -ErrorAction SilentlyContinue) { $srsRunning = $true } } catch { }
+        try { $rtmpListening = [bool](Test-NetConnection -ComputerName 127.0.0.1 -Port 1935 -InformationLevel Quiet -WarningAction SilentlyContinue) } catch { }
+    }
     try { $flaskListening = [bool](Test-NetConnection -ComputerName 127.0.0.1 -Port 80 -InformationLevel Quiet -WarningAction SilentlyContinue) } catch { }
     $ProgressPreference = $prevProgress
 
@@ -2930,19 +2960,41 @@ function Show-USBValidation {
     Write-Host "  $srsStatus SRS process running" -ForegroundColor Gray
     Write-Host "  $rtmpStatus RTMP port 1935 listening (127.0.0.1)" -ForegroundColor Gray
     Write-Host "  $flaskStatus Flask port 80 listening (127.0.0.1)" -ForegroundColor Gray
+    if ($controllerState -and $controllerState.srs) {
+        Write-Host "     From USB controller: $($controllerState.srs.backend) PID $($controllerState.srs.pid), state $($controllerState.state)" -ForegroundColor DarkGray
+        if ($controllerState.srs.rtmp_port -ne 1935) {
+            Write-Host "     RTMP is on port $($controllerState.srs.rtmp_port) after a profile hot swap" -ForegroundColor DarkGray
+        }
+    }
     Write-Host ""
 
+    # The listener serves its cached bridge state on a loopback control API;
+    # only fall back to scanning every process command line if it is silent
     $usbListenerRunning = $false
-    try {
-        $proc = Get-CimInstance Win32_Process -ErrorAction SilentlyContinue | Where-Object {
-            $_.CommandLine -and $_.CommandLine -match "usb_usbmux_listener.py"
-        }
-        if ($proc) { $usbListenerRunning = $true }
-    } catch { }
+    $usbListenerState = Get-ControlApiStatus $script:ListenerControlPort
+    if ($usbListenerState) {
+        $usbListenerRunning = $true
+    } else {
+        try {
+            $proc = Get-CimInstance Win32_Process -ErrorAction SilentlyContinue | Where-Object {
+                $_.CommandLine -and $_.CommandLine -match "usb_usbmux_listener.py"
+            }
+            if ($proc) { $usbListenerRunning = $true }
+        } catch { }
+    }
 
     Write-Host "  🔌 USB Listener:" -ForegroundColor Cyan
     $usbListenerStatus = if ($usbListenerRunning) { "✅" } else { "⚠️" }
     Write-Host "  $usbListenerStatus usb_usbmux_listener.py running" -ForegroundColor Gray
+    if ($usbListenerState) {
+        $bridgeStatus = if ($usbListenerState.bridge_active) { "✅" } else { "⚠️" }
+        $kbps = [math]::Round($usbListenerState.up_bps * 8 / 1000)
+        Write-Host "  $bridgeStatus Bridge to $($usbListenerState.srs_target): $kbps kbps from iPhone" -ForegroundColor Gray
+        if ($usbListenerState.last_stall) {
+            $stallAt = [DateTimeOffset]::FromUnixTimeSeconds([long]$usbListenerState.last_stall.at).LocalDateTime
+            Write-Host "     Last stall: $($usbListenerState.last_stall.duration_ms) ms at $stallAt" -ForegroundColor DarkGray
+        }
+    }
     Write-Host ""
 
     $sshTunnelOpen = $false
@@ -3030,28 +3082,52 @@ function Show-SystemDiagnostics {
     Write-Host "  RTMP URL: rtmp://$script:CurrentIP`:1935/live/srs" -ForegroundColor Yellow
     Write-Host ""
 
+    # A running USB controller reports its media server directly; the port
+    # and process scans are the fallback when it is not answering
+    $controllerState = Get-ControlApiStatus $script:ControllerControlPort
+    $listenerState = Get-ControlApiStatus $script:ListenerControlPort
+
     # Port status
     Write-Host "🔌 Port Status:" -ForegroundColor Green
-    $ports = @(1935)  # Only check RTMP port since that's what we need
-    foreach ($port in $ports) {
-        $connections = Get-NetTCPConnection -LocalPort $port -ErrorAction SilentlyContinue
-        if ($connections) {
-            Write-Host "  Port $port`: OCCUPIED (PID: $($connections[0].OwningProcess))" -ForegroundColor Red
-        } else {
-            Write-Host "  Port $port`: FREE" -ForegroundColor Green
+    if ($controllerState -and $controllerState.srs -and $controllerState.srs.running) {
+        Write-Host "  Port $($controllerState.srs.rtmp_port)`: OCCUPIED by USB controller's $($controllerState.srs.backend) (PID: $($controllerState.srs.pid))" -ForegroundColor Red
+    } else {
+        $ports = @(1935)  # Only check RTMP port since that's what we need
+        foreach ($port in $ports) {
+            $connections = Get-NetTCPConnection -LocalPort $port -ErrorAction SilentlyContinue
+            if ($connections) {
+                Write-Host "  Port $port`: OCCUPIED (PID: $($connections[0].OwningProcess))" -ForegroundColor Red
+            } else {
+                Write-Host "  Port $port`: FREE" -ForegroundColor Green
+            }
         }
     }
     Write-Host ""
 
     # SRS processes
     Write-Host "🔄 SRS Processes:" -ForegroundColor Green
-    $srsProcesses = Get-Process -Name "srs" -ErrorAction SilentlyContinue
-    if ($srsProcesses) {
-        foreach ($proc in $srsProcesses) {
-            Write-Host "  SRS running (PID: $($proc.Id))" -ForegroundColor Yellow
+    if ($controllerState -and $controllerState.srs) {
+        if ($controllerState.srs.running) {
+            Write-Host "  $($controllerState.srs.backend) running (PID: $($controllerState.srs.pid)), USB state: $($controllerState.state)" -ForegroundColor Yellow
+            foreach ($device in @($controllerState.devices)) {
+                Write-Host "    $($device.adapter): $($device.state) - $($device.rtmp_url)" -ForegroundColor Gray
+            }
+        } else {
+            Write-Host "  USB controller running, media server stopped (state: $($controllerState.state))" -ForegroundColor Green
         }
     } else {
-        Write-Host "  No SRS processes running" -ForegroundColor Green
+        $srsProcesses = Get-Process -Name "srs" -ErrorAction SilentlyContinue
+        if ($srsProcesses) {
+            foreach ($proc in $srsProcesses) {
+                Write-Host "  SRS running (PID: $($proc.Id))" -ForegroundColor Yellow
+            }
+        } else {
+            Write-Host "  No SRS processes running" -ForegroundColor Green
+        }
+    }
+    if ($listenerState) {
+        $bridgeState = if ($listenerState.bridge_active) { "active" } else { "waiting" }
+        Write-Host "  USB bridge $bridgeState -> $($listenerState.srs_target) ($([math]::Round($listenerState.up_bps * 8 / 1000)) kbps from iPhone)" -ForegroundColor Gray
     }
     Write-Host ""
 
@@ -3071,6 +3147,37 @@ function Copy-RTMPUrlToClipboard {
     Start-Sleep -Seconds 2
 }
 
+# Longest IP the base package can embed, as reported by the Python tool from its IP patch index
+function Get-IOSDebMaxIPLength {
+    if ($script:IOSDebMaxIPLength) {
+        return $script:IOSDebMaxIPLength
+    }
+    $scriptPath = Join-Path $script:SRSHome "ios\ios_deb_ip_changer_final.py"
+    if (-not (Test-Path $scriptPath)) {
+        $scriptPath = Join-Path $script:SRSHome "ios_tools\ios_deb_ip_changer_final.py"
+    }
+    $maxLength = 0
+    if (Test-Path $scriptPath) {
+        Push-Location (Split-Path -Parent $scriptPath)
+        try {
+            $output = & python "$scriptPath" --max-ip-length 2>$null
+            if ($LASTEXITCODE -eq 0) {
+                $maxLength = [int](($output | Select-Object -Last 1).Trim())
+            }
+        } catch {
+            $maxLength = 0
+        } finally {
+            Pop-Location
+        }
+    }
+    if ($maxLength -le 0) {
+        # Python or the base package is unavailable; the shipped base holds 12 characters
+        return 12
+    }
+    $script:IOSDebMaxIPLength = $maxLength
+    return $maxLength
+}
+
 # Test IP address validity for iOS package
 function Test-IPForIOSDeb {
     Clear-Host
@@ -3079,8 +3186,9 @@ function Test-IPForIOSDeb {
     Write-Host "============================================================" -ForegroundColor Cyan
     Write-Host ""
 
+    $maxLength = Get-IOSDebMaxIPLength
     Write-Host "  This tool validates if your IP is compatible with iOS packages." -ForegroundColor Gray
-    Write-Host "  IP must be exactly 12 characters for binary patching." -ForegroundColor Gray
+    Write-Host "  IP must be at most $maxLength characters for binary patching." -ForegroundColor Gray
     Write-Host ""
     Write-Host "  ────────────────────────────────────────────────────────" -ForegroundColor DarkGray
     Write-Host ""
@@ -3088,11 +3196,10 @@ function Test-IPForIOSDeb {
     Write-Host "  Valid examples:" -ForegroundColor Green
     Write-Host "    ✓ 192.168.1.91  (12 chars)" -ForegroundColor White
     Write-Host "    ✓ 10.10.10.100  (12 chars)" -ForegroundColor White
-    Write-Host "    ✓ 172.16.10.50  (12 chars)" -ForegroundColor White
+    Write-Host "    ✓ 172.20.10.2   (11 chars, USB tethering)" -ForegroundColor White
     Write-Host ""
     Write-Host "  Invalid examples:" -ForegroundColor Red
     Write-Host "    ✗ 192.168.0.100 (13 chars - too long)" -ForegroundColor Gray
-    Write-Host "    ✗ 192.168.1.1   (11 chars - too short)" -ForegroundColor Gray
     Write-Host ""
     Write-Host "  ────────────────────────────────────────────────────────" -ForegroundColor DarkGray
     Write-Host ""
@@ -3126,43 +3233,14 @@ function Test-IPForIOSDeb {
     $ipLength = $testIP.Length
     Write-Host "  • Length: $ipLength characters" -ForegroundColor Cyan
 
-    if ($ipLength -eq 12) {
-        Write-Host "  ✓ Correct length (12 chars)" -ForegroundColor Green
+    if ($ipLength -le $maxLength) {
+        Write-Host "  ✓ Fits (at most $maxLength chars)" -ForegroundColor Green
     } else {
-        Write-Host "  ✗ Incorrect length (needs exactly 12 chars)" -ForegroundColor Red
-
-        # Suggest valid formats
-        if ($ipLength -lt 12) {
-            Write-Host ""
-            Write-Host "  💡 Suggestions to reach 12 chars:" -ForegroundColor Yellow
-            $parts = $testIP -split '\.'
-            if ($parts.Count -eq 4) {
-                try {
-                    $octets = @($parts[0], $parts[1], $parts[2], $parts[3]) | ForEach-Object { [int]$_ }
-
-                    # Try padding last octet
-                    if ($octets[3] -lt 10) {
-                        $suggested1 = "$($octets[0]).$($octets[1]).$($octets[2]).$($octets[3].ToString().PadLeft(2,'0'))"
-                        if ($suggested1.Length -eq 12) {
-                            Write-Host "    → $suggested1" -ForegroundColor White
-                        }
-                    }
-
-                    # Try padding middle octets
-                    if ($octets[1] -ge 10 -and $octets[1] -lt 100 -and $octets[2] -lt 100 -and $octets[3] -lt 100) {
-                        $suggested2 = "$($octets[0]).$($octets[1].ToString().PadLeft(2,'0')).$($octets[2].ToString().PadLeft(2,'0')).$($octets[3].ToString().PadLeft(2,'0'))"
-                        if ($suggested2.Length -eq 12) {
-                            Write-Host "    → $suggested2" -ForegroundColor White
-                        }
-                    }
-                } catch {}
-            }
-        } elseif ($ipLength -gt 12) {
-            Write-Host ""
-            Write-Host "  ⚠️  IP too long - try using shorter octets:" -ForegroundColor Yellow
-            Write-Host "    • Use single digits where possible (e.g., .1 instead of .100)" -ForegroundColor Gray
-            Write-Host "    • Use double digits (e.g., .10 instead of .100)" -ForegroundColor Gray
-        }
+        Write-Host "  ✗ Too long (at most $maxLength chars)" -ForegroundColor Red
+        Write-Host ""
+        Write-Host "  ⚠️  IP too long - try using shorter octets:" -ForegroundColor Yellow
+        Write-Host "    • Use single digits where possible (e.g., .1 instead of .100)" -ForegroundColor Gray
+        Write-Host "    • Use double digits (e.g., .10 instead of .100)" -ForegroundColor Gray
     }
 
     # Final verdict
@@ -3170,7 +3248,7 @@ function Test-IPForIOSDeb {
     Write-Host "  ────────────────────────────────────────────────────────" -ForegroundColor DarkGray
     Write-Host ""
 
-    if ($isValidFormat -and $ipLength -eq 12) {
+    if ($isValidFormat -and $ipLength -le $maxLength) {
         Write-Host "  ✅ IP IS COMPATIBLE!" -ForegroundColor Green
         Write-Host "  This IP can be used to generate iOS packages." -ForegroundColor Green
     } else {
@@ -3301,7 +3379,7 @@ function Show-iOSDebCreator {
     Write-Host ""
     Write-Host "  4) " -ForegroundColor Cyan -NoNewline
     Write-Host "Test IP address" -ForegroundColor Cyan
-    Write-Host "     Check if your IP is compatible (12 chars)" -ForegroundColor DarkGray
+    Write-Host "     Check if your IP fits the base package's length limit" -ForegroundColor DarkGray
     Write-Host ""
     Write-Host "  5) " -ForegroundColor Yellow -NoNewline
     Write-Host "Back" -ForegroundColor Yellow
@@ -3336,12 +3414,14 @@ function Get-CustomIPForDeb {
     Write-Host "────────────────────────────" -ForegroundColor DarkGray
     Write-Host ""
 
-    Write-Host "⚠️  IMPORTANT: IP must be EXACTLY 12 characters!" -ForegroundColor Yellow
+    $maxLength = Get-IOSDebMaxIPLength
+    Write-Host "⚠️  IMPORTANT: IP must be at most $maxLength characters!" -ForegroundColor Yellow
     Write-Host ""
     Write-Host "Valid examples:" -ForegroundColor Green
     Write-Host "  ✓ 192.168.0.99  `(12 chars`)" -ForegroundColor White
     Write-Host "  ✓ 192.168.1.50  `(12 chars`)" -ForegroundColor White
     Write-Host "  ✓ 192.168.50.9  `(12 chars - note single digit`)" -ForegroundColor White
+    Write-Host "  ✓ 172.20.10.2   `(11 chars - USB tethering`)" -ForegroundColor White
     Write-Host ""
     Write-Host "Invalid examples:" -ForegroundColor Red
     Write-Host "  ✗ 192.168.0.100 `(13 chars - too long!`)" -ForegroundColor Gray
@@ -3365,17 +3445,11 @@ function Get-CustomIPForDeb {
 
     # Validate IP length
     $ipLength = $customIP.Length
-    if ($ipLength -ne 12) {
+    if ($ipLength -gt $maxLength) {
         Write-Host ""
-        Write-Host "❌ IP must be exactly 12 characters!" -ForegroundColor Red
+        Write-Host "❌ IP must be at most $maxLength characters!" -ForegroundColor Red
         Write-Host "   Your IP: '$customIP' is $ipLength characters" -ForegroundColor Yellow
-
-        if ($ipLength -lt 12) {
-            Write-Host "   Try using two-digit octets (e.g., 192.168.01.01)" -ForegroundColor Cyan
-        }
-        else {
-            Write-Host "   Use a shorter IP (e.g., single/double digit last octet)" -ForegroundColor Cyan
-        }
+        Write-Host "   Use a shorter IP (e.g., single/double digit last octet)" -ForegroundColor Cyan
 
         Read-Host "Press Enter to try again"
         Get-CustomIPForDeb
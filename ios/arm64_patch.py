@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Signature-based instruction patching for arm64/arm64e Mach-O binaries,
+plus the small amount of Mach-O layout (sections, CFString literals) the
+IP and latency patchers need.
+
+A PatchSpec names the instruction word to replace and the neighbouring
+words (masked) that must surround it, plus how many matches each slice is
+expected to contain. resolve() finds every spec in the __TEXT,__text
+section of each slice and records the file offsets; a spec that matches
+more or fewer times than expected is reported as an error instead of
+being applied, so a rebuilt dylib fails loudly rather than half-patched.
+
+The scan works on the section as aligned little-endian uint32 words:
+candidates come from bytes.find() over the raw section (C speed, no
+per-word Python loop) and are filtered to 4-byte alignment, then the
+context words are checked through an array('I') view of the section.
+
+Usage:
+    python arm64_patch.py sections vcamera.dylib
+"""
+import array
+import hashlib
+import json
+import os
+import struct
+import sys
+from dataclasses import dataclass, replace
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+PATCH_PLAN_FORMAT = 1
+CPU_TYPE_ARM64 = 0x0100000C
+CPU_SUBTYPE_ARM64E = 2
+LC_SEGMENT_64 = 0x19
+FULL_MASK = 0xFFFFFFFF
+
+
+class PatchError(ValueError):
+    pass
+
+
+# ============================================================================
+# Instruction encodings
+# ============================================================================
+
+def movz_w(rd: int, imm: int) -> int:
+    """MOVZ Wd, #imm"""
+    return 0x52800000 | (imm & 0xFFFF) << 5 | rd
+
+
+def movz_x(rd: int, imm: int) -> int:
+    """MOVZ Xd, #imm"""
+    return 0xD2800000 | (imm & 0xFFFF) << 5 | rd
+
+
+def movz_imm(word: int) -> int:
+    return (word >> 5) & 0xFFFF
+
+
+def is_movz(word: int) -> bool:
+    return word >> 23 & 0x1FF in (0xA5, 0x1A5)  # 32/64-bit, any shift
+
+
+def with_imm(word: int, imm: int) -> int:
+    """The same MOVZ (register, width, shift) with a different 16-bit immediate"""
+    if not is_movz(word):
+        raise PatchError(f"{word:08x} is not a MOVZ; cannot encode an immediate")
+    if not 0 <= imm <= 0xFFFF:
+        raise PatchError(f"MOVZ immediate {imm} out of range (0-65535)")
+    return word & ~(0xFFFF << 5) & FULL_MASK | imm << 5
+
+
+def movz_reg(word: int) -> str:
+    return f"{'X' if word >> 31 else 'W'}{word & 0x1F}"
+
+
+# Masked context words: (value, mask)
+ANY_BL = (0x94000000, 0xFC000000)
+
+
+def ldr_w_sp(rt: int) -> Tuple[int, int]:
+    """LDR Wt, [SP, #any]"""
+    return 0xB94003E0 | rt, 0xFFC003FF
+
+
+def str_w_sp(rt: int) -> Tuple[int, int]:
+    """STR Wt, [SP, #any]"""
+    return 0xB90003E0 | rt, 0xFFC003FF
+
+
+def exact(word: int) -> Tuple[int, int]:
+    return word, FULL_MASK
+
+
+# ============================================================================
+# Mach-O slices
+# ============================================================================
+
+class Section(NamedTuple):
+    arch: str
+    slice: int    # file offset of the slice's Mach-O header
+    segment: str
+    name: str
+    addr: int     # vm address; dylibs are based at 0
+    offset: int   # file offset within the whole (possibly fat) file
+    size: int
+
+
+def _thin_sections(data, base: int) -> List[Section]:
+    magic, cputype, subtype, _, ncmds = struct.unpack_from('<IiiII', data, base)
+    if magic != 0xFEEDFACF or cputype != CPU_TYPE_ARM64:
+        return []
+    arch = 'arm64e' if subtype & 0xFF == CPU_SUBTYPE_ARM64E else 'arm64'
+    sections = []
+    offset = base + 32
+    for _ in range(ncmds):
+        cmd, cmdsize = struct.unpack_from('<II', data, offset)
+        if cmd == LC_SEGMENT_64:
+            nsects = struct.unpack_from('<I', data, offset + 64)[0]
+            for i in range(nsects):
+                sect = offset + 72 + 80 * i
+                name = bytes(data[sect:sect + 16]).rstrip(b'\0').decode('ascii', 'replace')
+                segment = bytes(data[sect + 16:sect + 32]).rstrip(b'\0').decode('ascii', 'replace')
+                addr, size, fileoff = struct.unpack_from('<QQI', data, sect + 32)
+                sections.append(Section(arch, base, segment, name, addr, base + fileoff, size))
+        offset += cmdsize
+    return sections
+
+
+def macho_sections(data) -> List[Section]:
+    """Every section of every arm64/arm64e slice in a thin or fat Mach-O"""
+    magic = bytes(data[:4])
+    if magic in (b'\xca\xfe\xba\xbe', b'\xca\xfe\xba\xbf'):
+        is64 = magic[3] == 0xBF
+        count = struct.unpack_from('>I', data, 4)[0]
+        bases = []
+        for i in range(count):
+            if is64:
+                bases.append(struct.unpack_from('>iiQ', data, 8 + 32 * i)[2])
+            else:
+                bases.append(struct.unpack_from('>iiI', data, 8 + 20 * i)[2])
+    else:
+        bases = [0]
+    return [section for base in bases for section in _thin_sections(data, base)]
+
+
+def text_sections(data) -> List[Section]:
+    """__TEXT,__text of every arm64/arm64e slice"""
+    return [s for s in macho_sections(data) if (s.segment, s.name) == ('__TEXT', '__text')]
+
+
+CFSTRING_ENTRY_SIZE = 32  # isa, flags, C string pointer, length
+CFSTRING_ASCII_FLAGS = 0x7C8
+
+
+def cfstring_length_fields(data, cstring_offset: int, length: int) -> List[int]:
+    """File offsets of the length field of each ASCII __cfstring literal built on the C string
+    at cstring_offset. Rewriting that string to a different length must update these too.
+
+    Pointers are matched on their low 32 bits: chained-fixup rebases keep the target's vm
+    offset there, and plain pointers are the vm address itself (the image is based at 0).
+    """
+    sections = macho_sections(data)
+    fields = []
+    for cstr in sections:
+        if cstr.segment != '__TEXT' or not cstr.offset <= cstring_offset < cstr.offset + cstr.size:
+            continue
+        target = cstr.addr + cstring_offset - cstr.offset
+        for cf in sections:
+            if cf.slice != cstr.slice or cf.name != '__cfstring':
+                continue
+            for entry in range(cf.offset, cf.offset + cf.size - CFSTRING_ENTRY_SIZE + 1, CFSTRING_ENTRY_SIZE):
+                _, flags, pointer, size = struct.unpack_from('<QQQQ', data, entry)
+                if flags == CFSTRING_ASCII_FLAGS and pointer & 0xFFFFFFFF == target and size == length:
+                    fields.append(entry + 24)
+    return fields
+
+
+# ============================================================================
+# Specs and resolution
+# ============================================================================
+
+@dataclass(frozen=True)
+class PatchSpec:
+    name: str
+    old: int                                        # instruction word to replace
+    new: int
+    context: Tuple[Tuple[int, int, int], ...] = ()  # (word delta from the target, value, mask)
+    expect: int = 1                                 # matches required in each slice it applies to
+    arches: Tuple[str, ...] = ('arm64', 'arm64e')
+    param: str = ''                                 # tunable whose value becomes the new MOVZ immediate
+
+    @property
+    def description(self) -> str:
+        if is_movz(self.old) and is_movz(self.new):
+            return f"{movz_reg(self.old)} = {movz_imm(self.old)} -> {movz_imm(self.new)}"
+        return f"{self.old:08x} -> {self.new:08x}"
+
+
+def parameterise(specs, values: Dict[str, int]) -> Tuple[PatchSpec, ...]:
+    """Specs with each parameterised site's replacement re-encoded to values[spec.param]"""
+    return tuple(replace(s, new=with_imm(s.new, values[s.param])) if s.param in values else s for s in specs)
+
+
+def spec_fingerprint(specs) -> str:
+    """Changes whenever what a spec matches does; replacement values are not part of it,
+    so one resolved plan serves every parameterisation of the same specs."""
+    material = json.dumps([[s.name, s.old, [list(c) for c in s.context], s.expect, list(s.arches)]
+                           for s in specs])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class PatchSite(NamedTuple):
+    spec: str
+    arch: str
+    offset: int
+
+
+def _words(data, section: Section) -> array.array:
+    words = array.array('I')
+    words.frombytes(data[section.offset:section.offset + section.size - section.size % 4])
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
+
+
+def scan(data, section: Section, words: array.array, spec: PatchSpec) -> List[int]:
+    """File offsets in one section where spec.old appears, aligned, with its context"""
+    needle = spec.old.to_bytes(4, 'little')
+    start, end = section.offset, section.offset + len(words) * 4
+    hits = []
+    pos = data.find(needle, start, end)
+    while pos != -1:
+        if (pos - start) % 4:
+            pos = data.find(needle, pos + 1, end)
+            continue
+        index = (pos - start) // 4
+        if all(0 <= index + delta < len(words) and words[index + delta] & mask == value
+               for delta, value, mask in spec.context):
+            hits.append(pos)
+        pos = data.find(needle, pos + 4, end)
+    return hits
+
+
+@dataclass
+class PatchPlan:
+    """Resolved offsets of a spec set in one binary; only applied when errors is empty."""
+    sites: List[PatchSite]
+    errors: List[str]
+    dylib_sha256: str
+    fingerprint: str
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PatchPlan"]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            if raw.get('format') != PATCH_PLAN_FORMAT:
+                return None
+            return cls([PatchSite(*s) for s in raw['sites']], raw['errors'],
+                       raw['dylib_sha256'], raw['fingerprint'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str):
+        part_path = f"{path}.part"
+        with open(part_path, 'w', encoding='utf-8', newline='\n') as f:
+            json.dump({'format': PATCH_PLAN_FORMAT, 'dylib_sha256': self.dylib_sha256,
+                       'fingerprint': self.fingerprint, 'sites': [list(s) for s in self.sites],
+                       'errors': self.errors}, f, indent=2)
+            f.write('\n')
+        os.replace(part_path, path)
+
+
+def resolve(data, specs) -> PatchPlan:
+    """Locate every spec in every slice; count mismatches become errors rather than sites"""
+    sections = text_sections(data)
+    sites, errors = [], []
+    if not sections:
+        errors.append("no arm64/arm64e __TEXT,__text section found")
+    for section in sections:
+        words = _words(data, section)
+        for spec in specs:
+            if section.arch not in spec.arches:
+                continue
+            hits = scan(data, section, words, spec)
+            if len(hits) != spec.expect:
+                found = ', '.join(f"0x{h:x}" for h in hits) or 'none'
+                kind = 'ambiguous' if len(hits) > spec.expect else 'missing'
+                errors.append(f"{spec.name} ({section.arch}): {kind}, {len(hits)} match(es) "
+                              f"where {spec.expect} expected [{found}]")
+                continue
+            sites.extend(PatchSite(spec.name, section.arch, h) for h in hits)
+    return PatchPlan(sorted(sites, key=lambda s: s.offset), errors,
+                     hashlib.sha256(data).hexdigest(), spec_fingerprint(specs))
+
+
+def load_or_resolve(data, specs, cache_dir: Optional[str] = None) -> Tuple[PatchPlan, bool]:
+    """resolve(), memoised on disk per (binary hash, spec fingerprint); returns (plan, from_cache)"""
+    if not cache_dir:
+        return resolve(data, specs), False
+    path = os.path.join(cache_dir, f"{hashlib.sha256(data).hexdigest()}-{spec_fingerprint(specs)[:16]}.json")
+    plan = PatchPlan.load(path)
+    if plan and plan.fingerprint == spec_fingerprint(specs):
+        return plan, True
+    plan = resolve(data, specs)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        plan.save(path)
+    except OSError:
+        pass
+    return plan, False
+
+
+def apply(data: bytearray, plan: PatchPlan, specs) -> int:
+    """Write every resolved site whose word is still the expected one; returns the number written"""
+    by_name = {s.name: s for s in specs}
+    applied = 0
+    for site in plan.sites:
+        spec = by_name[site.spec]
+        if data[site.offset:site.offset + 4] == spec.old.to_bytes(4, 'little'):
+            data[site.offset:site.offset + 4] = spec.new.to_bytes(4, 'little')
+            applied += 1
+    return applied
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect arm64 Mach-O slices for signature patching")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sec = sub.add_parser("sections", help="List the __TEXT,__text section of each arm64/arm64e slice")
+    sec.add_argument("binary")
+    args = parser.parse_args()
+
+    try:
+        with open(args.binary, "rb") as f:
+            data = f.read()
+        sections = text_sections(data)
+    except (OSError, struct.error) as e:
+        print(f"Error: {e}")
+        return 1
+    for s in sections:
+        print(f"  {s.arch:7} __text offset 0x{s.offset:x}  size 0x{s.size:x}  ({s.size // 4:,} words)")
+    return 0 if sections else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,37 +8,16 @@ import os
 import sys
 from pathlib import Path
 
-AR_MAGIC = b"!<arch>\n"
+from deb_archive import ArWriter, DebArchive
 
 def extract_ar_member(deb_path: Path, member_name: str) -> bytes:
     """Extract a specific member from an AR archive."""
-    with deb_path.open('rb') as f:
-        # Read AR magic
-        magic = f.read(8)
-        if magic != AR_MAGIC:
-            raise ValueError(f"Not a valid AR archive: {deb_path}")
-
-        # Read members until we find the one we want
-        while True:
-            header = f.read(60)
-            if not header:
-                raise ValueError(f"Member '{member_name}' not found in AR archive")
-
-            if len(header) != 60:
-                raise ValueError("Invalid AR header")
-
-            name = header[0:16].decode('ascii').strip()
-            size = int(header[48:58].decode('ascii').strip())
-
-            # Read content
-            content = f.read(size)
-
-            # Skip padding byte if size is odd
-            if size % 2 == 1:
-                f.read(1)
-
-            if name == member_name:
-                return content
+    # Only the requested member is copied out of the mapped archive
+    with DebArchive(deb_path) as deb:
+        try:
+            return bytes(deb.data(member_name))
+        except KeyError:
+            raise ValueError(f"Member '{member_name}' not found in AR archive")
 
 def extract_deb(deb_path: Path, extract_dir: Path):
     """Extract .deb package to directory structure."""
@@ -54,12 +33,14 @@ def extract_deb(deb_path: Path, extract_dir: Path):
         tar.extractall(control_dir)
 
     # Extract data.tar.lzma
-    data_bytes = extract_ar_member(deb_path, "data.tar.lzma")
     data_dir = extract_dir / "data"
     data_dir.mkdir(exist_ok=True)
 
-    # Decompress LZMA
-    decompressed = lzma.decompress(data_bytes, format=lzma.FORMAT_ALONE)
+    # Decompress LZMA straight from the mapped member (no copy of the compressed payload)
+    with DebArchive(deb_path) as deb:
+        if "data.tar.lzma" not in deb:
+            raise ValueError("Member 'data.tar.lzma' not found in AR archive")
+        decompressed = lzma.decompress(deb.data("data.tar.lzma"), format=lzma.FORMAT_ALONE)
     with tarfile.open(fileobj=io.BytesIO(decompressed), mode='r') as tar:
         tar.extractall(data_dir)
 
@@ -128,33 +109,13 @@ def compress_lzma_alone(raw_tar: Path, lzma_path: Path, preset=6):
     lzma_path.write_bytes(comp)
     raw_tar.unlink()
 
-def _add_ar_member(ar_file, name: str, content: bytes):
-    """Add a member to AR archive."""
-    if len(name) > 16:
-        raise ValueError(f"Name '{name}' too long for simple ar (16 char max).")
-    header = (
-        name.ljust(16) +
-        "0".ljust(12) +
-        "0".ljust(6) +
-        "0".ljust(6) +
-        "100644".ljust(8) +
-        str(len(content)).ljust(10) +
-        "`\n"
-    ).encode("ascii")
-    if len(header) != 60:
-        raise RuntimeError("Ar header not 60 bytes.")
-    ar_file.write(header)
-    ar_file.write(content)
-    if len(content) % 2 == 1:
-        ar_file.write(b"\n")
-
 def write_deb(output_deb: Path, control_tgz: Path, data_lzma: Path):
     """Write .deb AR archive."""
     with output_deb.open("wb") as ar:
-        ar.write(AR_MAGIC)
-        _add_ar_member(ar, "debian-binary", b"2.0\n")
-        _add_ar_member(ar, "control.tar.gz", control_tgz.read_bytes())
-        _add_ar_member(ar, "data.tar.lzma", data_lzma.read_bytes())
+        writer = ArWriter(ar)
+        writer.add("debian-binary", b"2.0\n")
+        writer.add_file("control.tar.gz", control_tgz)
+        writer.add_file("data.tar.lzma", data_lzma)
 
 def repack_deb(extracted_root: Path, output_deb: Path):
     """Repack .deb from extracted directory."""
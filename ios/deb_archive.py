@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Shared .deb (ar) reader/writer for the iOS packaging tools.
+
+DebArchive memory-maps the package and indexes it from the 60-byte member
+headers alone; member contents are handed out as memoryview slices of the
+map, so listing or validating a package never reads the payloads and
+extracting one member never copies the others.
+
+ArWriter writes the same ar layout every tool here has always produced
+(mtime/uid/gid 0, mode 100644) and can stream a member whose size is not
+known up front, back-patching the header once it is closed. Combined with
+LZMAWriter, a tar can be written straight into data.tar.lzma without the
+raw or compressed archive ever being held in memory.
+
+Usage:
+    python deb_archive.py list iosvcam_base.deb
+"""
+import io
+import lzma
+import mmap
+import os
+import sys
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional
+
+AR_MAGIC = b"!<arch>\n"
+AR_HEADER_SIZE = 60
+AR_NAME_MAX = 16
+# Decoder dictionary per LZMA preset 0-9 (what liblzma allocates to unpack it)
+LZMA_PRESET_DICT = (1 << 18, 1 << 20, 1 << 21, 1 << 22, 1 << 22, 1 << 23, 1 << 23, 1 << 24, 1 << 25, 1 << 26)
+
+
+class ArError(ValueError):
+    pass
+
+
+class ArMember(NamedTuple):
+    name: str
+    header_offset: int
+    data_offset: int
+    size: int
+
+
+def ar_header(name: str, size: int) -> bytes:
+    if len(name) > AR_NAME_MAX:
+        raise ArError(f"Name '{name}' too long for simple ar ({AR_NAME_MAX} char max).")
+    header = (
+        name.ljust(16) +
+        "0".ljust(12) +
+        "0".ljust(6) +
+        "0".ljust(6) +
+        "100644".ljust(8) +
+        str(size).ljust(10) +
+        "`\n"
+    ).encode("ascii")
+    if len(header) != AR_HEADER_SIZE:
+        raise ArError(f"Ar header not {AR_HEADER_SIZE} bytes (size {size} too large?).")
+    return header
+
+
+def parse_preset(value: str) -> Optional[int]:
+    """'0'-'9', optionally suffixed 'e' for PRESET_EXTREME, or 'none' (uncompressed data.tar -> None)."""
+    value = str(value).strip().lower()
+    if value == "none":
+        return None
+    extreme = value.endswith("e")
+    level = value[:-1] if extreme else value
+    if not level.isdigit() or int(level) > 9:
+        raise ValueError(f"Bad compression preset '{value}' (expected 0-9, 0e-9e or none)")
+    return int(level) | (lzma.PRESET_EXTREME if extreme else 0)
+
+
+def preset_label(preset: Optional[int]) -> str:
+    if preset is None:
+        return "none"
+    return f"{preset & ~lzma.PRESET_EXTREME}{'e' if preset & lzma.PRESET_EXTREME else ''}"
+
+
+def data_member_name(preset: Optional[int]) -> str:
+    return "data.tar" if preset is None else "data.tar.lzma"
+
+
+class DebArchive:
+    """A memory-mapped ar archive; member data is exposed as zero-copy memoryviews."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            self._file.close()
+            raise ArError(f"Not a valid ar archive: {self.path}")
+        self._view = memoryview(self._map)
+        try:
+            self.members = self._index()
+        except ArError:
+            self.close()
+            raise
+
+    def _index(self) -> List[ArMember]:
+        if self._map[:len(AR_MAGIC)] != AR_MAGIC:
+            raise ArError(f"Not a valid ar archive: {self.path}")
+        members = []
+        offset = len(AR_MAGIC)
+        end = len(self._map)
+        while offset < end:
+            header = self._map[offset:offset + AR_HEADER_SIZE]
+            if len(header) < AR_HEADER_SIZE:
+                raise ArError("Truncated ar header")
+            if header[58:60] != b"`\n":
+                raise ArError(f"Bad ar header at offset {offset}")
+            name = header[0:16].decode("ascii", "ignore").strip().rstrip("/")
+            size_txt = header[48:58].decode("ascii", "ignore").strip() or "0"
+            if not size_txt.isdigit():
+                raise ArError(f"Bad ar member size '{size_txt}' for {name}")
+            size = int(size_txt)
+            data_offset = offset + AR_HEADER_SIZE
+            if data_offset + size > end:
+                raise ArError(f"Truncated ar member {name}")
+            members.append(ArMember(name, offset, data_offset, size))
+            offset = data_offset + size + (size % 2)
+        return members
+
+    def names(self) -> List[str]:
+        return [m.name for m in self.members]
+
+    def __contains__(self, name: str) -> bool:
+        return any(m.name == name for m in self.members)
+
+    def member(self, name: str) -> ArMember:
+        for m in self.members:
+            if m.name == name:
+                return m
+        raise KeyError(f"Member '{name}' not found in {self.path}")
+
+    def find(self, prefix: str) -> Optional[ArMember]:
+        """First member whose name starts with prefix (e.g. 'data.tar')."""
+        return next((m for m in self.members if m.name.startswith(prefix)), None)
+
+    def data(self, member) -> memoryview:
+        """A member's contents as a slice of the map. Release it before close()."""
+        if isinstance(member, str):
+            member = self.member(member)
+        return self._view[member.data_offset:member.data_offset + member.size]
+
+    def open(self, member) -> io.BufferedReader:
+        """A read-only file object over a member, for streaming decoders (tarfile 'r|', LZMAFile)."""
+        return io.BufferedReader(_ViewReader(self.data(member)))
+
+    def close(self):
+        if self._map is None:
+            return
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # A caller still holds a member view; the map is freed with it
+            pass
+        self._file.close()
+        self._map = None
+
+    def __enter__(self) -> "DebArchive":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ViewReader(io.RawIOBase):
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+class LZMAWriter:
+    """Write-only file object that LZMA-compresses into another file object as data arrives."""
+
+    def __init__(self, out: BinaryIO, preset: int = 6, format: int = lzma.FORMAT_ALONE):
+        self._out = out
+        self._compressor = lzma.LZMACompressor(format=format, preset=preset)
+        self.raw_size = 0
+
+    def write(self, data) -> int:
+        self.raw_size += len(data)
+        compressed = self._compressor.compress(data)
+        if compressed:
+            self._out.write(compressed)
+        return len(data)
+
+    def close(self):
+        if self._compressor is not None:
+            self._out.write(self._compressor.flush())
+            self._compressor = None
+
+
+class _MemberStream:
+    """File-like sink for ArWriter.member(); counts what is written."""
+
+    def __init__(self, out: BinaryIO):
+        self._out = out
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._out.write(data)
+        self.size += len(data)
+        return len(data)
+
+
+class ArWriter:
+    """Writes an ar archive member by member to an open binary file."""
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        out.write(AR_MAGIC)
+
+    def _pad(self, size: int):
+        if size % 2 == 1:
+            self.out.write(b"\n")
+
+    def add(self, name: str, content):
+        """Add a member from any bytes-like object (bytes, bytearray, memoryview)."""
+        self.out.write(ar_header(name, len(content)))
+        self.out.write(content)
+        self._pad(len(content))
+
+    def add_chunks(self, name: str, size: int, chunks: Iterable[bytes]):
+        """Add a member of known size from an iterable of chunks."""
+        self.out.write(ar_header(name, size))
+        written = 0
+        for chunk in chunks:
+            self.out.write(chunk)
+            written += len(chunk)
+        if written != size:
+            raise ArError(f"Member {name}: expected {size} bytes, got {written}")
+        self._pad(size)
+
+    def add_file(self, name: str, path, chunk_size: int = 1 << 20):
+        """Copy a file into the archive without loading it whole."""
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            self.add_chunks(name, size, iter(lambda: f.read(chunk_size), b""))
+
+    @contextmanager
+    def member(self, name: str) -> Iterator[_MemberStream]:
+        """Stream a member of unknown size; the header's size field is back-patched.
+
+        The output file must be seekable.
+        """
+        header_at = self.out.tell()
+        self.out.write(ar_header(name, 0))
+        stream = _MemberStream(self.out)
+        yield stream
+        end = self.out.tell()
+        self.out.seek(header_at)
+        self.out.write(ar_header(name, stream.size))
+        self.out.seek(end)
+        self._pad(stream.size)
+
+    @contextmanager
+    def compressed_member(self, name: str, preset: int = 6,
+                          format: int = lzma.FORMAT_ALONE) -> Iterator[LZMAWriter]:
+        """Stream a member through an incremental LZMA compressor (e.g. data.tar.lzma)."""
+        with self.member(name) as raw:
+            sink = LZMAWriter(raw, preset, format)
+            yield sink
+            sink.close()
+
+    @contextmanager
+    def data_member(self, preset: Optional[int] = 6) -> Iterator[BinaryIO]:
+        """data.tar.lzma at the given preset, or a plain data.tar when preset is None."""
+        if preset is None:
+            with self.member(data_member_name(preset)) as sink:
+                yield sink
+        else:
+            with self.compressed_member(data_member_name(preset), preset) as sink:
+                yield sink
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect .deb/ar archives without reading payloads")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    ls = sub.add_parser("list", help="List members with offsets and sizes")
+    ls.add_argument("deb")
+    args = parser.parse_args()
+
+    try:
+        with DebArchive(args.deb) as deb:
+            for m in deb.members:
+                print(f"  {m.name:16} offset {m.data_offset:>10}  size {m.size:>10}")
+    except (OSError, ArError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
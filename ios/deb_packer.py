@@ -1,77 +1,183 @@
 #!/usr/bin/env python3
-import tarfile, lzma, os
+import tarfile, lzma, os, sys, gzip, io, contextlib
 from pathlib import Path
-
-AR_MAGIC = b"!<arch>\n"
+from deb_archive import ArWriter, LZMAWriter, parse_preset
+# Fixed mtime and ownership for every entry so rebuilding gives identical bytes
+REPRODUCIBLE_MTIME = int(os.environ.get("SOURCE_DATE_EPOCH", "0"))
 
 def _strip_pax(tarinfo: tarfile.TarInfo) -> tarfile.TarInfo:
     tarinfo.pax_headers = {}
+    tarinfo.mtime = REPRODUCIBLE_MTIME
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = "root"
+    tarinfo.gname = "wheel"
     return tarinfo
 
-def build_control_tar(control_dir: Path, out_path: Path):
-    with tarfile.open(out_path, "w:gz", format=tarfile.GNU_FORMAT) as tar:
-        # Add directories first so package extraction creates paths
-        for p in control_dir.rglob("*"):
-            if p.is_dir():
-                tar.add(p, arcname=p.relative_to(control_dir), recursive=False, filter=_strip_pax)
-        for p in control_dir.rglob("*"):
-            if p.is_file():
-                tar.add(p, arcname=p.relative_to(control_dir), filter=_strip_pax)
+def _add_tree(tar: tarfile.TarFile, root: Path):
+    entries = sorted(root.rglob("*"), key=lambda p: p.relative_to(root).as_posix())
+    # Add directories first so package extraction creates paths
+    for p in entries:
+        if p.is_dir():
+            tar.add(p, arcname=p.relative_to(root).as_posix(), recursive=False, filter=_strip_pax)
+    for p in entries:
+        if p.is_file():
+            tar.add(p, arcname=p.relative_to(root).as_posix(), filter=_strip_pax)
+
+def build_control_tar(control_dir: Path, out):
+    """Write control.tar.gz to a path or an open binary file."""
+    raw = io.BytesIO()
+    with tarfile.open(fileobj=raw, mode="w", format=tarfile.GNU_FORMAT) as tar:
+        _add_tree(tar, control_dir)
+    # gzip by hand: tarfile's "w:gz" stamps the file name and current time into the header
+    with contextlib.ExitStack() as stack:
+        f = stack.enter_context(out.open("wb")) if isinstance(out, Path) else out
+        with gzip.GzipFile(filename="", fileobj=f, mode="wb", mtime=0) as gz:
+            gz.write(raw.getvalue())
 
 def build_data_tar(data_dir: Path, raw_tar: Path):
     with tarfile.open(raw_tar, "w", format=tarfile.GNU_FORMAT) as tar:
-        # Add directories first so package extraction creates paths
-        for p in data_dir.rglob("*"):
-            if p.is_dir():
-                tar.add(p, arcname=p.relative_to(data_dir), recursive=False, filter=_strip_pax)
-        for p in data_dir.rglob("*"):
-            if p.is_file():
-                tar.add(p, arcname=p.relative_to(data_dir), filter=_strip_pax)
-
-def compress_lzma_alone(raw_tar: Path, lzma_path: Path, preset=6):
-    data = raw_tar.read_bytes()
-    comp = lzma.compress(data, format=lzma.FORMAT_ALONE, preset=preset)
-    lzma_path.write_bytes(comp)
-    raw_tar.unlink()
+        _add_tree(tar, data_dir)
 
-def _add_ar_member(ar_file, name: str, content: bytes):
-    if len(name) > 16:
-        raise ValueError(f"Name '{name}' too long for simple ar (16 char max).")
-    header = (
-        name.ljust(16) +
-        "0".ljust(12) +
-        "0".ljust(6) +
-        "0".ljust(6) +
-        "100644".ljust(8) +
-        str(len(content)).ljust(10) +
-        "`\n"
-    ).encode("ascii")
-    if len(header) != 60:
-        raise RuntimeError("Ar header not 60 bytes.")
-    ar_file.write(header)
-    ar_file.write(content)
-    if len(content) % 2 == 1:
-        ar_file.write(b"\n")
+def compress_lzma_alone(raw_tar: Path, lzma_path: Path, preset=6, chunk_size=1 << 20):
+    # Incremental, so memory stays flat however large the tar is
+    with raw_tar.open("rb") as src, lzma_path.open("wb") as dst:
+        sink = LZMAWriter(dst, preset)
+        for chunk in iter(lambda: src.read(chunk_size), b""):
+            sink.write(chunk)
+        sink.close()
+    raw_tar.unlink()
 
 def write_deb(output_deb: Path, control_tgz: Path, data_lzma: Path):
     with output_deb.open("wb") as ar:
-        ar.write(AR_MAGIC)
-        _add_ar_member(ar, "debian-binary", b"2.0\n")
-        _add_ar_member(ar, "control.tar.gz", control_tgz.read_bytes())
-        _add_ar_member(ar, "data.tar.lzma", data_lzma.read_bytes())
+        writer = ArWriter(ar)
+        writer.add("debian-binary", b"2.0\n")
+        writer.add_file("control.tar.gz", control_tgz)
+        writer.add_file("data.tar.lzma", data_lzma)
+
+def _control_tar_gz(control_dir: Path) -> bytes:
+    out = io.BytesIO()
+    build_control_tar(control_dir, out)
+    return out.getvalue()
 
-def build_deb(extracted_root: Path, output_deb: Path):
+def build_deb(extracted_root: Path, output_deb: Path, preset=6):
+    """
+    Pack extracted_root/{control,data} into output_deb in one streaming pass:
+    tar writer -> incremental LZMA -> ar member whose size is back-patched.
+    preset None writes an uncompressed data.tar instead.
+    Neither the raw nor the compressed data archive is held in memory or
+    written to a temp file; only control.tar.gz (a few KB) is buffered.
+    """
     control_dir = extracted_root / "control"
     data_dir = extracted_root / "data"
     if not control_dir.exists() or not data_dir.exists():
         raise RuntimeError("Expected 'control' and 'data' directories inside extracted root.")
-    tmp = extracted_root / "_repack_tmp"
-    tmp.mkdir(exist_ok=True)
-    control_tgz = tmp / "control.tar.gz"
-    raw_data_tar = tmp / "data.tar"
-    data_lzma = tmp / "data.tar.lzma"
-    build_control_tar(control_dir, control_tgz)
-    build_data_tar(data_dir, raw_data_tar)
-    compress_lzma_alone(raw_data_tar, data_lzma)
-    write_deb(output_deb, control_tgz, data_lzma)
+    control_tgz = _control_tar_gz(control_dir)
+    with output_deb.open("wb") as ar:
+        writer = ArWriter(ar)
+        writer.add("debian-binary", b"2.0\n")
+        writer.add("control.tar.gz", control_tgz)
+        with writer.data_member(preset) as sink, \
+                tarfile.open(fileobj=sink, mode="w|", format=tarfile.GNU_FORMAT) as tar:
+            _add_tree(tar, data_dir)
     print(f"[deb_packer] Built {output_deb}")
+
+# ============================================================================
+# Peak memory benchmark
+# ============================================================================
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes."""
+    if sys.platform == "win32":
+        import ctypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [("cb", ctypes.c_uint32), ("PageFaultCount", ctypes.c_uint32),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+def _build_deb_in_memory(extracted_root: Path, output_deb: Path, preset=6):
+    # The previous approach, kept for comparison: whole tar in RAM, one-shot compress
+    raw = io.BytesIO()
+    with tarfile.open(fileobj=raw, mode="w", format=tarfile.GNU_FORMAT) as tar:
+        _add_tree(tar, extracted_root / "data")
+    compressed = lzma.compress(raw.getvalue(), format=lzma.FORMAT_ALONE, preset=preset)
+    with output_deb.open("wb") as ar:
+        writer = ArWriter(ar)
+        writer.add("debian-binary", b"2.0\n")
+        writer.add("control.tar.gz", _control_tar_gz(extracted_root / "control"))
+        writer.add("data.tar.lzma", compressed)
+
+def _make_tree(root: Path, size_mb: int):
+    """Synthetic package: one incompressible and one compressible file per MB pair."""
+    (root / "control").mkdir(parents=True)
+    (root / "control" / "control").write_text("Package: bench\nVersion: 1.0\nArchitecture: iphoneos-arm\n")
+    data = root / "data" / "var" / "jb" / "bench"
+    data.mkdir(parents=True)
+    for i in range(size_mb):
+        payload = os.urandom(1 << 20) if i % 2 else (b"vcam-%08d " % i) * ((1 << 20) // 14)
+        (data / f"blob{i:04d}.bin").write_bytes(payload)
+
+def bench_memory(sizes_mb, preset=6):
+    import subprocess
+    import tempfile
+    import time
+    print(f"{'size MB':>8}  {'mode':>7}  {'seconds':>8}  {'peak RSS MB':>11}  {'deb MB':>7}")
+    for size_mb in sizes_mb:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "pkg"
+            _make_tree(root, size_mb)
+            for mode in ("memory", "stream"):
+                out = Path(tmp) / f"{mode}.deb"
+                started = time.perf_counter()
+                result = subprocess.run([sys.executable, __file__, "_bench-child", mode, str(root), str(out),
+                                         str(preset)], capture_output=True, text=True)
+                elapsed = time.perf_counter() - started
+                if result.returncode != 0:
+                    print(f"{size_mb:>8}  {mode:>7}  failed: {result.stderr.strip().splitlines()[-1:]}")
+                    continue
+                peak = int(result.stdout.strip().splitlines()[-1])
+                print(f"{size_mb:>8}  {mode:>7}  {elapsed:>8.2f}  {peak / 1e6:>11.1f}  {out.stat().st_size / 1e6:>7.2f}")
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build .deb packages from an extracted control/data tree")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build", help="Pack <root>/control and <root>/data into a .deb")
+    build.add_argument("root", type=Path)
+    build.add_argument("output", type=Path)
+    build.add_argument("--preset", type=parse_preset, default=6, help="LZMA preset 0-9, 9e (extreme) or none")
+    bench = sub.add_parser("bench", help="Compare peak RSS of the in-memory and streaming builds")
+    bench.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256], help="Package sizes in MB")
+    bench.add_argument("--preset", type=int, default=6)
+    child = sub.add_parser("_bench-child")
+    child.add_argument("mode", choices=["memory", "stream"])
+    child.add_argument("root", type=Path)
+    child.add_argument("output", type=Path)
+    child.add_argument("preset", type=int)
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        build_deb(args.root, args.output, args.preset)
+    elif args.cmd == "bench":
+        bench_memory(args.sizes, args.preset)
+    else:
+        builder = _build_deb_in_memory if args.mode == "memory" else build_deb
+        with contextlib.redirect_stdout(io.StringIO()):
+            builder(args.root, args.output, args.preset)
+        print(peak_rss())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
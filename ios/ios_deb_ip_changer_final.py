@@ -19,75 +19,279 @@ import struct
 import argparse
 import io
 import lzma
+import copy
+import posixpath
+import time
+import tempfile
+import contextlib
+import signal
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional
+import arm64_patch
+from arm64_patch import ANY_BL, PatchPlan, PatchSpec, exact, ldr_w_sp, movz_w, movz_x, str_w_sp
+from deb_archive import (AR_HEADER_SIZE, ArError, ArWriter, DebArchive, LZMA_PRESET_DICT,
+                          parse_preset, preset_label)
+
+DYLIB_ARCNAME = 'var/jb/Library/MobileSubstrate/DynamicLibraries/vcamera.dylib'
+# The IP sits in the C string "http://192.168.1.91/I"; shorter IPs are written NUL-padded.
+# The longest IP that fits is the base's own IP (IPPatchIndex.max_ip_length).
+# Every tar entry gets this mtime (and root/wheel ownership) so builds are byte-reproducible
+REPRODUCIBLE_MTIME = int(os.environ.get('SOURCE_DATE_EPOCH', '0'))
+# Bump when the variant build changes in a way that alters output bytes
+VARIANT_CACHE_FORMAT = 2
+IP_INDEX_FORMAT = 2
+IP_INDEX_SUFFIX = '.ipindex.json'  # sidecar written next to the base .deb
+# --compression fast: valid data.tar.lzma for quick on-device iteration, not for release
+FAST_PRESET = 0
+DEFAULT_TIME_BUDGET = 2.0  # seconds per variant for --compression auto
+
+# 1s latency/bursting fix. Each spec must match exactly `expect` times per slice or the
+# whole set is refused. The new MOVZ immediate comes from the spec's param (--set/--sweep,
+# default 1, which is the original --tweak). The arch restrictions reproduce the original offset table, which
+# patched the buffer and 2000 ms sites only in arm64 and the divisor/timer sites only in arm64e.
+_SUBS_W8_W8_W9 = exact(0x6B090108)
+LATENCY_PATCHES = (
+    # 56 / 120 frame counter (likely flush interval)
+    PatchSpec('flush-56', movz_w(8, 56), movz_w(8, 1), ((-1, *ldr_w_sp(9)), (1, *_SUBS_W8_W8_W9)), expect=3,
+              param='flush'),
+    PatchSpec('flush-120', movz_w(8, 120), movz_w(8, 1), ((-1, *ldr_w_sp(9)), (1, *_SUBS_W8_W8_W9)), expect=3,
+              param='flush'),
+    # 1000 ms buffer settings: mov w8,#1000; str w8,[sp]; add x0,..; mov w1,#97; mov x2,#1000; mov x3,#1024
+    PatchSpec('buffer-w8', movz_w(8, 1000), movz_w(8, 1),
+              ((1, *str_w_sp(8)), (3, *exact(movz_w(1, 97))), (4, *exact(movz_x(2, 1000))),
+               (5, *exact(movz_x(3, 1024)))), expect=3, arches=('arm64',), param='buffer'),
+    PatchSpec('buffer-x2', movz_x(2, 1000), movz_x(2, 1),
+              ((-4, *exact(movz_w(8, 1000))), (-1, *exact(movz_w(1, 97))), (1, *exact(movz_x(3, 1024)))),
+              expect=3, arches=('arm64',), param='buffer'),
+    PatchSpec('w3-2000', movz_w(3, 2000), movz_w(3, 1), ((1, *ANY_BL),), arches=('arm64',), param='buffer'),
+    # mov w10,#1000; sdiv w9,w9,w10
+    PatchSpec('divisor-1000', movz_w(10, 1000), movz_w(10, 1), ((1, *exact(0x1ACA0D29)),), arches=('arm64e',),
+              param='buffer'),
+    # bl ..; mov w8,#1000; str w8,[sp]; mov x0,x22
+    PatchSpec('timer-1000', movz_w(8, 1000), movz_w(8, 1),
+              ((-1, *ANY_BL), (1, *str_w_sp(8)), (2, *exact(0xAA1603E0))), arches=('arm64e',), param='buffer'),
+)
+LATENCY_PARAMS = ('buffer', 'flush')
+# Patched values must stay >= 1: the buffer group includes an sdiv divisor
+MIN_PATCH_VALUE, MAX_PATCH_VALUE = 1, 0xFFFF
+MACH_O_MAGICS = (
+    b'\xfe\xed\xfa\xce', b'\xce\xfa\xed\xfe',
+    b'\xfe\xed\xfa\xcf', b'\xcf\xfa\xed\xfe',
+    b'\xca\xfe\xba\xbe', b'\xbe\xba\xfe\xca'
+)
 
 @dataclass
 class ParsedDeb:
     debian_binary: bytes
     control_tar_gz: bytes
     data_member_name: str
-    data_payload_bytes: bytes  # compressed as found
-    data_tar_raw: bytes        # decompressed tar bytes (for modification)
+    data_tar_raw: bytes  # decompressed tar bytes (for modification)
+
+@dataclass
+class TarMember:
+    info: tarfile.TarInfo
+    start: int  # offset of the member's header block(s) in VariantTemplate.data_tar
+    data: int   # offset of its contents
+    end: int    # offset just past its padded contents
+
+@dataclass
+class IPSlot:
+    """A C string holding the IP. It is rewritten whole, so the text after the IP moves
+    with it and a shorter IP leaves NUL padding before the original terminator."""
+    start: int                    # first byte of the string
+    end: int                      # its NUL terminator; capacity is end - start
+    cfstring_lengths: List[int]   # __cfstring length fields that must follow the string's length
+    exact: bool = False           # not a printable C string: only a same-length IP may go here
+
+@dataclass
+class IPPatchIndex:
+    """Where the embedded IP sits in vcamera.dylib, computed once per base .deb."""
+    ip: str
+    sites: List[int]        # offset of every occurrence of the IP
+    slots: List[IPSlot]     # the strings containing them
+    deb_sha256: str         # base .deb the offsets belong to
+    dylib_sha256: str
+
+    @classmethod
+    def scan(cls, dylib: bytes, ip: str, deb_sha256: str) -> "IPPatchIndex":
+        needle = ip.encode('ascii')
+        sites = []
+        offset = dylib.find(needle)
+        while offset != -1:
+            sites.append(offset)
+            offset = dylib.find(needle, offset + len(needle))
+        slots = {}
+        for offset in sites:
+            start = dylib.rfind(b'\x00', 0, offset) + 1
+            end = dylib.find(b'\x00', offset + len(needle))
+            text = dylib[start:end] if end != -1 else b''
+            if text.isascii() and text.decode('ascii').isprintable() and text:
+                slots.setdefault(start, IPSlot(start, end, arm64_patch.cfstring_length_fields(dylib, start, len(text))))
+            else:
+                slots[offset] = IPSlot(offset, offset + len(needle), [], exact=True)
+        return cls(ip, sites, list(slots.values()), deb_sha256, hashlib.sha256(dylib).hexdigest())
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IPPatchIndex"]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            if raw.get('format') != IP_INDEX_FORMAT:
+                return None
+            return cls(raw['ip'], raw['sites'], [IPSlot(**slot) for slot in raw['slots']],
+                       raw['deb_sha256'], raw['dylib_sha256'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            json.dump({'format': IP_INDEX_FORMAT, 'member': DYLIB_ARCNAME, **asdict(self)}, f, indent=2)
+            f.write('\n')
+
+    def max_ip_length(self) -> int:
+        """Longest IP that fits. Each slot is rewritten within its original width (the next
+        string follows its terminator) and the text around the IP stays, so this is the
+        length of the IP the base embeds."""
+        return len(self.ip)
+
+    def matches(self, dylib) -> bool:
+        """Cheap check that the recorded offsets still hold the IP"""
+        needle = self.ip.encode('ascii')
+        return bool(self.sites) and all(dylib[o:o + len(needle)] == needle for o in self.sites)
+
+    def written_spans(self):
+        spans = [(slot.start, slot.end) for slot in self.slots]
+        spans += [(f, f + 8) for slot in self.slots for f in slot.cfstring_lengths]
+        return sorted(spans)
+
+    def untouched(self, pristine, patched) -> bool:
+        """True if patched differs from pristine only inside the slots and their length fields"""
+        if len(pristine) != len(patched):
+            return False
+        pristine, patched = memoryview(pristine), memoryview(patched)
+        pos = 0
+        for start, end in self.written_spans():
+            if pristine[pos:start] != patched[pos:start]:
+                return False
+            pos = end
+        return pristine[pos:] == patched[pos:] and all(patched[slot.end] == 0 for slot in self.slots if not slot.exact)
+
+@dataclass
+class VariantTemplate:
+    """The base package parsed once and kept in memory for building variants."""
+    debian_binary: bytes
+    control_tar_gz: bytes   # permission-fixed once, then reused verbatim
+    data_tar: bytes         # permission-fixed data tar every variant is spliced from
+    members: Dict[str, TarMember] = field(default_factory=dict)
+    base_ip: Optional[str] = None
+    base_sha256: str = ''   # hash of the base .deb file, the root of every cache key
+    ip_index: Optional[IPPatchIndex] = None
+    latency_plan: Optional[PatchPlan] = None  # resolved on first --tweak build
+    _buffer: Optional[bytearray] = field(default=None, repr=False)
+
+    def member_bytes(self, name: str) -> memoryview:
+        member = self.members[name]
+        return memoryview(self.data_tar)[member.data:member.data + member.info.size]
+
+    def dylib_buffer(self) -> bytearray:
+        """The dylib in a buffer allocated once and reset to the pristine bytes on every call"""
+        pristine = self.member_bytes(DYLIB_ARCNAME)
+        if self._buffer is None:
+            self._buffer = bytearray(pristine)
+        else:
+            self._buffer[:] = pristine
+        return self._buffer
+
+    def iter_data_tar(self, replacements: Dict[str, bytes]) -> Iterator[bytes]:
+        """Yield the data tar with the given members' contents swapped in."""
+        view = memoryview(self.data_tar)
+        pos = 0
+        for member in sorted((self.members[n] for n in replacements), key=lambda m: m.start):
+            content = replacements[member.info.name]
+            info = copy.copy(member.info)
+            info.size = len(content)
+            yield view[pos:member.start]
+            yield info.tobuf(tarfile.GNU_FORMAT, tarfile.ENCODING, 'surrogateescape')
+            yield content
+            if len(content) % tarfile.BLOCKSIZE:
+                yield tarfile.NUL * (tarfile.BLOCKSIZE - len(content) % tarfile.BLOCKSIZE)
+            pos = member.end
+        yield view[pos:]
 
 class DebIPChanger:
     def __init__(self):
         self.original_deb = "iosvcam_base.deb"  # Using de-branded package
-        self.work_dir = "deb_work_temp"
         self.output_dir = "modified_debs"
         self.config_file = "ip_changer_config.json"
-        self._parsed_base = None  # Store parsed base package
+        self._template = None  # In-memory base for building variants
+        self._max_ip_length = None  # from the base's IP patch index
         self.apply_tweak = False
-
-    def apply_latency_patches(self, file_path):
-        """Apply the 1s latency/bursting fix patches"""
-        print("    - Applying 1s latency/bursting fix patches...")
-        with open(file_path, 'rb') as f:
-            data = bytearray(f.read())
-
-        # Patch List (Offset, Old Bytes, New Bytes, Description)
-        patches = [
-            # 56 / 120 Frame Counter Patches (likely flush interval)
-            (0x3D67C, b'\x08\x07\x80\x52', b'\x28\x00\x80\x52', 'W8 = 56 -> 1'),
-            (0x3D690, b'\x08\x0F\x80\x52', b'\x28\x00\x80\x52', 'W8 = 120 -> 1'),
-            (0x4885C, b'\x08\x07\x80\x52', b'\x28\x00\x80\x52', 'W8 = 56 -> 1'),
-            (0x48870, b'\x08\x0F\x80\x52', b'\x28\x00\x80\x52', 'W8 = 120 -> 1'),
-            (0x4FA44, b'\x08\x07\x80\x52', b'\x28\x00\x80\x52', 'W8 = 56 -> 1'),
-            (0x4FA58, b'\x08\x0F\x80\x52', b'\x28\x00\x80\x52', 'W8 = 120 -> 1'),
-            (0x179D50, b'\x08\x07\x80\x52', b'\x28\x00\x80\x52', 'W8 = 56 -> 1'),
-            (0x179D64, b'\x08\x0F\x80\x52', b'\x28\x00\x80\x52', 'W8 = 120 -> 1'),
-            (0x185044, b'\x08\x07\x80\x52', b'\x28\x00\x80\x52', 'W8 = 56 -> 1'),
-            (0x185058, b'\x08\x0F\x80\x52', b'\x28\x00\x80\x52', 'W8 = 120 -> 1'),
-            (0x18C258, b'\x08\x07\x80\x52', b'\x28\x00\x80\x52', 'W8 = 56 -> 1'),
-            (0x18C26C, b'\x08\x0F\x80\x52', b'\x28\x00\x80\x52', 'W8 = 120 -> 1'),
-
-            # 1000ms Buffer Settings Patches
-            (0x49054, b'\x08\x7D\x80\x52', b'\x28\x00\x80\x52', 'W8 = 1000 -> 1'),
-            (0x49064, b'\x02\x7D\x80\xD2', b'\x22\x00\x80\xD2', 'X2 = 1000 -> 1'),
-            (0x50400, b'\x08\x7D\x80\x52', b'\x28\x00\x80\x52', 'W8 = 1000 -> 1'),
-            (0x50410, b'\x02\x7D\x80\xD2', b'\x22\x00\x80\xD2', 'X2 = 1000 -> 1'),
-            (0x524DC, b'\x08\x7D\x80\x52', b'\x28\x00\x80\x52', 'W8 = 1000 -> 1'),
-            (0x524EC, b'\x02\x7D\x80\xD2', b'\x22\x00\x80\xD2', 'X2 = 1000 -> 1'),
-            (0x60618, b'\x03\xFA\x80\x52', b'\x23\x00\x80\x52', 'W3 = 2000 -> 1'),
-            (0x1A366C, b'\x0A\x7D\x80\x52', b'\x2A\x00\x80\x52', 'W10 = 1000 -> 1'),
-            (0x1BD80C, b'\x08\x7D\x80\x52', b'\x28\x00\x80\x52', 'W8 = 1000 -> 1'),
-        ]
-
-        applied_count = 0
-        for offset, old, new, desc in patches:
-            if offset + len(old) > len(data):
-                continue
-            actual = data[offset:offset+len(old)]
-            if actual == old:
-                data[offset:offset+len(old)] = new
-                applied_count += 1
-        
+        self.patch_values = {}  # latency param -> MOVZ immediate; unset params stay 1
+        self.preset = 6  # LZMA preset for data.tar.lzma; None writes an uncompressed data.tar
+        self.time_budget = None  # seconds per variant; set by --compression auto
+        self.cache_dir = "variant_cache"  # built variants, content-addressed
+        self.use_cache = True
+
+    def latency_values(self, patch_values=None):
+        """Immediate per latency param for this build; every param defaults to 1"""
+        overrides = self.patch_values if patch_values is None else patch_values
+        return {**{param: 1 for param in LATENCY_PARAMS}, **overrides}
+
+    def patch_label(self, patch_values=None):
+        """'tweaked' for the original all-1 patch, else e.g. 'buffer33_flush4' (file name suffix)"""
+        values = self.latency_values(patch_values)
+        if all(v == 1 for v in values.values()):
+            return 'tweaked'
+        return '_'.join(f"{param}{values[param]}" for param in LATENCY_PARAMS)
+
+    def patch_latency_bytes(self, data: bytearray, plan: Optional[PatchPlan] = None) -> int:
+        """Apply the latency patches to dylib bytes in place; returns the number applied (0 if refused)"""
+        values = self.latency_values()
+        if self.patch_label() == 'tweaked':
+            print("    - Applying 1s latency/bursting fix patches...")
+        else:
+            print(f"    - Applying latency/bursting patches ({', '.join(f'{k}={v}' for k, v in values.items())})...")
+        plan = plan or self.resolve_latency_plan(data)
+        if plan.errors:
+            print("      ✗ Patch signatures did not resolve cleanly; refusing to patch:")
+            for error in plan.errors:
+                print(f"        {error}")
+            return 0
+
+        applied_count = arm64_patch.apply(data, plan, arm64_patch.parameterise(LATENCY_PATCHES, values))
         if applied_count > 0:
-            with open(file_path, 'wb') as f:
-                f.write(data)
-            print(f"      ✓ Applied {applied_count}/{len(patches)} latency fix patches")
-            return True
-        return False
+            print(f"      ✓ Applied {applied_count}/{len(plan.sites)} latency fix patches")
+        return applied_count
+
+    def resolve_latency_plan(self, dylib, report=False) -> PatchPlan:
+        """Find the latency patch sites by signature (cached per dylib hash under cache_dir)"""
+        cache_dir = os.path.join(self.cache_dir, 'patch_sites') if self.use_cache else None
+        plan, cached = arm64_patch.load_or_resolve(bytes(dylib), LATENCY_PATCHES, cache_dir)
+        if report:
+            self.print_patch_report(plan, cached)
+        return plan
+
+    def print_patch_report(self, plan: PatchPlan, cached=False):
+        source = "cached" if cached else "scanned"
+        print(f"  Latency patch sites ({source}, dylib {plan.dylib_sha256[:12]}):")
+        for spec in LATENCY_PATCHES:
+            sites = [s for s in plan.sites if s.spec == spec.name]
+            for arch in spec.arches:
+                offsets = [f"0x{s.offset:x}" for s in sites if s.arch == arch]
+                if offsets:
+                    print(f"    ✓ {spec.name:<13} {arch:<7} {spec.description:<18} {', '.join(offsets)}")
+        for error in plan.errors:
+            print(f"    ✗ {error}")
+
+    def latency_plan_for(self, template: VariantTemplate) -> PatchPlan:
+        """Resolve once per template; workers inherit the plan with the template"""
+        if template.latency_plan is None:
+            template.latency_plan = self.resolve_latency_plan(template.member_bytes(DYLIB_ARCNAME), report=True)
+        return template.latency_plan
 
     def print_header(self):
         """Print application header"""
@@ -96,58 +300,28 @@ class DebIPChanger:
         print("=" * 70)
         print()
 
-    def suggest_valid_ip_format(self, ip_string):
-        """Suggest a valid 12-character IP format based on input"""
-        parts = ip_string.split('.')
-        if len(parts) != 4:
-            return None
-
-        suggestions = []
-
-        # Try padding with zeros
-        try:
-            octets = [int(p) for p in parts]
-            # Format 1: XXX.XXX.X.XX (like 192.168.1.91)
-            if octets[0] >= 100 and octets[1] >= 100 and octets[2] < 10 and octets[3] >= 10:
-                suggestions.append(f"{octets[0]}.{octets[1]}.{octets[2]}.{octets[3]:02d}")
-
-            # Format 2: XX.XX.XX.XXX (like 10.10.10.100)
-            if all(10 <= o < 100 for o in octets[:3]) and octets[3] >= 100:
-                suggestions.append(f"{octets[0]:02d}.{octets[1]:02d}.{octets[2]:02d}.{octets[3]}")
-
-            # Format 3: XXX.XX.XX.XX (like 172.16.10.50)
-            if octets[0] >= 100 and all(10 <= o < 100 for o in octets[1:]):
-                suggestions.append(f"{octets[0]}.{octets[1]:02d}.{octets[2]:02d}.{octets[3]:02d}")
-
-        except ValueError:
-            pass
-
-        return suggestions if suggestions else None
+    def max_ip_length(self):
+        """Longest IP the base's embedded strings can hold, or None if the base has no IP index"""
+        if self._max_ip_length is None:
+            index = self._template.ip_index if self._template else load_ip_index(self.original_deb)
+            self._max_ip_length = index.max_ip_length() if index else 0
+        return self._max_ip_length or None
 
     def validate_ip(self, ip_string):
-        """Validate IP address format and length (must be exactly 12 characters)"""
+        """Validate an IPv4 address that fits the embedded string (see max_ip_length)"""
         try:
-            # First check if it's a valid IP
-            ipaddress.ip_address(ip_string)
-
-            # Then check if it's exactly 12 characters (like 192.168.1.91)
-            if len(ip_string) != 12:
-                print(f"  ⚠ IP '{ip_string}' is {len(ip_string)} chars, must be exactly 12 chars")
-                print(f"    Valid format examples: 192.168.1.91, 10.10.10.100, 172.16.10.50")
-
-                # Try to suggest valid formats
-                suggestions = self.suggest_valid_ip_format(ip_string)
-                if suggestions:
-                    print(f"    Suggested format(s) for your IP:")
-                    for suggestion in suggestions:
-                        print(f"      → {suggestion}")
-
-                return False
+            ipaddress.IPv4Address(ip_string)
+        except ValueError:
+            return False
 
-            return True
-        except:
+        limit = self.max_ip_length()
+        if limit and len(ip_string) > limit:
+            print(f"  ⚠ IP '{ip_string}' is {len(ip_string)} chars; the embedded IP holds at most {limit}")
+            print(f"    Shorter addresses are fine, e.g. 172.20.10.2 (USB tethering) or 10.0.0.5")
             return False
 
+        return True
+
     def get_network_ips(self):
         """Get all network adapter IPs"""
         ips = []
@@ -171,233 +345,77 @@ class DebIPChanger:
 
         return ips
 
-    def _read_ar_members(self, fp):
-        """Read members from an AR archive file"""
-        if fp.read(8) != b'!<arch>\n':
-            raise RuntimeError("Not a valid ar archive")
-        members = []
-        while True:
-            hdr = fp.read(60)
-            if not hdr:
-                break
-            if len(hdr) < 60:
-                raise RuntimeError("Truncated ar header")
-            name = hdr[0:16].decode('ascii','ignore').strip().rstrip('/')
-            size_txt = hdr[48:58].decode('ascii','ignore').strip() or '0'
-            size = int(size_txt)
-            data = fp.read(size)
-            if size % 2 == 1:
-                fp.read(1)
-            members.append((name, data))
-        return members
-
     def _parse_deb(self, deb_path: str) -> ParsedDeb:
         """Parse a .deb file into its components"""
-        with open(deb_path, 'rb') as f:
-            members = self._read_ar_members(f)
-        debbin = next((d for n,d in members if n == 'debian-binary'), None)
-        control = next((d for n,d in members if n == 'control.tar.gz'), None)
-        data_name, data_bytes = next(((n,d) for n,d in members if n.startswith('data.tar')), (None,None))
-        if not debbin or not control or not data_bytes or not data_name:
-            raise RuntimeError("Missing required member(s) in base deb")
-        # decompress data
-        if data_name.endswith('.lzma'):
-            try:
-                raw_tar = lzma.decompress(data_bytes, format=lzma.FORMAT_ALONE)
-            except lzma.LZMAError:
-                # fallback if XZ (should not happen in base)
-                raw_tar = lzma.decompress(data_bytes)
-        elif data_name == 'data.tar':
-            raw_tar = data_bytes
-        else:
-            raise RuntimeError(f"Unsupported data member: {data_name}")
-        return ParsedDeb(debbin, control, data_name, data_bytes, raw_tar)
-
-    def _extract_tar_bytes_to_dir(self, tar_bytes: bytes, target_dir: str):
-        """Extract tar bytes to a directory"""
-        if os.path.exists(target_dir):
-            shutil.rmtree(target_dir)
-        os.makedirs(target_dir, exist_ok=True)
-        with tarfile.open(fileobj=io.BytesIO(tar_bytes), mode='r:') as tar:
-            tar.extractall(target_dir)
-
-    def _build_data_tar_from_dir(self, src_dir: str) -> bytes:
-        """Build tar from directory"""
-        buf = io.BytesIO()
-        with tarfile.open(fileobj=buf, mode='w', format=tarfile.GNU_FORMAT) as tar:
-            for root, dirs, files in os.walk(src_dir):
-                # Add directories explicitly (ensures empty dirs preserved)
-                for d in dirs:
-                    d_full = os.path.join(root, d)
-                    arc = os.path.relpath(d_full, src_dir).replace('\\','/')
-                    ti = tarfile.TarInfo(arc)
-                    ti.type = tarfile.DIRTYPE
-                    ti.mode = 0o755
-                    ti.mtime = 0
-                    tar.addfile(ti)
-                for f_name in files:
-                    f_full = os.path.join(root, f_name)
-                    arc = os.path.relpath(f_full, src_dir).replace('\\','/')
-                    ti = tar.gettarinfo(f_full, arc)
-                    ti.mtime = 0
-                    with open(f_full, 'rb') as f_in:
-                        tar.addfile(ti, f_in)
-        return buf.getvalue()
-
-    def _assemble_deb(self, output_path: str, debbin: bytes, control_gz: bytes, data_tar_bytes: bytes, lzma_alone=True):
-        """Assemble a .deb package"""
-        if lzma_alone:
-            compressed_data = lzma.compress(data_tar_bytes, format=lzma.FORMAT_ALONE, preset=6)
-            data_name = 'data.tar.lzma'
-        else:
-            compressed_data = data_tar_bytes
-            data_name = 'data.tar'
-        with open(output_path, 'wb') as out:
-            out.write(b'!<arch>\n')
-            def add(name, content):
-                header = (
-                    f"{name:<16}"[:16] +
-                    f"{0:<12}" +
-                    f"{0:<6}" +
-                    f"{0:<6}" +
-                    f"{100644:<8}" +
-                    f"{len(content):<10}" +
-                    "`\n"
-                ).encode('ascii')
-                out.write(header)
-                out.write(content)
-                if len(content) % 2 == 1:
-                    out.write(b'\n')
-            add('debian-binary', debbin if debbin else b'2.0\n')
-            add('control.tar.gz', control_gz)
-            add(data_name, compressed_data)
-
-    def _build_data_tar_from_dir(self, data_dir):
-        """Create a TAR (uncompressed) from a directory with fixed permissions"""
-        import tarfile, io
-        
-        # Create tar in memory
-        bio = io.BytesIO()
-        with tarfile.open(fileobj=bio, mode='w') as tar:
-            for root, dirs, files in os.walk(data_dir):
-                for name in files:
-                    file_path = os.path.join(root, name)
-                    arcname = os.path.relpath(file_path, data_dir).replace('\\', '/')
-                    
-                    # Manual permission setting
-                    # Windows doesn't have proper permissions, so we enforce them
-                    tinfo = tar.gettarinfo(file_path, arcname)
-                    tinfo.uid = 0
-                    tinfo.gid = 0
-                    tinfo.uname = 'root'
-                    tinfo.gname = 'wheel'
-                    
-                    # Determine if executable (755) or regular file (644)
-                    is_executable = False
-                    
-                    # 1. Check extensions
-                    if name.endswith('.dylib') or name.endswith('.app'):
-                         is_executable = True
-                    # 2. Check path location (binaries usually in /bin, /usr/bin, /usr/sbin)
-                    elif '/bin/' in arcname or '/sbin/' in arcname:
-                         is_executable = True
-                    # 3. Check for main app executable (file with same name as .app directory)
-                    elif '.app/' in arcname:
-                         # e.g. Applications/VCam.app/VCam
-                         parent_dir = os.path.basename(os.path.dirname(file_path))
-                         if parent_dir.endswith('.app') and parent_dir[:-4] == name:
-                             is_executable = True
-                    
-                    # 4. Deep inspection: Check Magic Bytes for Mach-O binary
-                    # This is the most reliable way for iOS binaries
-                    try:
-                        with open(file_path, 'rb') as f_check:
-                            magic = f_check.read(4)
-                            # Mach-O magics: FEEDFACE (32-bit), FEEDFACF (64-bit), CAFEBABE (Universal)
-                            # Little endian: CEFAEDFE, CFFAEDFE, BEBAFECA
-                            mach_o_magics = [
-                                b'\xfe\xed\xfa\xce', b'\xce\xfa\xed\xfe',
-                                b'\xfe\xed\xfa\xcf', b'\xcf\xfa\xed\xfe',
-                                b'\xca\xfe\xba\xbe', b'\xbe\xba\xfe\xca'
-                            ]
-                            if magic in mach_o_magics:
-                                is_executable = True
-                    except:
-                        pass
-                    
-                    if is_executable:
-                        tinfo.mode = 0o755
-                    else:
-                        tinfo.mode = 0o644
-                        
-                    with open(file_path, 'rb') as f:
-                        tar.addfile(tinfo, f)
-                        
-                for name in dirs:
-                    dir_path = os.path.join(root, name)
-                    arcname = os.path.relpath(dir_path, data_dir).replace('\\', '/')
-                    
-                    tinfo = tarfile.TarInfo(arcname)
-                    tinfo.type = tarfile.DIRTYPE
-                    tinfo.uid = 0
-                    tinfo.gid = 0
-                    tinfo.uname = 'root'
-                    tinfo.gname = 'wheel'
-                    tinfo.mode = 0o755
-                    tar.addfile(tinfo)
-                    
-        return bio.getvalue()
-
-    def extract_deb(self, deb_file, extract_dir):
-        """Extract .deb package using pure Python"""
-        print(f"  Extracting {deb_file}...")
-
-        # Parse the .deb file
-        parsed = self._parse_deb(deb_file)
-        # Save parsed pieces for reuse
-        self._parsed_base = parsed
-
-        if os.path.exists(extract_dir):
-            shutil.rmtree(extract_dir)
-        os.makedirs(extract_dir, exist_ok=True)
-
-        # Save original components
-        os.makedirs(os.path.join(extract_dir, 'original'), exist_ok=True)
-
-        # Save debian-binary
-        debian_path = os.path.join(extract_dir, 'debian-binary')
-        with open(debian_path, 'wb') as f:
-            f.write(parsed.debian_binary)
-        shutil.copy2(debian_path, os.path.join(extract_dir, 'original', 'debian-binary'))
-
-        # Save control.tar.gz (preserved exactly as-is)
-        control_path = os.path.join(extract_dir, 'control.tar.gz')
-        with open(control_path, 'wb') as f:
-            f.write(parsed.control_tar_gz)
-        shutil.copy2(control_path, os.path.join(extract_dir, 'original', 'control.tar.gz'))
-
-        # Extract control files for inspection
-        control_files_dir = os.path.join(extract_dir, 'control_files')
-        with tarfile.open(fileobj=io.BytesIO(parsed.control_tar_gz), mode='r:gz') as tar:
-            tar.extractall(control_files_dir)
-
-        # Extract data files
-        data_dir = os.path.join(extract_dir, 'data_files')
-        self._extract_tar_bytes_to_dir(parsed.data_tar_raw, data_dir)
-
-        return True
-
-    def find_current_ip(self, extract_dir):
-        """Find the current IP in the binary"""
-        dylib_path = os.path.join(extract_dir, 'data_files', 'var', 'jb', 'Library',
-                                  'MobileSubstrate', 'DynamicLibraries', 'vcamera.dylib')
-
-        if not os.path.exists(dylib_path):
-            return None
-
-        with open(dylib_path, 'rb') as f:
-            data = f.read()
-
+        try:
+            deb = DebArchive(deb_path)
+        except ArError as e:
+            raise RuntimeError(str(e))
+        with deb:
+            data_member = deb.find('data.tar')
+            if 'debian-binary' not in deb or 'control.tar.gz' not in deb or not data_member:
+                raise RuntimeError("Missing required member(s) in base deb")
+            debbin = bytes(deb.data('debian-binary'))
+            control = bytes(deb.data('control.tar.gz'))
+            data_name, data_bytes = data_member.name, deb.data(data_member)
+            if not debbin or not control or not data_bytes:
+                raise RuntimeError("Missing required member(s) in base deb")
+            # decompress data straight from the mapped member
+            if data_name.endswith('.lzma'):
+                try:
+                    raw_tar = lzma.decompress(data_bytes, format=lzma.FORMAT_ALONE)
+                except lzma.LZMAError:
+                    # fallback if XZ (should not happen in base)
+                    raw_tar = lzma.decompress(data_bytes)
+            elif data_name == 'data.tar':
+                raw_tar = bytes(data_bytes)
+            else:
+                raise RuntimeError(f"Unsupported data member: {data_name}")
+            data_bytes.release()
+        return ParsedDeb(debbin, control, data_name, raw_tar)
+
+    @contextlib.contextmanager
+    def _deb_writer(self, output_path: str, debbin: bytes, control_gz: bytes):
+        """An ArWriter with debian-binary and control.tar.gz written; the caller adds the data member"""
+        # Written under a temporary name so an interrupted batch never leaves a
+        # truncated .deb that --resume would mistake for a finished one
+        part_path = f"{output_path}.part"
+        try:
+            with open(part_path, 'wb') as out:
+                writer = ArWriter(out)
+                writer.add('debian-binary', debbin if debbin else b'2.0\n')
+                writer.add('control.tar.gz', control_gz)
+                yield writer
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        os.replace(part_path, output_path)
+
+    @staticmethod
+    def _is_executable_member(arcname, magic):
+        """Decide 755 vs 644 for a data file from its path and first four bytes"""
+        name = posixpath.basename(arcname)
+        # 1. Check extensions
+        if name.endswith('.dylib') or name.endswith('.app'):
+            return True
+        # 2. Check path location (binaries usually in /bin, /usr/bin, /usr/sbin)
+        if '/bin/' in arcname or '/sbin/' in arcname:
+            return True
+        # 3. Check for main app executable (file with same name as .app directory)
+        if '.app/' in arcname:
+            # e.g. Applications/VCam.app/VCam
+            parent_dir = posixpath.basename(posixpath.dirname(arcname))
+            if parent_dir.endswith('.app') and parent_dir[:-4] == name:
+                return True
+        # 4. Deep inspection: Check Magic Bytes for Mach-O binary
+        # This is the most reliable way for iOS binaries
+        # Mach-O magics: FEEDFACE (32-bit), FEEDFACF (64-bit), CAFEBABE (Universal)
+        # Little endian: CEFAEDFE, CFFAEDFE, BEBAFECA
+        return magic in MACH_O_MAGICS
+
+    def find_ip_in_bytes(self, data):
+        """Find the embedded IP in dylib bytes"""
         # For de-branded version, specifically look for 192.168.1.91 first
         if b'192.168.1.91' in data:
             return '192.168.1.91'
@@ -414,234 +432,235 @@ class DebIPChanger:
 
         return None
 
-    def replace_ip_in_binary(self, file_path, old_ip, new_ip):
-        """Replace IP address in binary file (enforces same length for safety)"""
-        # Safety check: IPs must be same length for binary replacement
-        if len(old_ip) != len(new_ip):
-            print(f"  ❌ ERROR: IP length mismatch! Old: {len(old_ip)} chars, New: {len(new_ip)} chars")
-            print(f"    Binary replacement requires exact same length to avoid corruption")
-            return False
+    def write_ip_sites(self, buffer, index, new_ip):
+        """Write new_ip into every indexed slot in place; returns the number of sites written.
 
-        with open(file_path, 'rb') as f:
-            data = f.read()
-
-        replacements = 0
-
-        # Replace as ASCII string
-        old_bytes = old_ip.encode('ascii')
+        Each C string is rewritten whole with the IP swapped, NUL-padded up to its original
+        terminator, and any CFString literal over it gets the new length. Nothing is written
+        unless every slot fits.
+        """
+        old_bytes = index.ip.encode('ascii')
         new_bytes = new_ip.encode('ascii')
+        rewritten = []
+        for slot in index.slots:
+            text = bytes(buffer[slot.start:slot.end])
+            new_text = text.replace(old_bytes, new_bytes)
+            capacity = slot.end - slot.start
+            if len(new_text) > capacity or (slot.exact and len(new_text) != capacity):
+                print(f"  ❌ ERROR: {new_ip} does not fit the string at 0x{slot.start:x} "
+                      f"({len(new_text)} bytes needed, {capacity} available)")
+                return 0
+            rewritten.append((slot, new_text))
+
+        for slot, new_text in rewritten:
+            buffer[slot.start:slot.end] = new_text.ljust(slot.end - slot.start, b'\x00')
+            for length_field in slot.cfstring_lengths:
+                struct.pack_into('<Q', buffer, length_field, len(new_text))
+        return len(index.sites)
+
+    def replace_ip_in_bytes(self, data, old_ip, new_ip):
+        """Replace an IP in dylib bytes, slot-aware; returns (new bytes, replacements)"""
+        index = IPPatchIndex.scan(bytes(data), old_ip, '')
+        if not index.sites:
+            return data, 0
+        buffer = bytearray(data)
+        replacements = self.write_ip_sites(buffer, index, new_ip)
+        if not replacements:
+            return data, 0
+        if not index.untouched(data, buffer):
+            print("  ❌ ERROR: IP rewrite touched bytes outside its strings")
+            return data, 0
+        return bytes(buffer), replacements
+
+    def _fix_control_tar_gz(self, control_gz: bytes) -> bytes:
+        """Re-pack control.tar.gz in memory with fixed root:wheel ownership and script modes"""
+        bio = io.BytesIO()
+        with tarfile.open(fileobj=io.BytesIO(control_gz), mode='r:gz') as src, \
+                tarfile.open(fileobj=bio, mode='w') as tar:
+            for member in src.getmembers():
+                if not member.isfile():
+                    continue
+                tinfo = copy.copy(member)
+                tinfo.uid = 0
+                tinfo.gid = 0
+                tinfo.uname = 'root'
+                tinfo.gname = 'wheel'
+                tinfo.mtime = REPRODUCIBLE_MTIME
+                # Scripts need 755
+                name = posixpath.basename(member.name)
+                tinfo.mode = 0o755 if name in ['postinst', 'prerm', 'postrm', 'preinst', 'config'] else 0o644
+                tar.addfile(tinfo, src.extractfile(member))
 
-        if old_bytes in data:
-            data = data.replace(old_bytes, new_bytes)
-            replacements = data.count(new_bytes)
-
-        # Also try with null terminator
-        old_null = old_bytes + b'\x00'
-        new_null = new_bytes + b'\x00'
-        if old_null in data:
-            data = data.replace(old_null, new_null)
-            replacements += 1
-
-        if replacements > 0:
-            with open(file_path, 'wb') as f:
-                f.write(data)
-            return True
-
-        return False
-
-    def copy_original_lzma_method(self, extract_dir, output_file):
-        """Use the original LZMA from the source package as a template"""
-        print("    - Using original LZMA as template...")
-
-        # We'll copy the original data.tar.lzma and modify its contents
-        original_lzma = os.path.join(extract_dir, 'original', 'data.tar.lzma')
-
-        if os.path.exists(original_lzma):
-            # Extract original to a temp location
-            temp_orig = os.path.join(extract_dir, 'temp_orig')
-            os.makedirs(temp_orig, exist_ok=True)
-
-            # Extract original LZMA
-            cmd = ['7z', 'x', original_lzma, f'-o{temp_orig}', '-y']
-            subprocess.run(cmd, capture_output=True)
-
-            # Now we have the original tar, we need to recreate it with our modified files
-            # This approach ensures we match the exact format
-
-            # Clean up temp
-            shutil.rmtree(temp_orig)
+        gz_bio = io.BytesIO()
+        with gzip.GzipFile(fileobj=gz_bio, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(bio.getvalue())
+        return gz_bio.getvalue()
 
-        return False
+    def load_template(self, deb_path: str) -> VariantTemplate:
+        """Parse the base .deb once into an in-memory template.
 
-    def ensure_control_files(self, extract_dir):
-        """Ensure control_files directory exists and populated; reconstruct if missing.
-        Strategy:
-          1. If control_files has files, keep.
-          2. Else attempt to locate an original control.tar.gz saved in extract_dir/original or beside original deb (same directory) and extract it.
-          3. If still missing, synthesize minimal control with required fields so dpkg won't fail.
+        The data tar is re-packed a single time with fixed ownership and permissions
+        and indexed by member, so a variant only swaps vcamera.dylib's
+        bytes; control.tar.gz is fixed once and reused verbatim.
         """
-        control_dir = os.path.join(extract_dir, 'control_files')
-        if os.path.isdir(control_dir) and os.listdir(control_dir):
-            return
-        os.makedirs(control_dir, exist_ok=True)
-        # Try original saved copy
-        candidates = [
-            os.path.join(extract_dir, 'original', 'control.tar.gz'),
-        ]
-        # Also scan the original deb for control.tar.gz if not already extracted
-        if not any(os.path.exists(c) for c in candidates):
-            try:
-                with open(self.original_deb, 'rb') as f:
-                    if f.read(8) != b'!<arch>\n':
-                        raise Exception('Not ar')
-                    while True:
-                        hdr = f.read(60)
-                        if not hdr:
-                            break
-                        if len(hdr) < 60:
-                            break
-                        name = hdr[:16].decode('ascii', 'ignore').strip().rstrip('/')
-                        size_txt = hdr[48:58].decode('ascii', 'ignore').strip() or '0'
-                        size = int(size_txt)
-                        data = f.read(size)
-                        if size % 2: f.read(1)
-                        if name == 'control.tar.gz':
-                            # extract
-                            try:
-                                import tarfile, io
-                                with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
-                                    tar.extractall(control_dir)
-                            except Exception as e:
-                                print(f"  ⚠ Failed to extract embedded control.tar.gz: {e}")
-                            break
-            except Exception as e:
-                print(f"  ⚠ Could not scan original deb for control: {e}")
-        if os.listdir(control_dir):
-            return
-        # Synthesize minimal control metadata
-        control_path = os.path.join(control_dir, 'control')
-        print('  ⚠ control.tar.gz missing; synthesizing minimal control file.')
-        with open(control_path, 'w', newline='\n') as f:
-            f.write('Package: iosvcam-base\n')
-            f.write('Version: 1.0\n')
-            f.write('Section: base\n')
-            f.write('Priority: optional\n')
-            f.write('Architecture: iphoneos-arm\n')
-            f.write('Maintainer: Unknown <unknown@example.com>\n')
-            f.write('Description: iOS VCam (auto-generated control)\n')
-        # Provide stub maintainer scripts if missing, but ensure postinst has uicache
-        postinst_path = os.path.join(control_dir, 'postinst')
-        
-        # If postinst exists, check if it has uicache
-        if os.path.exists(postinst_path):
-            try:
-                with open(postinst_path, 'r') as f:
-                    content = f.read()
-                if 'uicache' not in content:
-                    print("  ⚠ Existing postinst missing uicache; appending it.")
-                    with open(postinst_path, 'a', newline='\n') as f:
-                        f.write('\n# Added by builder to ensure icon appears\nuicache || /usr/bin/uicache\n')
-            except Exception as e:
-                print(f"  ⚠ Failed to check/update postinst: {e}")
-        else:
-            # Create new postinst with uicache
-            with open(postinst_path, 'w', newline='\n') as s:
-                s.write('#!/bin/sh\n')
-                s.write('/usr/bin/uicache || uicache\n')  # CRITICAL: Update icon cache
-                s.write('exit 0\n')
-            
-        for script_name in ['prerm', 'postrm', 'preinst']:
-            script_path = os.path.join(control_dir, script_name)
-            if not os.path.exists(script_path):
-                with open(script_path, 'w', newline='\n') as s:
-                    s.write('#!/bin/sh\nexit 0\n')
-                    
-        # Try setting permissions on scripts (best effort on Windows)
-        # AND fix line endings (dos2unix) because iOS requires LF, not CRLF
-        for script_name in ['postinst', 'prerm', 'postrm', 'preinst']:
-            script_path = os.path.join(control_dir, script_name)
-            if os.path.exists(script_path):
-                # Fix line endings (CRLF -> LF)
-                try:
-                    with open(script_path, 'rb') as f:
-                        content = f.read()
-                    if b'\r\n' in content:
-                        content = content.replace(b'\r\n', b'\n')
-                        with open(script_path, 'wb') as f:
-                            f.write(content)
-                except Exception as e:
-                    print(f"  ⚠ Failed to convert line endings for {script_name}: {e}")
-                    
-                # Fix permissions
-                try:
-                    os.chmod(script_path, 0o755)
-                except:
-                    pass
+        print(f"  Parsing {deb_path}...")
+        parsed = self._parse_deb(deb_path)
 
-    def create_deb_package(self, extract_dir, output_file):
-        """Create .deb package using preserved control.tar.gz"""
-        print(f"  Creating {os.path.basename(output_file)}...")
-
-        if not hasattr(self, '_parsed_base'):
-            raise RuntimeError("Base package not parsed; call extract_deb first")
-
-        data_dir = os.path.join(extract_dir, 'data_files')
-        if not os.path.isdir(data_dir):
-            raise RuntimeError("data_files directory missing")
+        members = {}
+        bio = io.BytesIO()
+        with tarfile.open(fileobj=io.BytesIO(parsed.data_tar_raw), mode='r:') as src, \
+                tarfile.open(fileobj=bio, mode='w', format=tarfile.GNU_FORMAT) as tar:
+            entries = src.getmembers()
+            present = {m.name.rstrip('/') for m in entries}
+            # The base only lists files; add their parent directories explicitly
+            parents = set()
+            for m in entries:
+                parent = posixpath.dirname(m.name.rstrip('/'))
+                while parent:
+                    parents.add(parent)
+                    parent = posixpath.dirname(parent)
+            for name in sorted(parents - present):
+                tinfo = tarfile.TarInfo(name)
+                tinfo.type = tarfile.DIRTYPE
+                tinfo.mode = 0o755
+                tar.addfile(self._owned_by_root(tinfo))
+
+            for member in entries:
+                tinfo = self._owned_by_root(copy.copy(member))
+                if member.isdir():
+                    tinfo.mode = 0o755
+                    tar.addfile(tinfo)
+                    continue
+                fileobj = src.extractfile(member) if member.isfile() else None
+                if fileobj is not None:
+                    tinfo.mode = 0o755 if self._is_executable_member(member.name, fileobj.read(4)) else 0o644
+                    fileobj.seek(0)
+                start = tar.offset
+                tar.addfile(tinfo, fileobj)
+                padded = -(-tinfo.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE if fileobj else 0
+                members[tinfo.name] = TarMember(tinfo, start, tar.offset - padded, tar.offset)
+
+        template = VariantTemplate(parsed.debian_binary, self._fix_control_tar_gz(parsed.control_tar_gz),
+                                   bio.getvalue(), members, base_sha256=file_sha256(deb_path))
+        if DYLIB_ARCNAME in members:
+            template.ip_index = self._load_ip_index(deb_path, template)
+            if template.ip_index:
+                template.base_ip = template.ip_index.ip
+            else:
+                template.base_ip = self.find_ip_in_bytes(bytes(template.member_bytes(DYLIB_ARCNAME)))
+        return template
+
+    def _load_ip_index(self, deb_path, template):
+        """Read the patch-site sidecar if it belongs to this base, else scan once and rewrite it"""
+        dylib = template.member_bytes(DYLIB_ARCNAME)
+        index_path = deb_path + IP_INDEX_SUFFIX
+        index = IPPatchIndex.load(index_path)
+        if index and index.deb_sha256 == template.base_sha256 and index.matches(dylib):
+            return index
+
+        dylib = bytes(dylib)
+        base_ip = self.find_ip_in_bytes(dylib)
+        if not base_ip:
+            return None
+        index = IPPatchIndex.scan(dylib, base_ip, template.base_sha256)
+        try:
+            index.save(index_path)
+            print(f"  Indexed {len(index.sites)} IP site(s) in {os.path.basename(index_path)}")
+        except OSError as e:
+            print(f"  ⚠ Could not write {index_path}: {e}")
+        return index
+
+    @staticmethod
+    def _owned_by_root(tinfo):
+        tinfo.uid = 0
+        tinfo.gid = 0
+        tinfo.uname = 'root'
+        tinfo.gname = 'wheel'
+        tinfo.mtime = REPRODUCIBLE_MTIME
+        return tinfo
+
+    def variant_path(self, new_ip):
+        ip_safe = new_ip.replace('.', '_')
+        tweak_suffix = f"_{self.patch_label()}" if self.apply_tweak else ""
+        return os.path.join(self.output_dir, f"iosvcam_base_{ip_safe}{tweak_suffix}.deb")
+
+    def patch_set(self):
+        """Names of the binary patches applied on top of the IP change (part of the cache key)"""
+        if not self.apply_tweak:
+            return []
+        values = ','.join(f"{k}={v}" for k, v in sorted(self.latency_values().items()))
+        return [f"latency:{arm64_patch.spec_fingerprint(LATENCY_PATCHES)[:16]}:{values}"]
+
+    def variant_cache_path(self, base_sha256, new_ip):
+        key = variant_cache_key(base_sha256, new_ip, self.patch_set(), self.preset)
+        return os.path.join(self.cache_dir, f"{key}.deb")
+
+    def _fetch_cached(self, base_sha256, new_ip):
+        """Copy a previously built identical variant to its output path; returns that path or None"""
+        if not self.use_cache:
+            return None
+        cached = self.variant_cache_path(base_sha256, new_ip)
+        if not os.path.exists(cached):
+            return None
+        output_file = self.variant_path(new_ip)
+        _copy_atomic(cached, output_file)
+        return output_file
 
-        # Build new data tar from modified directory
-        data_tar_bytes = self._build_data_tar_from_dir(data_dir)
+    def _store_cached(self, base_sha256, new_ip, output_file):
+        if not self.use_cache:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _copy_atomic(output_file, self.variant_cache_path(base_sha256, new_ip))
+        except OSError as e:
+            print(f"    ⚠ Could not cache {os.path.basename(output_file)}: {e}")
+
+    def build_variant(self, template: VariantTemplate, new_ip, base_ip=None):
+        """Write one IP variant from the in-memory template; returns the output path or None"""
+        cacheable = not base_ip or base_ip == template.base_ip
+        if cacheable:
+            output_file = self._fetch_cached(template.base_sha256, new_ip)
+            if output_file:
+                print(f"  Reused cached {os.path.basename(output_file)}")
+                return output_file
+
+        base_ip = base_ip or template.base_ip
+        if DYLIB_ARCNAME not in template.members:
+            print(f"  ✗ {DYLIB_ARCNAME} not found in base package")
+            return None
 
-        # Rebuild control.tar.gz to ensure permissions (Windows fix)
-        control_dir = os.path.join(extract_dir, 'control_files')
-        if os.path.isdir(control_dir):
-            control_tar_gz = self._build_control_tar_gz_from_dir(control_dir)
+        index = template.ip_index
+        if index and index.ip == base_ip:
+            dylib = template.dylib_buffer()
+            replacements = self.write_ip_sites(dylib, index, new_ip)
+            if replacements and not index.untouched(template.member_bytes(DYLIB_ARCNAME), dylib):
+                print("  ✗ IP rewrite touched bytes outside its strings")
+                return None
         else:
-            control_tar_gz = self._parsed_base.control_tar_gz
+            dylib, replacements = self.replace_ip_in_bytes(bytes(template.member_bytes(DYLIB_ARCNAME)), base_ip, new_ip)
+        if not replacements:
+            print(f"  ✗ Failed to replace {base_ip} with {new_ip}")
+            return None
 
-        # Always produce LZMA-alone compressed data for iOS compatibility
-        self._assemble_deb(output_file,
-                          self._parsed_base.debian_binary,
-                          control_tar_gz,
-                          data_tar_bytes,
-                          lzma_alone=True)
+        # Apply latency patches if requested; a refused patch set fails the variant
+        if self.apply_tweak:
+            if not isinstance(dylib, bytearray):
+                dylib = bytearray(dylib)
+            if not self.patch_latency_bytes(dylib, self.latency_plan_for(template)):
+                print("  ✗ Latency patches not applied")
+                return None
 
+        output_file = self.variant_path(new_ip)
+        print(f"  Creating {os.path.basename(output_file)}...")
+        # LZMA-alone for iOS dpkg, unless --compression none asked for a plain data.tar
+        with self._deb_writer(output_file, template.debian_binary, template.control_tar_gz) as writer, \
+                writer.data_member(self.preset) as sink:
+            for chunk in template.iter_data_tar({DYLIB_ARCNAME: dylib}):
+                sink.write(chunk)
+        if cacheable:
+            self._store_cached(template.base_sha256, new_ip, output_file)
         print(f"    - Success: {os.path.basename(output_file)}")
-        return True
-
-    def _build_control_tar_gz_from_dir(self, control_dir):
-        """Create a control.tar.gz from a directory with fixed permissions"""
-        import tarfile, io, gzip
-        
-        # Create tar in memory
-        bio = io.BytesIO()
-        with tarfile.open(fileobj=bio, mode='w') as tar:
-            for root, dirs, files in os.walk(control_dir):
-                for name in files:
-                    file_path = os.path.join(root, name)
-                    arcname = os.path.relpath(file_path, control_dir).replace('\\', '/')
-                    
-                    tinfo = tar.gettarinfo(file_path, arcname)
-                    tinfo.uid = 0
-                    tinfo.gid = 0
-                    tinfo.uname = 'root'
-                    tinfo.gname = 'wheel'
-                    
-                    # Scripts need 755
-                    if name in ['postinst', 'prerm', 'postrm', 'preinst', 'config']:
-                        tinfo.mode = 0o755
-                    else:
-                        tinfo.mode = 0o644
-                        
-                    with open(file_path, 'rb') as f:
-                        tar.addfile(tinfo, f)
-                        
-        # Gzip it
-        gz_bio = io.BytesIO()
-        with gzip.GzipFile(fileobj=gz_bio, mode='wb', compresslevel=9, mtime=0) as gz:
-            gz.write(bio.getvalue())
-            
-        return gz_bio.getvalue()
+        return output_file
 
     def process_single_ip(self, new_ip, base_ip=None):
         """Process a single IP replacement"""
@@ -649,65 +668,86 @@ class DebIPChanger:
             print(f"  ✗ Invalid IP: {new_ip}")
             return False
 
-        # Extract if needed
-        if not os.path.exists(self.work_dir) or not base_ip:
-            self.extract_deb(self.original_deb, self.work_dir)
-
-            if not base_ip:
-                base_ip = self.find_current_ip(self.work_dir)
-                if not base_ip:
-                    print("  ✗ Could not find IP in binary")
-                    return False
+        # Parse the base once; every later variant reuses it
+        if self._template is None:
+            self._template = self.load_template(self.original_deb)
+            self.resolve_compression(self._template)
 
-        # Replace IP
-        dylib_path = os.path.join(self.work_dir, 'data_files', 'var', 'jb', 'Library',
-                                 'MobileSubstrate', 'DynamicLibraries', 'vcamera.dylib')
-
-        if not self.replace_ip_in_binary(dylib_path, base_ip, new_ip):
-            print(f"  ✗ Failed to replace {base_ip} with {new_ip}")
+        if not (base_ip or self._template.base_ip):
+            print("  ✗ Could not find IP in binary")
             return False
 
-        # Apply latency patches if requested
-        if self.apply_tweak:
-            self.apply_latency_patches(dylib_path)
-
-        # Create output
-        ip_safe = new_ip.replace('.', '_')
-        tweak_suffix = "_tweaked" if self.apply_tweak else ""
-        output_file = os.path.join(self.output_dir, f"iosvcam_base_{ip_safe}{tweak_suffix}.deb")
-
-        if self.create_deb_package(self.work_dir, output_file):
+        output_file = self.build_variant(self._template, new_ip, base_ip)
+        if output_file:
             file_size = os.path.getsize(output_file)
             print(f"  ✓ Created: {os.path.basename(output_file)} ({file_size:,} bytes)")
             return True
 
         return False
 
-    def batch_process_ips(self, ip_list):
-        """Process multiple IPs"""
+    def batch_process_ips(self, ip_list, jobs=1, resume=False):
+        """Process multiple IPs, fanning out over `jobs` worker processes (0 = one per core)"""
         print(f"\nProcessing {len(ip_list)} IP addresses...")
         print("-" * 50)
 
         os.makedirs(self.output_dir, exist_ok=True)
 
-        self.extract_deb(self.original_deb, self.work_dir)
-        base_ip = self.find_current_ip(self.work_dir)
+        if resume:
+            done = [ip for ip in ip_list if os.path.exists(self.variant_path(ip))]
+            if done:
+                print(f"Resuming: {len(done)} already built, {len(ip_list) - len(done)} to go\n")
+                done = set(done)
+                ip_list = [ip for ip in ip_list if ip not in done]
+
+        # The preset is part of the cache key, so auto has to pick it before the lookup
+        template = None
+        if self.time_budget is not None and ip_list:
+            template = self._load_base_template()
+            self.resolve_compression(template)
+
+        # Identical variants were built before: copy them without parsing the base at all
+        cached = 0
+        if self.use_cache and ip_list:
+            base_sha256 = file_sha256(self.original_deb)
+            remaining = [ip for ip in ip_list if not self._fetch_cached(base_sha256, ip)]
+            cached = len(ip_list) - len(remaining)
+            if cached:
+                print(f"Reused {cached} cached variant(s) from {self.cache_dir}/\n")
+            ip_list = remaining
+
+        if not ip_list:
+            print("-" * 50)
+            print(f"Results: {cached} successful, 0 failed")
+            print(f"Output directory: {self.output_dir}/")
+            return
+
+        self._template = template or self._load_base_template()
+        base_ip = self._template.base_ip
 
         if not base_ip:
             print("✗ Could not find current IP in binary")
             return
 
         print(f"Current IP in package: {base_ip}\n")
+        if self.apply_tweak and DYLIB_ARCNAME in self._template.members and self._template.latency_plan is None:
+            self.latency_plan_for(self._template)
+            print()
 
-        successful = 0
+        jobs = min(jobs or os.cpu_count() or 1, len(ip_list))
+        if jobs > 1:
+            successful, failed = self._parallel_build(ip_list, jobs)
+            print("-" * 50)
+            print(f"Results: {successful + cached} successful, {failed} failed")
+            print(f"Output directory: {self.output_dir}/")
+            return
+
+        successful = cached
         failed = 0
 
         for new_ip in ip_list:
             print(f"Processing {new_ip}...")
 
-            # Re-extract for clean state
-            self.extract_deb(self.original_deb, self.work_dir)
-
+            # The template is never modified, so every variant starts clean
             if self.process_single_ip(new_ip, base_ip):
                 successful += 1
             else:
@@ -718,21 +758,339 @@ class DebIPChanger:
         print(f"Results: {successful} successful, {failed} failed")
         print(f"Output directory: {self.output_dir}/")
 
-    def cleanup(self):
-        """Clean up temporary files"""
-        if os.path.exists(self.work_dir):
-            shutil.rmtree(self.work_dir)
-        print("✓ Cleanup complete")
+    def _load_base_template(self):
+        """The parsed base, reused while the .deb on disk is unchanged (a sweep runs one batch per point)"""
+        if self._template is None or self._template.base_sha256 != file_sha256(self.original_deb):
+            self._template = self.load_template(self.original_deb)
+        return self._template
+
+    def sweep(self, ip_list, matrix, jobs=1, resume=False):
+        """Build every IP at every point of a latency value matrix; writes a manifest for A/B tests"""
+        print(f"\nSweep: {len(matrix)} patch setting(s) x {len(ip_list)} IP(s)")
+        entries = []
+        for point, values in enumerate(matrix, 1):
+            self.apply_tweak = True
+            self.patch_values = dict(values)
+            print(f"\n=== [{point}/{len(matrix)}] {self.patch_label()}: "
+                  f"{', '.join(f'{k}={v}' for k, v in self.latency_values().items())} ===")
+            self.batch_process_ips(ip_list, jobs=jobs, resume=resume)
+            for ip in ip_list:
+                output_file = self.variant_path(ip)
+                if os.path.exists(output_file):
+                    entries.append({'label': self.patch_label(), 'values': self.latency_values(), 'ip': ip,
+                                    'file': os.path.basename(output_file), 'size': os.path.getsize(output_file),
+                                    'sha256': file_sha256(output_file)})
+
+        manifest = os.path.join(self.output_dir, 'sweep_manifest.json')
+        part_path = f"{manifest}.part"
+        with open(part_path, 'w', encoding='utf-8', newline='\n') as f:
+            json.dump({'base': os.path.basename(self.original_deb), 'variants': entries}, f, indent=2)
+            f.write('\n')
+        os.replace(part_path, manifest)
+
+        print("\n" + "-" * 50)
+        print(f"  {'label':<22} {'built':>7}")
+        for values in matrix:
+            label = self.patch_label(values)
+            print(f"  {label:<22} {sum(e['label'] == label for e in entries):>3}/{len(ip_list)}")
+        print(f"Manifest: {manifest} ({len(entries)} variants)")
+        return len(entries) == len(matrix) * len(ip_list)
+
+    def _parallel_build(self, ip_list, jobs):
+        """Compress variants in a process pool; each worker receives the template once"""
+        print(f"Building with {jobs} worker processes...\n")
+        successful = 0
+        failed = 0
+        settings = {name: getattr(self, name) for name in WORKER_SETTINGS}
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(self._template, settings))
+        try:
+            futures = [pool.submit(_build_in_worker, ip) for ip in ip_list]
+            for done, future in enumerate(as_completed(futures), 1):
+                new_ip, output_file, error = future.result()
+                if output_file:
+                    successful += 1
+                    file_size = os.path.getsize(output_file)
+                    print(f"  [{done}/{len(ip_list)}] ✓ {new_ip}: {os.path.basename(output_file)} ({file_size:,} bytes)")
+                else:
+                    failed += 1
+                    print(f"  [{done}/{len(ip_list)}] ✗ {new_ip}")
+                    for line in error.splitlines():
+                        print(f"      {line.strip()}")
+        except KeyboardInterrupt:
+            pool.shutdown(wait=True, cancel_futures=True)
+            print("\n⚠ Interrupted; finished variants are kept, rerun with --resume to build the rest")
+            raise
+        pool.shutdown()
+        print()
+        return successful, failed
+
+    def bench_scaling(self, count=None, job_counts=None):
+        """Time a batch of variants at increasing worker counts (outputs go to a temp dir)"""
+        cores = os.cpu_count() or 1
+        job_counts = job_counts or sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+        count = count or max(job_counts) * 2
+        template = self._template = self._template or self.load_template(self.original_deb)
+        ips = [ip for ip in expand_cidr('10.10.10.0/24') if ip != template.base_ip][:count]
+        print(f"\nScaling benchmark: {len(ips)} variants, {cores} core(s), tweak={'on' if self.apply_tweak else 'off'}")
+        print(f"  {'jobs':>4}  {'seconds':>8}  {'variants/s':>10}  {'speedup':>7}")
+        output_dir, use_cache = self.output_dir, self.use_cache
+        self.use_cache = False
+        baseline = None
+        try:
+            for jobs in job_counts:
+                with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+                    self.output_dir = tmp
+                    started = time.perf_counter()
+                    if jobs > 1:
+                        self._parallel_build(ips, jobs)
+                    else:
+                        for ip in ips:
+                            self.build_variant(template, ip)
+                    elapsed = time.perf_counter() - started
+                baseline = baseline or elapsed
+                print(f"  {jobs:>4}  {elapsed:>8.2f}  {len(ips) / elapsed:>10.2f}  {baseline / elapsed:>6.2f}x")
+        finally:
+            self.output_dir, self.use_cache = output_dir, use_cache
+
+    def _measure_compression(self, template, preset):
+        """Build the base's own variant in memory at one preset; returns (seconds, .deb bytes, data member)"""
+        out = io.BytesIO()
+        started = time.perf_counter()
+        writer = ArWriter(out)
+        writer.add('debian-binary', template.debian_binary)
+        writer.add('control.tar.gz', template.control_tar_gz)
+        data_at = out.tell() + AR_HEADER_SIZE
+        with writer.data_member(preset) as sink:
+            for chunk in template.iter_data_tar({}):
+                sink.write(chunk)
+        elapsed = time.perf_counter() - started
+        deb = out.getvalue()
+        return elapsed, deb, deb[data_at:]
+
+    @staticmethod
+    def compression_candidates(raw_size):
+        """LZMA presets auto may pick for a data tar of raw_size bytes, cheapest first.
+
+        Presets 7-9 only enlarge the dictionary over 6; once it already covers the
+        whole tar they produce the same bytes and just cost the device more RAM to unpack.
+        """
+        presets = list(range(7))
+        for level in (7, 8, 9):
+            if LZMA_PRESET_DICT[level - 1] >= raw_size:
+                break
+            presets.append(level)
+        return presets
+
+    @staticmethod
+    def pick_preset(results, budget):
+        """Smallest (preset, seconds, size) within budget; the fastest one if none fits"""
+        fitting = [r for r in results if r[1] <= budget]
+        if fitting:
+            return min(fitting, key=lambda r: (r[2], r[1]))
+        return min(results, key=lambda r: r[1])
+
+    def choose_preset(self, template, budget):
+        """Time the candidate presets on this base and return the one pick_preset chooses"""
+        results = []
+        for preset in self.compression_candidates(len(template.data_tar)):
+            seconds, deb, _ = self._measure_compression(template, preset)
+            results.append((preset, seconds, len(deb)))
+            # Higher presets are slower still; no point timing them
+            if seconds > 2 * budget:
+                break
+        return self.pick_preset(results, budget)
+
+    def set_compression(self, value, time_budget=DEFAULT_TIME_BUDGET):
+        """Apply a --compression value: a preset ('0'-'9', '9e'), 'none', 'fast' or 'auto'"""
+        if value == 'auto':
+            self.time_budget = time_budget
+        else:
+            self.preset = FAST_PRESET if value == 'fast' else parse_preset(value)
+            self.time_budget = None
+
+    def resolve_compression(self, template):
+        """Replace --compression auto by a concrete preset (workers then inherit it)"""
+        if self.time_budget is None:
+            return
+        preset, seconds, size = self.choose_preset(template, self.time_budget)
+        if seconds <= self.time_budget:
+            print(f"  Compression auto: preset {preset_label(preset)} "
+                  f"({size:,} bytes, {seconds:.2f}s within {self.time_budget:.2f}s budget)")
+        else:
+            print(f"  ⚠ No preset fits the {self.time_budget:.2f}s budget; "
+                  f"using the fastest, preset {preset_label(preset)} ({seconds:.2f}s)")
+        self.preset = preset
+        self.time_budget = None
+
+    def bench_compression(self, budget=DEFAULT_TIME_BUDGET):
+        """Build time, .deb size and unpack cost of a variant at every preset and uncompressed.
 
-    def run_quick(self, ip_list):
+        Unpack time is measured on this host; the device is slower, but the ranking
+        holds, and the dictionary column is the RAM dpkg's decoder needs on the device.
+        """
+        template = self._template = self._template or self.load_template(self.original_deb)
+        raw_size = len(template.data_tar)
+        print(f"\nCompression benchmark: {os.path.basename(self.original_deb)}, data.tar {raw_size:,} bytes")
+        print(f"  {'preset':>6}  {'build s':>8}  {'deb bytes':>10}  {'ratio':>6}  {'unpack ms':>9}  {'unpack dict':>11}")
+        results = []
+        for preset in [None] + list(range(10)) + [9 | lzma.PRESET_EXTREME]:
+            seconds, deb, payload = self._measure_compression(template, preset)
+            if preset is None:
+                unpack_ms, dict_size = 0.0, '-'
+            else:
+                started = time.perf_counter()
+                lzma.LZMADecompressor(lzma.FORMAT_ALONE).decompress(payload)
+                unpack_ms = (time.perf_counter() - started) * 1000
+                dict_size = f"{int.from_bytes(payload[1:5], 'little') / (1 << 20):g} MiB"
+            if preset in self.compression_candidates(raw_size):
+                results.append((preset, seconds, len(deb)))
+            print(f"  {preset_label(preset):>6}  {seconds:>8.2f}  {len(deb):>10,}  {len(deb) / raw_size:>6.3f}  "
+                  f"{unpack_ms:>9.1f}  {dict_size:>11}")
+        preset, seconds, size = self.pick_preset(results, budget)
+        print(f"\n  --compression auto at {budget:.2f}s/variant would pick preset {preset_label(preset)} "
+              f"({size:,} bytes, {seconds:.2f}s)")
+
+    def run_quick(self, ip_list, jobs=1, resume=False, matrix=None):
         """Quick run for command line usage"""
         if not os.path.exists(self.original_deb):
             print(f"✗ Error: {self.original_deb} not found!")
             return 1
 
-        self.batch_process_ips(ip_list)
-        self.cleanup()
-        return 0
+        if matrix:
+            ok = self.sweep(ip_list, matrix, jobs=jobs, resume=resume)
+        else:
+            self.batch_process_ips(ip_list, jobs=jobs, resume=resume)
+            ok = True
+        return 0 if ok else 1
+
+# ============================================================================
+# Variant cache
+# ============================================================================
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def variant_cache_key(base_sha256, ip, patch_set, preset, mtime=REPRODUCIBLE_MTIME):
+    """Everything that determines a variant's bytes; builds are reproducible, so equal keys mean equal files
+
+    The tar mtime comes from SOURCE_DATE_EPOCH, so it is part of the key alongside the
+    format version; a cached file from another epoch is never served.
+    """
+    material = json.dumps([VARIANT_CACHE_FORMAT, base_sha256, ip, sorted(patch_set), preset, mtime])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def load_ip_index(deb_path):
+    """The base's IPPatchIndex from its sidecar, parsing the .deb if the sidecar is missing or stale"""
+    index = IPPatchIndex.load(deb_path + IP_INDEX_SUFFIX)
+    try:
+        if index and index.deb_sha256 == file_sha256(deb_path):
+            return index
+        with contextlib.redirect_stdout(io.StringIO()):
+            return DebIPChanger().load_template(deb_path).ip_index
+    except (OSError, RuntimeError, ArError):
+        return None
+
+def _copy_atomic(src, dst):
+    part_path = f"{dst}.part"
+    shutil.copyfile(src, part_path)
+    os.replace(part_path, dst)
+
+def compression_arg(value):
+    """argparse type for --compression: 'fast', 'auto' or anything parse_preset accepts"""
+    value = str(value).strip().lower()
+    if value in ('fast', 'auto'):
+        return value
+    try:
+        parse_preset(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+# ============================================================================
+# IP lists and worker processes
+# ============================================================================
+
+def expand_cidr(cidr, max_length=None):
+    """Host addresses of a CIDR range, without those longer than max_length"""
+    network = ipaddress.ip_network(cidr, strict=False)
+    return [str(ip) for ip in network.hosts() if not max_length or len(str(ip)) <= max_length]
+
+def load_ip_file(path):
+    """Read IPs and/or CIDR ranges, one per line; blank lines and # comments are ignored"""
+    entries = []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                entries.append(line)
+    return entries
+
+def expand_ip_entries(entries, max_length=None):
+    """Expand CIDR entries (filtered to max_length) and drop duplicates, keeping order"""
+    ips = []
+    for entry in entries:
+        if '/' in entry:
+            try:
+                ips.extend(expand_cidr(entry, max_length))
+            except ValueError:
+                print(f"⚠ Skipping invalid range: {entry}")
+        else:
+            ips.append(entry)
+    return list(dict.fromkeys(ips))
+
+# ============================================================================
+# Latency patch values
+# ============================================================================
+
+def parse_patch_setting(entry):
+    """'buffer=1,16,33' -> ('buffer', [1, 16, 33])"""
+    param, sep, raw = entry.partition('=')
+    param = param.strip()
+    if not sep or param not in LATENCY_PARAMS:
+        raise ValueError(f"'{entry}': expected PARAM=VALUE[,VALUE...] with PARAM one of {', '.join(LATENCY_PARAMS)}")
+    try:
+        values = [int(v, 0) for v in raw.split(',') if v.strip()]
+    except ValueError:
+        raise ValueError(f"'{entry}': values must be integers")
+    if not values or any(not MIN_PATCH_VALUE <= v <= MAX_PATCH_VALUE for v in values):
+        raise ValueError(f"'{entry}': values must be {MIN_PATCH_VALUE}-{MAX_PATCH_VALUE}")
+    return param, list(dict.fromkeys(values))
+
+def sweep_matrix(entries, fixed=None):
+    """Every combination of the swept values, e.g. ['buffer=1,16', 'flush=1,4'] -> 4 settings"""
+    axes = dict(parse_patch_setting(e) for entry in entries for e in entry.split(';') if e.strip())
+    names = list(axes)
+    return [{**(fixed or {}), **dict(zip(names, combo))} for combo in itertools.product(*(axes[n] for n in names))]
+
+_worker_changer = None
+
+# DebIPChanger attributes copied into each worker
+WORKER_SETTINGS = ('apply_tweak', 'patch_values', 'output_dir', 'preset', 'cache_dir', 'use_cache')
+
+def _init_worker(template, settings):
+    global _worker_changer
+    # Ctrl+C is handled by the parent, which lets in-flight variants finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_changer = DebIPChanger()
+    _worker_changer._template = template
+    for name, value in settings.items():
+        setattr(_worker_changer, name, value)
+
+def _build_in_worker(new_ip):
+    """Build one variant; returns (ip, output path or None, captured log on failure)"""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        try:
+            output_file = _worker_changer.build_variant(_worker_changer._template, new_ip)
+        except Exception as e:
+            print(f"  ✗ {e}")
+            output_file = None
+    return new_ip, output_file, None if output_file else log.getvalue()
 
 def main():
     """Main function for command line usage"""
@@ -742,20 +1100,52 @@ def main():
     parser.add_argument('ips', nargs='*', help='IP address(es) to embed')
     parser.add_argument('--base', help='Override base .deb path (default: iosvcam_base.deb)', default=None)
     parser.add_argument('--tweak', action='store_true', help='Apply 1s latency/bursting fix patches')
+    parser.add_argument('--ip-file', action='append', default=[], help='File with one IP or CIDR range per line')
+    parser.add_argument('--cidr', action='append', default=[],
+                        help='CIDR range to expand (addresses too long for the embedded IP are skipped)')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='Worker processes for compression (default: one per core; 1 = serial)')
+    parser.add_argument('--resume', action='store_true', help='Skip IPs whose output .deb already exists')
+    parser.add_argument('--no-cache', action='store_true', help='Always rebuild; do not read or fill the variant cache')
+    parser.add_argument('--cache-dir', default=None, help='Variant cache directory (default: variant_cache)')
+    parser.add_argument('--bench', nargs='?', type=int, const=0, default=None, metavar='COUNT',
+                        help='Benchmark variant throughput by worker count instead of building')
+    parser.add_argument('--compression', type=compression_arg, default='6', metavar='PRESET',
+                        help='data.tar compression: LZMA preset 0-9 (suffix e = extreme, default 6), '
+                             'none (uncompressed data.tar), fast (preset 0, for development) '
+                             'or auto (smallest output within --time-budget)')
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET, metavar='SECONDS',
+                        help=f'Build time allowed per variant for --compression auto (default: {DEFAULT_TIME_BUDGET})')
+    parser.add_argument('--bench-compression', action='store_true',
+                        help='Benchmark every compression preset on the base package instead of building')
+    parser.add_argument('--set', action='append', default=[], metavar='PARAM=VALUE',
+                        help=f'Latency patch immediate instead of 1 (implies --tweak); PARAM: {", ".join(LATENCY_PARAMS)}')
+    parser.add_argument('--sweep', action='append', default=[], metavar='PARAM=V1,V2,...',
+                        help='Build every IP at every combination of these values (e.g. --sweep buffer=1,16,33,66 '
+                             '--sweep flush=1,4,8) and write sweep_manifest.json')
+    parser.add_argument('--max-ip-length', action='store_true',
+                        help='Print the longest IP the base package can embed and exit')
+    parser.add_argument('--patch-report', action='store_true',
+                        help='Show where each latency patch signature resolves in the base dylib and exit')
 
     args = parser.parse_args()
 
-    if not args.ips:
-        parser.print_help()
-        print("\nExamples:")
-        print("  Single IP:    python ios_deb_ip_changer_final.py 192.168.1.100")
-        print("  Multiple IPs: python ios_deb_ip_changer_final.py 192.168.1.100 192.168.50.232")
-        print("  Tweaked:      python ios_deb_ip_changer_final.py --tweak 192.168.1.100")
-        print("  Custom base:  python ios_deb_ip_changer_final.py --base custom.deb 192.168.1.100")
-        return 1
-
     changer = DebIPChanger()
-    changer.apply_tweak = args.tweak
+    changer.apply_tweak = args.tweak or bool(args.set)
+    try:
+        for entry in args.set:
+            param, values = parse_patch_setting(entry)
+            if len(values) != 1:
+                raise ValueError(f"'{entry}': --set takes one value; use --sweep for several")
+            changer.patch_values[param] = values[0]
+        matrix = sweep_matrix(args.sweep, changer.patch_values) if args.sweep else None
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    changer.use_cache = not args.no_cache
+    if args.cache_dir:
+        changer.cache_dir = args.cache_dir
+    changer.set_compression(args.compression, args.time_budget)
 
     # Override base if provided
     if args.base:
@@ -764,9 +1154,50 @@ def main():
             return 1
         changer.original_deb = args.base
 
-    # Parse IPs from command line
+    if args.max_ip_length:
+        limit = changer.max_ip_length()
+        if not limit:
+            print(f"[ERROR] No embedded IP found in {changer.original_deb}")
+            return 1
+        print(limit)
+        return 0
+    if args.bench is not None:
+        changer.bench_scaling(args.bench or None)
+        return 0
+    if args.bench_compression:
+        changer.bench_compression(args.time_budget)
+        return 0
+    if args.patch_report:
+        template = changer.load_template(changer.original_deb)
+        plan = changer.latency_plan_for(template)
+        return 1 if plan.errors else 0
+
+    entries = list(args.ips) + list(args.cidr)
+    for ip_file in args.ip_file:
+        try:
+            entries.extend(load_ip_file(ip_file))
+        except OSError as e:
+            print(f"[ERROR] Cannot read --ip-file {ip_file}: {e}")
+            return 1
+
+    if not entries:
+        parser.print_help()
+        print("\nExamples:")
+        print("  Single IP:    python ios_deb_ip_changer_final.py 192.168.1.100")
+        print("  Multiple IPs: python ios_deb_ip_changer_final.py 192.168.1.100 192.168.50.232")
+        print("  Tweaked:      python ios_deb_ip_changer_final.py --tweak 192.168.1.100")
+        print("  Custom base:  python ios_deb_ip_changer_final.py --base custom.deb 192.168.1.100")
+        print("  Fleet batch:  python ios_deb_ip_changer_final.py --ip-file fleet.txt --cidr 10.10.10.0/24 --resume")
+        print("  Scaling:      python ios_deb_ip_changer_final.py --bench")
+        print("  Compression:  python ios_deb_ip_changer_final.py --bench-compression")
+        print("  Dev build:    python ios_deb_ip_changer_final.py --compression fast 192.168.1.100")
+        print("  Patch value:  python ios_deb_ip_changer_final.py --set buffer=33 192.168.1.100")
+        print("  A/B matrix:   python ios_deb_ip_changer_final.py --sweep buffer=1,16,33,66 --sweep flush=1,4,8 192.168.1.100")
+        return 1
+
+    # Parse IPs from command line, files and ranges
     ip_list = []
-    for ip in args.ips:
+    for ip in expand_ip_entries(entries, changer.max_ip_length()):
         if changer.validate_ip(ip):
             ip_list.append(ip)
         else:
@@ -776,7 +1207,10 @@ def main():
         print("✗ No valid IPs provided!")
         return 1
 
-    return changer.run_quick(ip_list)
+    try:
+        return changer.run_quick(ip_list, jobs=args.jobs, resume=args.resume, matrix=matrix)
+    except KeyboardInterrupt:
+        return 130
 
 if __name__ == "__main__":
     sys.exit(main())
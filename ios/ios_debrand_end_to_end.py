@@ -10,11 +10,12 @@ Modes:
 import argparse, os, sys, tarfile, lzma, shutil, re, tempfile, ipaddress, subprocess
 from pathlib import Path
 import deb_packer
+from deb_archive import ArError, DebArchive
+from ios_deb_ip_changer_final import DebIPChanger, compression_arg, expand_ip_entries, load_ip_file, load_ip_index
 
 BRANDED_DEFAULT = "tools/iosvcam_supp.deb"   # fallback if user doesn't specify
 DEBRANDED_BASE  = "iosvcam_base.deb"
 MODIFIED_DIR    = "modified_debs"
-EXACT_IP_LENGTH = 12
 
 BRAND_PATTERNS = {
     b'www.bkatm.com':          b'localhost    ',      # length preserved
@@ -30,17 +31,25 @@ def parse_args():
     p.add_argument("--force-rebrand", action="store_true", help="Rebuild debranded base even if exists")
     p.add_argument("--verify-only", action="store_true", help="Only verify debranded base & exit")
     p.add_argument("--ip", nargs="*", help="One or more IPs to generate variants")
+    p.add_argument("--ip-file", action="append", default=[], help="File with one IP or CIDR range per line")
+    p.add_argument("--cidr", action="append", default=[],
+                   help="CIDR range to expand (addresses too long for the embedded IP are skipped)")
+    p.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes for variants (default: one per core)")
+    p.add_argument("--resume", action="store_true", help="Skip IPs whose variant already exists in --output-dir")
+    p.add_argument("--compression", type=compression_arg, default="6",
+                   help="Variant data.tar compression: preset 0-9/9e, none, fast or auto (see ios_deb_ip_changer_final.py)")
     p.add_argument("--output-dir", default=MODIFIED_DIR)
     p.add_argument("--keep-work", action="store_true", help="Do not delete temp workspace")
     return p.parse_args()
 
-def validate_ip(ip):
+def validate_ip(ip, max_length):
+    # max_length comes from the debranded base's IP patch index; shorter IPs are NUL-padded
     try:
         ipaddress.IPv4Address(ip)
     except ValueError:
         return False, "Invalid IPv4 address."
-    if len(ip) != EXACT_IP_LENGTH:
-        return False, f"IP must be exactly {EXACT_IP_LENGTH} characters (current length {len(ip)})."
+    if len(ip) > max_length:
+        return False, f"IP must be at most {max_length} characters (current length {len(ip)})."
     return True, ""
 
 def ensure_dir(p: Path):
@@ -48,51 +57,31 @@ def ensure_dir(p: Path):
 
 def extract_deb(deb_path: Path, work_dir: Path):
     # Minimal extractor for deb: ar + control.tar.gz + data.tar.lzma
-    with deb_path.open('rb') as f:
-        if f.read(8) != b'!<arch>\n':
-            raise RuntimeError("Not a valid ar/deb")
-        def read_member():
-            hdr = f.read(60)
-            if not hdr: return None
-            if len(hdr) < 60: raise RuntimeError("Truncated member header")
-            name = hdr[:16].decode('ascii').strip()
-            size = int(hdr[48:58].decode('ascii').strip() or "0")
-            data = f.read(size)
-            if size % 2 == 1: f.read(1)
-            return name, data
-        members=[]
-        while True:
-            m=read_member()
-            if not m: break
-            members.append(m)
-
-    control_bytes = None
-    data_bytes = None
-    for name,data in members:
-        # Handle member names with or without trailing slashes
-        clean_name = name.rstrip('/')
-        if clean_name == 'control.tar.gz':
-            control_bytes = data
-        elif clean_name.startswith('data.tar'):
-            data_bytes = data
-    if not control_bytes or not data_bytes:
-        raise RuntimeError("Missing control or data archive in deb.")
-    # Extract control
-    control_dir = work_dir / "control"
-    control_dir.mkdir(parents=True, exist_ok=True)
-    with tempfile.NamedTemporaryFile(delete=False) as tf:
-        tf.write(control_bytes)
-        tmp_control = Path(tf.name)
-    with tarfile.open(tmp_control, 'r:gz') as t:
-        t.extractall(control_dir)
-    tmp_control.unlink()
-    # Extract data (LZMA alone or maybe original XZ)
-    # Try LZMA-alone first
     try:
-        data_tar = lzma.LZMADecompressor(format=lzma.FORMAT_ALONE).decompress(data_bytes)
-    except lzma.LZMAError:
-        # fallback attempt XZ -> convert
-        data_tar = lzma.decompress(data_bytes)  # auto for XZ
+        deb = DebArchive(deb_path)
+    except ArError as e:
+        raise RuntimeError(f"Not a valid ar/deb: {e}")
+    with deb:
+        # Member names come back without GNU trailing slashes
+        data_member = deb.find('data.tar')
+        if 'control.tar.gz' not in deb or not data_member:
+            raise RuntimeError("Missing control or data archive in deb.")
+        # Extract control
+        control_dir = work_dir / "control"
+        control_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(delete=False) as tf:
+            tf.write(deb.data('control.tar.gz'))
+            tmp_control = Path(tf.name)
+        with tarfile.open(tmp_control, 'r:gz') as t:
+            t.extractall(control_dir)
+        tmp_control.unlink()
+        # Extract data (LZMA alone or maybe original XZ), decompressing from the mapped member
+        # Try LZMA-alone first
+        try:
+            data_tar = lzma.LZMADecompressor(format=lzma.FORMAT_ALONE).decompress(deb.data(data_member))
+        except lzma.LZMAError:
+            # fallback attempt XZ -> convert
+            data_tar = lzma.decompress(deb.data(data_member))  # auto for XZ
     data_dir = work_dir / "data"
     data_dir.mkdir(parents=True, exist_ok=True)
     with tempfile.NamedTemporaryFile(delete=False) as tf:
@@ -150,37 +139,14 @@ def build_debranded_base(branded_source: Path, force: bool):
     shutil.rmtree(work)
     print(f"[OK] Created {base}")
 
-def generate_ip_variant(base_deb: Path, ip: str, output_dir: Path):
-    ok, reason = validate_ip(ip)
-    if not ok:
-        raise RuntimeError(f"Invalid IP '{ip}': {reason}")
-    # Reuse the ip changer script with --base override if patched, else emulate minimal patch.
-    # We assume patched ios_deb_ip_changer_final.py supports --base.
-    script_candidates = [
-        Path("ios_deb_ip_changer_final.py"),
-        Path("tools/ios_deb_ip_changer_final.py"),
-    ]
-    script_path = next((p for p in script_candidates if p.exists()), None)
-    if not script_path:
-        raise RuntimeError("Could not locate ios_deb_ip_changer_final.py")
+def generate_ip_variants(base_deb: Path, ips, output_dir: Path, jobs=0, resume=False, compression="6"):
+    # Batch path: parse the base once in-process and spread compression over a process pool
     ensure_dir(output_dir)
-    cmd = [
-        sys.executable,
-        str(script_path),
-        "--base", str(base_deb),
-        ip
-    ]
-    print(f"[RUN] {' '.join(cmd)}")
-    rc = subprocess.call(cmd)
-    if rc != 0:
-        raise RuntimeError(f"IP changer failed for {ip}")
-    # Find newest matching output
-    ip_tag = ip.replace('.', '_')
-    produced = sorted(output_dir.glob(f"*{ip_tag}*.deb"), key=lambda p: p.stat().st_mtime, reverse=True)
-    if produced:
-        print(f"[OK] Generated: {produced[0]}")
-    else:
-        print("[WARN] Could not locate generated .deb (pattern mismatch).")
+    changer = DebIPChanger()
+    changer.original_deb = str(base_deb)
+    changer.output_dir = str(output_dir)
+    changer.set_compression(compression)
+    changer.batch_process_ips(list(ips), jobs=jobs, resume=resume)
 
 def main():
     args = parse_args()
@@ -195,13 +161,20 @@ def main():
     if args.verify_only:
         print("[OK] Verification complete.")
         return 0
-    if not args.ip:
+    entries = list(args.ip or []) + list(args.cidr)
+    for ip_file in args.ip_file:
+        entries.extend(load_ip_file(ip_file))
+    if not entries:
         print("[INFO] No IPs provided; debranded base ready.")
         return 0
     out_dir = Path(args.output_dir)
+    index = load_ip_index(DEBRANDED_BASE)
+    if not index:
+        raise SystemExit(f"No embedded IP found in {DEBRANDED_BASE}")
+    max_length = index.max_ip_length()
     valid_ips = []
-    for ip in args.ip:
-        ok, reason = validate_ip(ip)
+    for ip in expand_ip_entries(entries, max_length):
+        ok, reason = validate_ip(ip, max_length)
         if ok:
             valid_ips.append(ip)
         else:
@@ -209,8 +182,8 @@ def main():
     if not valid_ips:
         print("[WARN] No valid IPs supplied; nothing to generate.")
         return 0
-    for ip in valid_ips:
-        generate_ip_variant(Path(DEBRANDED_BASE), ip, out_dir)
+    generate_ip_variants(Path(DEBRANDED_BASE), valid_ips, out_dir, jobs=args.jobs, resume=args.resume,
+                         compression=args.compression)
     return 0
 
 if __name__ == "__main__":
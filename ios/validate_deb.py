@@ -2,53 +2,43 @@
 import sys
 import tarfile
 import io
-AR_MAGIC = b"!<arch>\n"
-
-def read_members(f):
-    if f.read(8) != AR_MAGIC:
-        raise ValueError("Missing ar global header")
-    members = []
-    while True:
-        hdr = f.read(60)
-        if not hdr: break
-        if len(hdr) < 60:
-            raise ValueError("Truncated member header")
-        name = hdr[0:16].decode('ascii').strip()
-        size = int(hdr[48:58].decode('ascii').strip() or "0")
-        data = f.read(size)
-        if size % 2 == 1:
-            f.read(1)
-        members.append((name, data))
-    return members
+from deb_archive import DebArchive, ArError
 
 def main(path):
-    with open(path,'rb') as f:
-        members = read_members(f)
-    order = [n for n,_ in members]
+    try:
+        deb = DebArchive(path)
+    except ArError as e:
+        print("FAIL:", e); return 1
+    with deb:
+        return check(deb)
+
+def check(deb):
+    # Only member headers and a few payload bytes are touched; the data archive is never read
+    order = deb.names()
     print("Order:", order)
     if order[:1] != ['debian-binary']:
         print("FAIL: debian-binary not first"); return 1
     if 'control.tar.gz' not in order:
         print("FAIL: missing control.tar.gz"); return 1
-    data_name = next((n for n,_ in members if n.startswith('data.tar')), None)
-    if not data_name:
+    data_member = deb.find('data.tar')
+    if not data_member:
         print("FAIL: missing data.tar.*"); return 1
-    debbin = next(d for n,d in members if n=='debian-binary')
+    debbin = bytes(deb.data('debian-binary'))
     if debbin != b'2.0\n':
         print("FAIL: wrong debian-binary contents"); return 1
-    data_bytes = next(d for n,d in members if n==data_name)
-    sig = data_bytes[:6]
+    sig = bytes(deb.data(data_member)[:6])
     if sig.startswith(b'\x5d\x00\x00'):
         print("OK: LZMA-alone")
     elif sig.startswith(b'\xFD7zXZ') or sig[:2]==b'\xFD7':
         print("FAIL: XZ container used"); return 1
+    elif data_member.name == 'data.tar' and bytes(deb.data(data_member)[257:262]) == b'ustar':
+        print("OK: uncompressed tar")
     else:
         print("WARN: Unknown data signature:", sig)
 
     # Additional check: verify control file exists inside control.tar.gz
-    ctrl = next(d for n,d in members if n=='control.tar.gz')
     try:
-        with tarfile.open(fileobj=io.BytesIO(ctrl), mode='r:gz') as t:
+        with tarfile.open(fileobj=io.BytesIO(deb.data('control.tar.gz')), mode='r:gz') as t:
             names = t.getnames()
         if 'control' not in names:
             print("FAIL: control file missing inside control.tar.gz")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM Local Control API
+==========================
+Tiny loopback HTTP (or Unix-socket) server that the streaming controller
+and the USBMux listener embed so launchers can read their state and send
+commands without spawning PowerShell/plink to rediscover it.
+
+The owner pushes a status snapshot whenever something changes; GET /status
+returns the pre-serialised bytes, so a query never touches the owner's
+locks or the network stack.
+
+    GET  /status                 cached JSON snapshot
+    GET  /health                 {"ok": true}
+    POST /command/<name>         JSON body in, JSON result out
+
+Usage:
+    python control_api.py status                       # controller (port 1990)
+    python control_api.py status --port 1991           # usbmux listener
+    python control_api.py reconnect
+    python control_api.py switch-profile --config conf\\srs_iphone_ultra_smooth.conf
+    python control_api.py switch-profile --budget-ms 400
+"""
+
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict, Optional
+
+CONTROLLER_CONTROL_PORT = 1990
+LISTENER_CONTROL_PORT = 1991
+
+CommandHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    server_version = "iOSVCAMControl/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no (host, port) tuple
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, code: int, body: bytes) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        control: ControlServer = self.server.control
+        if self.path == "/status":
+            self._send(200, control.snapshot_bytes())
+        elif self.path == "/health":
+            self._send(200, b'{"ok": true}')
+        else:
+            self._send(404, json.dumps({"error": f"unknown path {self.path}"}).encode())
+
+    def do_POST(self) -> None:
+        control: ControlServer = self.server.control
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if not self.path.startswith("/command/"):
+            self._send(404, json.dumps({"error": f"unknown path {self.path}"}).encode())
+            return
+        try:
+            args = json.loads(raw) if raw else {}
+        except ValueError:
+            self._send(400, b'{"error": "body is not JSON"}')
+            return
+        code, result = control.dispatch(self.path[len("/command/"):], args)
+        self._send(code, json.dumps(result).encode())
+
+
+class _TCPControlServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socket, "AF_UNIX"):
+    class _UnixControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixControlServer = None
+
+
+class ControlServer:
+    """
+    Serves a cached status snapshot and named commands on loopback.
+
+    Pass unix_path to listen on a Unix socket instead of host:port
+    (Windows 10+ supports AF_UNIX too, but not every Python build does).
+    """
+
+    def __init__(self, name: str, host: str = "127.0.0.1", port: int = CONTROLLER_CONTROL_PORT,
+                 unix_path: Optional[str] = None):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self._commands: Dict[str, CommandHandler] = {}
+        self._lock = threading.Lock()
+        self._snapshot = json.dumps({"service": name, "updated": None}).encode()
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, handler: CommandHandler) -> None:
+        self._commands[name] = handler
+
+    def update(self, status: Dict[str, Any]) -> None:
+        """Replace the snapshot served by GET /status."""
+        body = dict(status, service=self.name, updated=time.time())
+        encoded = json.dumps(body, default=str).encode()
+        with self._lock:
+            self._snapshot = encoded
+
+    def snapshot_bytes(self) -> bytes:
+        with self._lock:
+            return self._snapshot
+
+    def dispatch(self, name: str, args: Dict[str, Any]):
+        handler = self._commands.get(name)
+        if handler is None:
+            return 404, {"error": f"unknown command '{name}'", "commands": sorted(self._commands)}
+        try:
+            return 200, dict(handler(args) or {}, command=name)
+        except Exception as e:
+            return 500, {"error": str(e), "command": name}
+
+    def start(self) -> bool:
+        try:
+            if self.unix_path:
+                if _UnixControlServer is None:
+                    print("WARNING: Unix sockets not available, control API disabled")
+                    return False
+                if os.path.exists(self.unix_path):
+                    os.unlink(self.unix_path)
+                self._server = _UnixControlServer(self.unix_path, _ControlHandler)
+            else:
+                self._server = _TCPControlServer((self.host, self.port), _ControlHandler)
+        except OSError as e:
+            print(f"WARNING: control API for {self.name} not started: {e}")
+            return False
+        self._server.control = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"control-{self.name}",
+                                        daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.unix_path and os.path.exists(self.unix_path):
+            try:
+                os.unlink(self.unix_path)
+            except OSError:
+                pass
+
+    @property
+    def address(self) -> str:
+        return self.unix_path or f"http://{self.host}:{self.port}"
+
+
+def request(method: str, path: str, body: Optional[Dict[str, Any]] = None, host: str = "127.0.0.1",
+            port: int = CONTROLLER_CONTROL_PORT, unix_path: Optional[str] = None,
+            timeout: float = 15.0) -> Dict[str, Any]:
+    """Minimal client; raw sockets so it works on Unix sockets as well."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    if unix_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(unix_path)
+    else:
+        sock = socket.create_connection((host, port), timeout=timeout)
+    with sock:
+        head = (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n")
+        sock.sendall(head.encode() + payload)
+        chunks = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+    response = b"".join(chunks)
+    _, _, content = response.partition(b"\r\n\r\n")
+    return json.loads(content or b"{}")
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM control API client")
+    parser.add_argument("command", help="status, health, or a command name (reconnect, switch-profile, ...)")
+    parser.add_argument("--port", type=int, default=CONTROLLER_CONTROL_PORT)
+    parser.add_argument("--unix", default=None, help="Unix socket path instead of the TCP port")
+    parser.add_argument("--config", default=None, help="switch-profile: SRS config to switch to")
+    parser.add_argument("--budget-ms", type=float, default=None, help="switch-profile: compile for this budget")
+    parser.add_argument("--host", default=None, help="retarget: SRS host")
+    parser.add_argument("--srs-port", type=int, default=None, help="retarget: SRS port")
+    args = parser.parse_args()
+
+    try:
+        if args.command in ("status", "health"):
+            result = request("GET", f"/{args.command}", port=args.port, unix_path=args.unix)
+        else:
+            body = {k: v for k, v in (("config", args.config), ("budget_ms", args.budget_ms),
+                                      ("host", args.host), ("port", args.srs_port)) if v is not None}
+            result = request("POST", f"/command/{args.command}", body, port=args.port, unix_path=args.unix)
+    except OSError as e:
+        print(f"ERROR: control API not reachable: {e}")
+        return 2
+
+    print(json.dumps(result, indent=2))
+    return 1 if "error" in result else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM HTTP-FLV Egress Probe
+==============================
+Connects to an SRS http_remux mount ([vhost]/[app]/[stream].flv), parses
+FLV tags incrementally as they arrive and measures what a viewer actually
+gets: frame inter-arrival jitter, stalls, effective fps and how far the
+arrival clock drifts behind the stream timestamps.
+
+With --profiles it starts SRS once per profile in config/active/, feeds it
+from the synthetic publisher and prints one report per profile.
+
+Usage:
+    python flv_probe.py http://127.0.0.1:8080/live/srs.flv --duration 20
+    python flv_probe.py --profiles --srs-home .. --duration 20 --json flv_report.json
+"""
+
+import asyncio
+import json
+import statistics
+import struct
+import sys
+import time
+import urllib.parse
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+FLV_TAG_AUDIO = 8
+FLV_TAG_VIDEO = 9
+FLV_TAG_SCRIPT = 18
+
+DEFAULT_STALL_MS = 250.0
+PROBE_STREAM = "probe"
+
+
+# =============================================================================
+# INCREMENTAL PARSERS
+# =============================================================================
+
+@dataclass
+class FLVTag:
+    """One FLV tag header plus the bits of payload the probe cares about."""
+    tag_type: int
+    timestamp: int      # ms, 32-bit (extended) FLV timestamp
+    size: int
+    keyframe: bool = False
+    config: bool = False   # AVC/AAC sequence header
+
+
+class FLVTagParser:
+    """Incremental FLV demuxer: feed() arbitrary byte chunks, get complete tags back."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._header_done = False
+        self.bytes_fed = 0
+
+    def feed(self, data: bytes) -> List[FLVTag]:
+        self._buf += data
+        self.bytes_fed += len(data)
+        tags: List[FLVTag] = []
+
+        if not self._header_done:
+            if len(self._buf) < 9:
+                return tags
+            if self._buf[:3] != b"FLV":
+                raise ValueError("Stream is not FLV")
+            header_size = struct.unpack(">I", self._buf[5:9])[0]
+            if len(self._buf) < header_size + 4:
+                return tags
+            del self._buf[:header_size + 4]     # header + PreviousTagSize0
+            self._header_done = True
+
+        pos = 0
+        buf = self._buf
+        while len(buf) - pos >= 11:
+            tag_type = buf[pos] & 0x1F
+            size = int.from_bytes(buf[pos + 1:pos + 4], "big")
+            total = 11 + size + 4
+            if len(buf) - pos < total:
+                break
+            timestamp = int.from_bytes(buf[pos + 4:pos + 7], "big") | (buf[pos + 7] << 24)
+            tag = FLVTag(tag_type, timestamp, size)
+            if size:
+                first = buf[pos + 11]
+                if tag_type == FLV_TAG_VIDEO:
+                    tag.keyframe = (first >> 4) == 1
+                    tag.config = (first & 0x0F) == 7 and size > 1 and buf[pos + 12] == 0
+                elif tag_type == FLV_TAG_AUDIO:
+                    tag.config = (first >> 4) == 10 and size > 1 and buf[pos + 12] == 0
+            tags.append(tag)
+            pos += total
+        if pos:
+            del buf[:pos]
+        return tags
+
+
+class ChunkedDecoder:
+    """Incremental decoder for HTTP/1.1 Transfer-Encoding: chunked bodies."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._remaining = 0
+        self.done = False
+
+    def feed(self, data: bytes) -> bytes:
+        self._buf += data
+        out = bytearray()
+        while self._buf and not self.done:
+            if self._remaining < 0:
+                if len(self._buf) < 2:
+                    break
+                del self._buf[:2]
+                self._remaining = 0
+                continue
+            if self._remaining > 0:
+                take = min(self._remaining, len(self._buf))
+                out += self._buf[:take]
+                del self._buf[:take]
+                self._remaining -= take
+                if self._remaining == 0:
+                    self._remaining = -2    # trailing CRLF
+                continue
+            end = self._buf.find(b"\r\n")
+            if end < 0:
+                break
+            size = int(self._buf[:end].split(b";")[0], 16)
+            del self._buf[:end + 2]
+            if size == 0:
+                self.done = True
+            self._remaining = size
+        return bytes(out)
+
+
+# =============================================================================
+# STATISTICS
+# =============================================================================
+
+@dataclass
+class FLVProbeReport:
+    """What one viewer experienced over the probe window."""
+    url: str
+    profile: Optional[str] = None
+    duration_s: float = 0.0
+    bytes: int = 0
+    video_frames: int = 0
+    audio_frames: int = 0
+    keyframes: int = 0
+    fps: float = 0.0
+    startup_ms: Optional[float] = None
+    interarrival_mean_ms: float = 0.0
+    interarrival_p95_ms: float = 0.0
+    jitter_ms: float = 0.0
+    stalls: int = 0
+    stall_ms: float = 0.0
+    lag_p50_ms: float = 0.0
+    lag_p95_ms: float = 0.0
+    lag_max_ms: float = 0.0
+    error: Optional[str] = None
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+class FrameStats:
+    """
+    Accumulates (arrival time, timestamp) pairs for video frames.
+
+    Lag is measured relative to the best (arrival - timestamp) offset seen,
+    so it shows buffering the server adds on top of the fastest delivery
+    rather than clock offset between publisher and probe.
+    """
+
+    def __init__(self, stall_ms: float = DEFAULT_STALL_MS):
+        self.stall_ms = stall_ms
+        self.connect_time: Optional[float] = None
+        self.arrivals: List[float] = []
+        self.timestamps: List[int] = []
+        self.audio_frames = 0
+        self.keyframes = 0
+        self.bytes = 0
+
+    def add(self, tag: FLVTag, arrival: float):
+        if tag.config:
+            return
+        if tag.tag_type == FLV_TAG_AUDIO:
+            self.audio_frames += 1
+        elif tag.tag_type == FLV_TAG_VIDEO:
+            self.arrivals.append(arrival)
+            self.timestamps.append(tag.timestamp)
+            if tag.keyframe:
+                self.keyframes += 1
+
+    def report(self, url: str, profile: Optional[str] = None, error: Optional[str] = None) -> FLVProbeReport:
+        rep = FLVProbeReport(url=url, profile=profile, bytes=self.bytes, audio_frames=self.audio_frames,
+                             keyframes=self.keyframes, video_frames=len(self.arrivals), error=error)
+        if not self.arrivals:
+            return rep
+        if self.connect_time is not None:
+            rep.startup_ms = (self.arrivals[0] - self.connect_time) * 1000
+        rep.duration_s = self.arrivals[-1] - self.arrivals[0]
+        if rep.duration_s > 0:
+            rep.fps = (len(self.arrivals) - 1) / rep.duration_s
+
+        gaps = [(b - a) * 1000 for a, b in zip(self.arrivals, self.arrivals[1:])]
+        ts_gaps = [b - a for a, b in zip(self.timestamps, self.timestamps[1:])]
+        if gaps:
+            rep.interarrival_mean_ms = statistics.fmean(gaps)
+            rep.interarrival_p95_ms = _percentile(gaps, 95)
+            # RFC 3550 interarrival jitter: smoothed |arrival delta - timestamp delta|
+            jitter = 0.0
+            for gap, ts_gap in zip(gaps, ts_gaps):
+                jitter += (abs(gap - ts_gap) - jitter) / 16.0
+            rep.jitter_ms = jitter
+            nominal = statistics.median(ts_gaps) if ts_gaps else 0
+            threshold = max(self.stall_ms, 3 * nominal)
+            stalls = [g for g in gaps if g > threshold]
+            rep.stalls = len(stalls)
+            rep.stall_ms = sum(stalls)
+
+        offsets = [arrival * 1000 - ts for arrival, ts in zip(self.arrivals, self.timestamps)]
+        best = min(offsets)
+        lags = [o - best for o in offsets]
+        rep.lag_p50_ms = _percentile(lags, 50)
+        rep.lag_p95_ms = _percentile(lags, 95)
+        rep.lag_max_ms = max(lags)
+        return rep
+
+
+# =============================================================================
+# PROBE
+# =============================================================================
+
+async def probe_flv(url: str, duration: float = 10.0, stall_ms: float = DEFAULT_STALL_MS,
+                    connect_timeout: float = 5.0, profile: Optional[str] = None) -> FLVProbeReport:
+    """Consume an HTTP-FLV stream for `duration` seconds and report on it."""
+    parts = urllib.parse.urlsplit(url)
+    host = parts.hostname or "127.0.0.1"
+    port = parts.port or 80
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    stats = FrameStats(stall_ms)
+    parser = FLVTagParser()
+    writer = None
+
+    try:
+        stats.connect_time = time.monotonic()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), connect_timeout)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode("ascii"))
+        await writer.drain()
+
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), connect_timeout)
+        status_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+        if " 200 " not in f"{status_line} ":
+            return stats.report(url, profile, error=status_line)
+        chunked = ChunkedDecoder() if b"transfer-encoding: chunked" in head.lower() else None
+
+        deadline = time.monotonic() + duration
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                data = await asyncio.wait_for(reader.read(65536), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                return stats.report(url, profile, error="server closed the stream")
+            arrival = time.monotonic()
+            stats.bytes += len(data)
+            if chunked:
+                data = chunked.feed(data)
+            for tag in parser.feed(data):
+                stats.add(tag, arrival)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+        return stats.report(url, profile, error=str(e) or type(e).__name__)
+    finally:
+        if writer:
+            writer.close()
+
+    return stats.report(url, profile)
+
+
+def format_report(rep: FLVProbeReport) -> str:
+    name = rep.profile or rep.url
+    if rep.error and not rep.video_frames:
+        return f"{name:<40} ERROR: {rep.error}"
+    startup = f"{rep.startup_ms:.0f}" if rep.startup_ms is not None else "-"
+    line = (f"{name:<40} fps={rep.fps:5.1f} jitter={rep.jitter_ms:5.1f}ms "
+            f"p95gap={rep.interarrival_p95_ms:5.0f}ms stalls={rep.stalls:<3d} ({rep.stall_ms:.0f}ms) "
+            f"lag p50/p95/max={rep.lag_p50_ms:.0f}/{rep.lag_p95_ms:.0f}/{rep.lag_max_ms:.0f}ms "
+            f"startup={startup}ms")
+    if rep.error:
+        line += f" [{rep.error}]"
+    return line
+
+
+# =============================================================================
+# PER-PROFILE HARNESS
+# =============================================================================
+
+@dataclass
+class ProfileEndpoints:
+    rtmp_url: str
+    flv_url: str
+    hls_url: Optional[str]   # None when the profile has HLS off
+
+
+@contextmanager
+def profile_harness(srs_home: Path, config_path: Path, stream: str = PROBE_STREAM,
+                    publish: bool = True, settle: float = 2.0) -> Iterator[ProfileEndpoints]:
+    """
+    Start SRS with a profile (re-bound to all interfaces so it works on
+    this host) plus a synthetic publisher, and tear both down afterwards.
+    """
+    from srs_config import SRSConfig, get_endpoints, set_endpoints
+    from synthetic_publisher import SyntheticPublisher
+    from usb_tethering_monitor import SRSServerManager
+
+    manager = SRSServerManager(srs_home, log_forward_rate=0)
+    config = set_endpoints(SRSConfig.load(config_path), bind_ip="0.0.0.0")
+    if not config.get_bool("vhost/http_remux/enabled"):
+        raise RuntimeError("profile has http_remux disabled")
+    runtime_config = config.save(manager.runtime_dir / f"probe_{config_path.name}",
+                                 header=f"Probe copy of {config_path.name}")
+    ports = get_endpoints(config)
+    rtmp_port = ports["rtmp"][1]
+    http_port = ports.get("http", (None, 8080))[1]
+    urls = ProfileEndpoints(
+        rtmp_url=f"rtmp://127.0.0.1:{rtmp_port}/live/{stream}",
+        flv_url=f"http://127.0.0.1:{http_port}/live/{stream}.flv",
+        hls_url=f"http://127.0.0.1:{http_port}/live/{stream}.m3u8" if config.get_bool("vhost/hls/enabled") else None,
+    )
+
+    publisher = SyntheticPublisher(urls.rtmp_url)
+    try:
+        if not manager.start(config_path=runtime_config) or not manager.wait_until_ready():
+            raise RuntimeError("SRS did not start")
+        if publish:
+            if not publisher.start():
+                raise RuntimeError("synthetic publisher did not start")
+            time.sleep(settle)
+        yield urls
+    finally:
+        publisher.stop()
+        manager.stop()
+
+
+def run_profiles(srs_home: Path, configs: List[Path], duration: float, stall_ms: float) -> List[FLVProbeReport]:
+    reports = []
+    for config_path in configs:
+        print(f"Probing {config_path.name}...")
+        try:
+            with profile_harness(srs_home, config_path) as urls:
+                rep = asyncio.run(probe_flv(urls.flv_url, duration, stall_ms, profile=config_path.name))
+        except Exception as e:
+            rep = FLVProbeReport(url="", profile=config_path.name, error=str(e))
+        print(format_report(rep))
+        reports.append(rep)
+    return reports
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM HTTP-FLV egress probe")
+    parser.add_argument("url", nargs="?", help="HTTP-FLV URL to probe")
+    parser.add_argument("--profiles", nargs="*", type=Path, default=None,
+                        help="Probe each profile (default: all of config/active/*.conf)")
+    parser.add_argument("--srs-home", type=Path, default=Path(__file__).resolve().parent.parent)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds to consume per probe")
+    parser.add_argument("--stall-ms", type=float, default=DEFAULT_STALL_MS,
+                        help="Frame gap counted as a stall (default: 250)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write reports as JSON")
+    args = parser.parse_args()
+
+    if args.profiles is not None:
+        configs = args.profiles or sorted((args.srs_home / "config" / "active").glob("*.conf"))
+        reports = run_profiles(args.srs_home, configs, args.duration, args.stall_ms)
+    elif args.url:
+        reports = [asyncio.run(probe_flv(args.url, args.duration, args.stall_ms))]
+        print(format_report(reports[0]))
+    else:
+        parser.print_help()
+        return 1
+
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in reports], indent=2), encoding="utf-8")
+        print(f"Wrote {args.json}")
+    return 0 if all(r.video_frames for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
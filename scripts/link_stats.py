@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM USB Link Statistics
+============================
+Samples the tethered interface's kernel counters (bytes, packets, errors,
+drops in both directions) at a fixed cadence into array-backed ring
+buffers, so stutter can be attributed to the USB link or ruled out.
+
+Counters are read without spawning anything:
+- Linux:   /sys/class/net/<if>/statistics/*, kept open and re-read with pread
+- Windows: GetIfEntry2 from iphlpapi.dll through ctypes, keyed by the
+           adapter alias Get-NetAdapter reports (e.g. "Ethernet 3")
+
+Usage:
+    python link_stats.py enx8a2f1c3b5d7e
+    python link_stats.py "Ethernet 3" --interval 0.5 --duration 60
+"""
+
+import ctypes
+import os
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+COUNTERS = (
+    "rx_bytes", "tx_bytes",
+    "rx_packets", "tx_packets",
+    "rx_errors", "tx_errors",
+    "rx_dropped", "tx_dropped",
+)
+
+DEFAULT_INTERVAL = 0.5      # seconds between samples
+DEFAULT_CAPACITY = 1200     # 10 minutes at the default interval
+CORRELATION_WINDOW = 10.0   # seconds either side of a state transition
+
+
+class LinkStatsError(OSError):
+    pass
+
+
+# =============================================================================
+# COUNTER READERS
+# =============================================================================
+
+class SysfsCounterReader:
+    """Reads /sys/class/net/<if>/statistics, one pread per counter."""
+
+    def __init__(self, interface: str, root: str = "/sys/class/net"):
+        self.interface = interface
+        base = os.path.join(root, interface, "statistics")
+        if not os.path.isdir(base):
+            raise LinkStatsError(f"no statistics for interface {interface} ({base})")
+        self._fds = [os.open(os.path.join(base, name), os.O_RDONLY) for name in COUNTERS]
+
+    def read(self) -> Tuple[int, ...]:
+        return tuple(int(os.pread(fd, 32, 0)) for fd in self._fds)
+
+    def close(self) -> None:
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = []
+
+
+if sys.platform == "win32":
+    from ctypes import wintypes
+
+    class _GUID(ctypes.Structure):
+        _fields_ = [("Data1", wintypes.DWORD), ("Data2", wintypes.WORD),
+                    ("Data3", wintypes.WORD), ("Data4", ctypes.c_ubyte * 8)]
+
+    class _MIB_IF_ROW2(ctypes.Structure):
+        _fields_ = [
+            ("InterfaceLuid", ctypes.c_uint64),
+            ("InterfaceIndex", wintypes.ULONG),
+            ("InterfaceGuid", _GUID),
+            ("Alias", wintypes.WCHAR * 257),
+            ("Description", wintypes.WCHAR * 257),
+            ("PhysicalAddressLength", wintypes.ULONG),
+            ("PhysicalAddress", ctypes.c_ubyte * 32),
+            ("PermanentPhysicalAddress", ctypes.c_ubyte * 32),
+            ("Mtu", wintypes.ULONG),
+            ("Type", wintypes.ULONG),
+            ("TunnelType", ctypes.c_int),
+            ("MediaType", ctypes.c_int),
+            ("PhysicalMediumType", ctypes.c_int),
+            ("AccessType", ctypes.c_int),
+            ("DirectionType", ctypes.c_int),
+            ("InterfaceAndOperStatusFlags", ctypes.c_ubyte),
+            ("OperStatus", ctypes.c_int),
+            ("AdminStatus", ctypes.c_int),
+            ("MediaConnectState", ctypes.c_int),
+            ("NetworkGuid", _GUID),
+            ("ConnectionType", ctypes.c_int),
+            ("TransmitLinkSpeed", ctypes.c_uint64),
+            ("ReceiveLinkSpeed", ctypes.c_uint64),
+            ("InOctets", ctypes.c_uint64),
+            ("InUcastPkts", ctypes.c_uint64),
+            ("InNUcastPkts", ctypes.c_uint64),
+            ("InDiscards", ctypes.c_uint64),
+            ("InErrors", ctypes.c_uint64),
+            ("InUnknownProtos", ctypes.c_uint64),
+            ("InUcastOctets", ctypes.c_uint64),
+            ("InMulticastOctets", ctypes.c_uint64),
+            ("InBroadcastOctets", ctypes.c_uint64),
+            ("OutOctets", ctypes.c_uint64),
+            ("OutUcastPkts", ctypes.c_uint64),
+            ("OutNUcastPkts", ctypes.c_uint64),
+            ("OutDiscards", ctypes.c_uint64),
+            ("OutErrors", ctypes.c_uint64),
+            ("OutUcastOctets", ctypes.c_uint64),
+            ("OutMulticastOctets", ctypes.c_uint64),
+            ("OutBroadcastOctets", ctypes.c_uint64),
+            ("OutQLen", ctypes.c_uint64),
+        ]
+
+
+class IfEntry2CounterReader:
+    """Reads the Windows interface row for an adapter alias via GetIfEntry2."""
+
+    def __init__(self, interface: str):
+        if sys.platform != "win32":
+            raise LinkStatsError("GetIfEntry2 is only available on Windows")
+        self.interface = interface
+        self._iphlpapi = ctypes.WinDLL("iphlpapi")
+        luid = ctypes.c_uint64()
+        rc = self._iphlpapi.ConvertInterfaceAliasToLuid(ctypes.c_wchar_p(interface), ctypes.byref(luid))
+        if rc != 0:
+            raise LinkStatsError(f"unknown adapter '{interface}' (error {rc})")
+        self._row = _MIB_IF_ROW2()
+        self._luid = luid.value
+
+    def read(self) -> Tuple[int, ...]:
+        row = self._row
+        row.InterfaceLuid = self._luid
+        row.InterfaceIndex = 0
+        rc = self._iphlpapi.GetIfEntry2(ctypes.byref(row))
+        if rc != 0:
+            raise LinkStatsError(f"GetIfEntry2 failed for '{self.interface}' (error {rc})")
+        return (
+            row.InOctets, row.OutOctets,
+            row.InUcastPkts + row.InNUcastPkts, row.OutUcastPkts + row.OutNUcastPkts,
+            row.InErrors, row.OutErrors,
+            row.InDiscards, row.OutDiscards,
+        )
+
+    def close(self) -> None:
+        pass
+
+
+def open_reader(interface: str):
+    if sys.platform == "win32":
+        return IfEntry2CounterReader(interface)
+    return SysfsCounterReader(interface)
+
+
+# =============================================================================
+# RING BUFFER
+# =============================================================================
+
+class CounterRing:
+    """
+    Fixed-capacity time series of counter samples. One array('d') for
+    timestamps and one array('Q') per counter, so a sample is nine machine
+    words and appending never allocates.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = {name: array("Q", bytes(8 * capacity)) for name in COUNTERS}
+        self._columns = [self.values[name] for name in COUNTERS]
+        self._next = 0
+        self.count = 0
+
+    def append(self, t: float, sample: Tuple[int, ...]) -> None:
+        i = self._next
+        self.times[i] = t
+        for column, value in zip(self._columns, sample):
+            column[i] = value
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _index(self, k: int) -> int:
+        """Physical slot of the k-th oldest sample."""
+        return (self._next - self.count + k) % self.capacity
+
+    def time_at(self, k: int) -> float:
+        return self.times[self._index(k)]
+
+    def value_at(self, name: str, k: int) -> int:
+        return self.values[name][self._index(k)]
+
+    def span(self, start: float, end: float) -> Optional[Tuple[int, int]]:
+        """Oldest and newest logical index with start <= t <= end."""
+        first = last = None
+        for k in range(self.count):
+            t = self.time_at(k)
+            if t < start:
+                continue
+            if t > end:
+                break
+            if first is None:
+                first = k
+            last = k
+        if first is None or first == last:
+            return None
+        return first, last
+
+
+# =============================================================================
+# DERIVED METRICS
+# =============================================================================
+
+def window_stats(ring: CounterRing, start: float, end: float) -> Optional[Dict[str, float]]:
+    """Throughput, drop rate and errors between two instants (None if <2 samples)."""
+    span = ring.span(start, end)
+    if span is None:
+        return None
+    first, last = span
+    elapsed = ring.time_at(last) - ring.time_at(first)
+    delta = {name: ring.value_at(name, last) - ring.value_at(name, first) for name in COUNTERS}
+    packets = delta["rx_packets"] + delta["tx_packets"]
+    dropped = delta["rx_dropped"] + delta["tx_dropped"]
+    return {
+        "seconds": elapsed,
+        "rx_kbps": delta["rx_bytes"] * 8 / elapsed / 1000,
+        "tx_kbps": delta["tx_bytes"] * 8 / elapsed / 1000,
+        "rx_pps": delta["rx_packets"] / elapsed,
+        "tx_pps": delta["tx_packets"] / elapsed,
+        "errors": delta["rx_errors"] + delta["tx_errors"],
+        "dropped": dropped,
+        "drop_rate": dropped / (packets + dropped) if packets + dropped else 0.0,
+    }
+
+
+def error_bursts(ring: CounterRing, min_errors: int = 1) -> List[Dict[str, float]]:
+    """Runs of consecutive samples in which error or drop counters moved."""
+    bursts: List[Dict[str, float]] = []
+    current = None
+    for k in range(1, ring.count):
+        bad = sum(ring.value_at(name, k) - ring.value_at(name, k - 1)
+                  for name in ("rx_errors", "tx_errors", "rx_dropped", "tx_dropped"))
+        if bad >= min_errors:
+            if current is None:
+                current = {"start": ring.time_at(k - 1), "end": ring.time_at(k), "errors": 0}
+                bursts.append(current)
+            current["end"] = ring.time_at(k)
+            current["errors"] += bad
+        else:
+            current = None
+    return bursts
+
+
+# =============================================================================
+# COLLECTOR
+# =============================================================================
+
+class LinkStatsCollector:
+    """
+    One background thread sampling every registered interface at a fixed
+    cadence. mark() records connection-state transitions so they can be
+    lined up against the link counters afterwards.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, capacity: int = DEFAULT_CAPACITY):
+        self.interval = interval
+        self.capacity = capacity
+        self.rings: Dict[str, CounterRing] = {}
+        self._readers: Dict[str, object] = {}
+        self.transitions: List[Tuple[float, str, str]] = []
+        self.sample_cost_us = 0.0
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, interface: str) -> bool:
+        with self._lock:
+            if interface in self._readers:
+                return True
+            try:
+                self._readers[interface] = open_reader(interface)
+            except (OSError, AttributeError) as e:
+                self.errors[interface] = str(e)
+                return False
+            self.rings.setdefault(interface, CounterRing(self.capacity))
+            self.errors.pop(interface, None)
+        return True
+
+    def remove(self, interface: str) -> None:
+        """Stop sampling an interface; its history is kept for reports."""
+        with self._lock:
+            reader = self._readers.pop(interface, None)
+        if reader:
+            reader.close()
+
+    def mark(self, interface: str, state: str) -> None:
+        self.transitions.append((time.time(), interface, state))
+        del self.transitions[:-200]
+
+    def sample(self) -> None:
+        started = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            readers = list(self._readers.items())
+        for interface, reader in readers:
+            try:
+                self.rings[interface].append(now, reader.read())
+            except (OSError, ValueError) as e:
+                # Adapter vanished (cable pulled); the monitor re-adds it
+                self.errors[interface] = str(e)
+                self.remove(interface)
+        cost = (time.perf_counter() - started) * 1e6
+        self.sample_cost_us += (cost - self.sample_cost_us) / 16
+
+    def _run(self) -> None:
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            self.sample()
+            # Fixed cadence: schedule from the plan, not from when we woke up
+            next_at += self.interval
+            delay = next_at - time.monotonic()
+            if delay < 0:
+                next_at = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="link-stats", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for interface in list(self._readers):
+            self.remove(interface)
+
+    def recent(self, interface: str, seconds: float = 5.0) -> Optional[Dict[str, float]]:
+        ring = self.rings.get(interface)
+        if ring is None or ring.count < 2:
+            return None
+        end = ring.time_at(ring.count - 1)
+        return window_stats(ring, end - seconds, end)
+
+    def correlate(self, window: float = CORRELATION_WINDOW) -> List[Dict[str, object]]:
+        """Link behaviour in the window before and after each state transition."""
+        report = []
+        for at, interface, state in self.transitions:
+            ring = self.rings.get(interface)
+            if ring is None:
+                continue
+            bursts = [b for b in error_bursts(ring) if at - window <= b["end"] and b["start"] <= at + window]
+            report.append({
+                "at": at,
+                "interface": interface,
+                "state": state,
+                "before": window_stats(ring, at - window, at),
+                "after": window_stats(ring, at, at + window),
+                "error_bursts": bursts,
+            })
+        return report
+
+
+def format_stats(stats: Optional[Dict[str, float]]) -> str:
+    if not stats:
+        return "no samples"
+    return (f"rx {stats['rx_kbps']:.0f} kbps / tx {stats['tx_kbps']:.0f} kbps, "
+            f"{stats['rx_pps'] + stats['tx_pps']:.0f} pkt/s, "
+            f"{stats['errors']} errors, {stats['dropped']} dropped ({stats['drop_rate'] * 100:.2f}%)")
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM USB link counters")
+    parser.add_argument("interface", help="Interface name (Linux) or adapter alias (Windows)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--report-every", type=float, default=5.0)
+    args = parser.parse_args()
+
+    collector = LinkStatsCollector(interval=args.interval)
+    if not collector.add(args.interface):
+        print(f"ERROR: {collector.errors[args.interface]}")
+        return 1
+    collector.start()
+    started = time.time()
+    try:
+        while args.duration is None or time.time() - started < args.duration:
+            time.sleep(args.report_every)
+            print(f"{args.interface}: {format_stats(collector.recent(args.interface, args.report_every))} "
+                  f"[sample cost {collector.sample_cost_us:.0f} us]")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
+
+    for burst in error_bursts(collector.rings[args.interface]):
+        print(f"Error burst: {burst['errors']} over {burst['end'] - burst['start']:.1f}s "
+              f"at {time.strftime('%H:%M:%S', time.localtime(burst['start']))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
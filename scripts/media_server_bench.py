@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM Media Server Benchmark
+===============================
+Runs each media-server backend (SRS, Monibuca, and optionally the
+in-process RTMP relay from rtmp_relay.py) on the same synthetic
+publish and compares what an HTTP-FLV viewer gets against what the server
+costs: startup, lag, stalls, CPU and resident memory.
+
+Every backend gets the same treatment: its profile is re-rendered to bind
+all interfaces on its default ports, the synthetic publisher pushes the
+30 fps / 2 s GOP test pattern to live/probe, and flv_probe consumes the
+FLV egress while the server process is sampled.
+
+Usage:
+    python media_server_bench.py --srs-home .. --duration 20
+    python media_server_bench.py --srs-home .. --backends monibuca \\
+        --monibuca-config ..\\conf\\monibuca_iphone_low_latency.yaml --json bench.json
+    python media_server_bench.py --srs-home .. --backends srs --all-srs-profiles --relay
+"""
+
+import asyncio
+import ctypes
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from flv_probe import DEFAULT_STALL_MS, PROBE_STREAM, FLVProbeReport, format_report, probe_flv
+from rtmp_relay import DEFAULT_RELAY_HTTP_PORT, DEFAULT_RELAY_RTMP_PORT
+from synthetic_publisher import SyntheticPublisher
+from usb_tethering_monitor import SERVER_BACKENDS, SRSServerManager
+
+
+# =============================================================================
+# PROCESS SAMPLING
+# =============================================================================
+
+class _FileTime(ctypes.Structure):
+    _fields_ = [("low", ctypes.c_uint32), ("high", ctypes.c_uint32)]
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    _fields_ = [("cb", ctypes.c_uint32), ("PageFaultCount", ctypes.c_uint32),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+
+def process_usage(pid: int) -> Optional[Tuple[float, int]]:
+    """(CPU seconds used so far, resident bytes) of a process, None if it is gone."""
+    if sys.platform == "win32":
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000 | 0x0010, False, pid)  # QUERY_LIMITED_INFORMATION | VM_READ
+        if not handle:
+            return None
+        try:
+            times = [_FileTime() for _ in range(4)]
+            if not kernel32.GetProcessTimes(handle, *[ctypes.byref(t) for t in times]):
+                return None
+            # Kernel + user time, in 100 ns units
+            cpu = sum((t.high << 32 | t.low) for t in times[2:]) / 1e7
+            counters = _ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            rss = counters.WorkingSetSize if ctypes.windll.psapi.GetProcessMemoryInfo(
+                handle, ctypes.byref(counters), counters.cb) else 0
+            return cpu, rss
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # Fields after the parenthesised command name; utime/stime are 14/15
+            fields = f.read().rpartition(b")")[2].split()
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return (int(fields[11]) + int(fields[12])) / ticks, rss_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class ProcessSampler:
+    """Samples CPU% (of one core) and RSS of a process on a background thread."""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_samples: List[float] = []
+        self.rss_samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _run(self):
+        last = process_usage(self.pid)
+        last_at = time.monotonic()
+        while last and not self._stop.wait(self.interval):
+            usage = process_usage(self.pid)
+            now = time.monotonic()
+            if usage is None:
+                return
+            self.cpu_samples.append(100.0 * (usage[0] - last[0]) / (now - last_at))
+            self.rss_samples.append(usage[1])
+            last, last_at = usage, now
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+@dataclass
+class BackendResult:
+    backend: str
+    config: str
+    ready_s: Optional[float] = None
+    cpu_mean_pct: Optional[float] = None
+    cpu_peak_pct: Optional[float] = None
+    rss_peak_mb: Optional[float] = None
+    probe: Optional[FLVProbeReport] = None
+    error: Optional[str] = None
+
+
+def bench_backend(manager: SRSServerManager, config_path: Path, duration: float, stall_ms: float,
+                  settle: float = 2.0) -> BackendResult:
+    result = BackendResult(backend=manager.name, config=config_path.name)
+    # Same listen addresses for every backend: all interfaces, default ports
+    launch_path = manager.render_runtime_config(config_path, bind_ip="0.0.0.0")
+    publisher = SyntheticPublisher(f"rtmp://127.0.0.1:{manager.endpoints.rtmp_port}/live/{PROBE_STREAM}")
+    try:
+        started = time.monotonic()
+        if not manager.start(config_path=launch_path) or not manager.wait_until_ready(timeout=15):
+            result.error = f"{manager.label} did not become ready"
+            return result
+        result.ready_s = round(time.monotonic() - started, 2)
+        if not publisher.start():
+            result.error = "synthetic publisher did not start"
+            return result
+        time.sleep(settle)
+
+        _measure(result, manager.process.pid, manager.flv_url(PROBE_STREAM, host="127.0.0.1"), duration, stall_ms)
+    finally:
+        publisher.stop()
+        manager.stop()
+    return result
+
+
+def bench_relay(duration: float, stall_ms: float, start: str = "keyframe", settle: float = 2.0) -> BackendResult:
+    """The in-process relay, run as its own process so its CPU can be sampled alone."""
+    result = BackendResult(backend="relay", config=f"start={start}")
+    command = [sys.executable, str(Path(__file__).resolve().parent / "rtmp_relay.py"),
+               "--rtmp-port", str(DEFAULT_RELAY_RTMP_PORT), "--http-port", str(DEFAULT_RELAY_HTTP_PORT),
+               "--start", start]
+    proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    publisher = SyntheticPublisher(f"rtmp://127.0.0.1:{DEFAULT_RELAY_RTMP_PORT}/live/{PROBE_STREAM}")
+    try:
+        started = time.monotonic()
+        while proc.poll() is None and time.monotonic() - started < 10:
+            try:
+                socket.create_connection(("127.0.0.1", DEFAULT_RELAY_RTMP_PORT), timeout=0.5).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            result.error = "relay did not become ready"
+            return result
+        result.ready_s = round(time.monotonic() - started, 2)
+        if not publisher.start():
+            result.error = "synthetic publisher did not start"
+            return result
+        time.sleep(settle)
+        url = f"http://127.0.0.1:{DEFAULT_RELAY_HTTP_PORT}/live/{PROBE_STREAM}.flv"
+        _measure(result, proc.pid, url, duration, stall_ms)
+    finally:
+        publisher.stop()
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return result
+
+
+def _measure(result: BackendResult, pid: int, url: str, duration: float, stall_ms: float) -> None:
+    """Probe the FLV egress while sampling the serving process."""
+    sampler = ProcessSampler(pid)
+    sampler.start()
+    try:
+        result.probe = asyncio.run(probe_flv(url, duration, stall_ms, profile=f"{result.backend}:{result.config}"))
+    finally:
+        sampler.stop()
+    if sampler.cpu_samples:
+        result.cpu_mean_pct = round(sum(sampler.cpu_samples) / len(sampler.cpu_samples), 1)
+        result.cpu_peak_pct = round(max(sampler.cpu_samples), 1)
+        result.rss_peak_mb = round(max(sampler.rss_samples) / 1e6, 1)
+    if not result.probe.video_frames:
+        result.error = result.probe.error or "no video received"
+
+
+def format_table(results: List[BackendResult]) -> str:
+    def num(value, fmt="{:.0f}"):
+        return fmt.format(value) if value is not None else "-"
+
+    lines = [f"{'backend':<10} {'config':<34} {'ready':>6} {'start':>6} {'lag50':>6} {'lag95':>6} "
+             f"{'stalls':>6} {'fps':>5} {'cpu%':>6} {'peak%':>6} {'rssMB':>6}"]
+    for r in results:
+        p = r.probe or FLVProbeReport(url="")
+        if r.error:
+            lines.append(f"{r.backend:<10} {r.config:<34} ERROR: {r.error}")
+            continue
+        lines.append(f"{r.backend:<10} {r.config:<34} {num(r.ready_s, '{:.1f}'):>6} {num(p.startup_ms):>6} "
+                     f"{p.lag_p50_ms:6.0f} {p.lag_p95_ms:6.0f} {p.stalls:6d} {p.fps:5.1f} "
+                     f"{num(r.cpu_mean_pct, '{:.1f}'):>6} {num(r.cpu_peak_pct, '{:.1f}'):>6} "
+                     f"{num(r.rss_peak_mb, '{:.1f}'):>6}")
+    return "\n".join(lines)
+
+
+def num_or_dash(value: Optional[float]) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def recommend(results: List[BackendResult]) -> Optional[str]:
+    """Lowest p95 lag wins; within 50 ms of it, the cheaper server on CPU."""
+    ok = [r for r in results if not r.error and r.probe and r.probe.video_frames]
+    if not ok:
+        return None
+    best_lag = min(r.probe.lag_p95_ms for r in ok)
+    close = [r for r in ok if r.probe.lag_p95_ms - best_lag <= 50.0]
+    pick = min(close, key=lambda r: (r.cpu_mean_pct if r.cpu_mean_pct is not None else float("inf"),
+                                     r.probe.lag_p95_ms))
+    return (f"{pick.backend} ({pick.config}): p95 lag {pick.probe.lag_p95_ms:.0f} ms, "
+            f"{num_or_dash(pick.cpu_mean_pct)}% CPU")
+
+
+def compare_relay(results: List[BackendResult]) -> Optional[str]:
+    """How the relay's lag compares with the best SRS profile in this run."""
+    ok = [r for r in results if not r.error and r.probe and r.probe.video_frames]
+    relay = [r for r in ok if r.backend == "relay"]
+    srs = [r for r in ok if r.backend == "srs"]
+    if not relay or not srs:
+        return None
+    best = min(srs, key=lambda r: r.probe.lag_p95_ms)
+    r = min(relay, key=lambda r: r.probe.lag_p95_ms)
+    return (f"relay ({r.config}) vs best SRS ({best.config}): p50 lag {r.probe.lag_p50_ms:.0f} vs "
+            f"{best.probe.lag_p50_ms:.0f} ms, p95 {r.probe.lag_p95_ms:.0f} vs {best.probe.lag_p95_ms:.0f} ms, "
+            f"CPU {num_or_dash(r.cpu_mean_pct)} vs {num_or_dash(best.cpu_mean_pct)}%")
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM media server benchmark (SRS vs Monibuca vs relay)")
+    parser.add_argument("--srs-home", type=Path, default=Path(__file__).resolve().parent.parent)
+    parser.add_argument("--backends", nargs="+", choices=sorted(SERVER_BACKENDS), default=sorted(SERVER_BACKENDS))
+    parser.add_argument("--srs-config", type=Path, nargs="+", default=None,
+                        help="SRS profile(s) (default: the one the controller would use)")
+    parser.add_argument("--all-srs-profiles", action="store_true",
+                        help="Benchmark every SRS profile in config/active/")
+    parser.add_argument("--relay", action="store_true",
+                        help="Also benchmark the in-process RTMP -> HTTP-FLV relay (rtmp_relay.py)")
+    parser.add_argument("--relay-start", choices=("keyframe", "gop"), default="keyframe")
+    parser.add_argument("--monibuca-config", type=Path, default=None,
+                        help="Monibuca profile (default: conf/monibuca_iphone_optimized.yaml)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to consume per backend")
+    parser.add_argument("--stall-ms", type=float, default=DEFAULT_STALL_MS,
+                        help="Frame gap counted as a stall (default: 250)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results as JSON")
+    args = parser.parse_args()
+
+    srs_configs = args.srs_config
+    if args.all_srs_profiles:
+        srs_configs = sorted((args.srs_home / "config" / "active").glob("*.conf"))
+    configs = {"srs": srs_configs, "monibuca": [args.monibuca_config] if args.monibuca_config else None}
+    results = []
+    for name in args.backends:
+        manager = SERVER_BACKENDS[name](args.srs_home, log_forward_rate=0)
+        try:
+            config_paths = configs.get(name) or [manager.get_usb_config()]
+        except FileNotFoundError as e:
+            results.append(BackendResult(backend=name, config="-", error=str(e)))
+            continue
+        for config_path in config_paths:
+            print(f"Benchmarking {manager.label} with {config_path.name} for {args.duration:.0f}s...")
+            result = bench_backend(manager, config_path, args.duration, args.stall_ms)
+            if result.probe:
+                print(format_report(result.probe))
+            results.append(result)
+
+    if args.relay:
+        print(f"Benchmarking in-process relay (start={args.relay_start}) for {args.duration:.0f}s...")
+        result = bench_relay(args.duration, args.stall_ms, start=args.relay_start)
+        if result.probe:
+            print(format_report(result.probe))
+        results.append(result)
+
+    print("")
+    print(format_table(results))
+    pick = recommend(results)
+    print("")
+    print(f"Recommended: {pick}" if pick else "No backend produced a playable stream")
+    comparison = compare_relay(results)
+    if comparison:
+        print(comparison)
+
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in results], indent=2), encoding="utf-8")
+        print(f"Wrote {args.json}")
+    return 0 if pick else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM Monibuca Config Tools
+==============================
+Reads and rewrites the Monibuca profiles in conf/ (monibuca_iphone_*.yaml)
+the same way srs_config.py handles SRS .conf files.
+
+The profiles are plain two-level YAML (section, then scalar keys or short
+lists), so this edits lines in place instead of depending on PyYAML; that
+also keeps comments and ordering intact.
+
+Usage:
+    python monibuca_config.py show ..\\conf\\monibuca_iphone_low_latency.yaml
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_LINE_RE = re.compile(r"^(?P<indent>\s*)(?P<key>[A-Za-z0-9_]+):(?P<value>[^#]*?)(?P<comment>\s*#.*)?$")
+
+# Directives holding "host:port" listen addresses, and which endpoint they are
+LISTEN_PATHS = {
+    "global/rtmp": "rtmp",
+    "rtmp/listen_addr": "rtmp",
+    "global/http": "http",
+    "http/listen_addr": "http",
+}
+
+
+class MonibucaConfigError(ValueError):
+    pass
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+class MonibucaConfig:
+    """A Monibuca YAML profile addressed with 'section/key' paths."""
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+
+    @classmethod
+    def parse(cls, text: str) -> "MonibucaConfig":
+        return cls(text.splitlines())
+
+    @classmethod
+    def load(cls, path: Path) -> "MonibucaConfig":
+        return cls.parse(Path(path).read_text(encoding="utf-8-sig"))
+
+    def _locate(self, path: str) -> Optional[Tuple[int, re.Match]]:
+        parts = path.split("/")
+        if len(parts) != 2:
+            raise MonibucaConfigError(f"expected 'section/key', got '{path}'")
+        section, key = parts
+        current = None
+        for index, line in enumerate(self.lines):
+            match = _LINE_RE.match(line)
+            if not match:
+                continue
+            if not match.group("indent"):
+                current = match.group("key")
+            elif current == section and match.group("key") == key and len(match.group("indent")) <= 2:
+                return index, match
+        return None
+
+    def get(self, path: str) -> Optional[str]:
+        found = self._locate(path)
+        return _unquote(found[1].group("value")) if found else None
+
+    def set(self, path: str, value: str) -> None:
+        """Replace a value in place; the key must exist (profiles are complete)."""
+        found = self._locate(path)
+        if not found:
+            raise MonibucaConfigError(f"{path} not present in config")
+        index, match = found
+        original = match.group("value").strip()
+        quote = original[0] if original[:1] in "\"'" else ""
+        comment = match.group("comment") or ""
+        self.lines[index] = f"{match.group('indent')}{match.group('key')}: {quote}{value}{quote}{comment}"
+
+    def render(self, header: Optional[str] = None) -> str:
+        out = []
+        if header:
+            out.extend(f"# {line}" for line in header.splitlines())
+            out.append("")
+        out.extend(self.lines)
+        return "\n".join(out) + "\n"
+
+    def save(self, path: Path, header: Optional[str] = None) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.render(header), encoding="utf-8")
+        return path
+
+
+def split_listen(value: str) -> Tuple[Optional[str], int]:
+    host, _, port = value.rpartition(":")
+    if not port.isdigit():
+        raise MonibucaConfigError(f"bad listen address '{value}'")
+    return (host or None), int(port)
+
+
+def get_endpoints(config: MonibucaConfig) -> Dict[str, Tuple[Optional[str], int]]:
+    """{'rtmp': (host, port), 'http': (host, port)}; section keys win over global."""
+    result = {}
+    for path, key in LISTEN_PATHS.items():
+        value = config.get(path)
+        if value:
+            result[key] = split_listen(value)
+    return result
+
+
+def set_endpoints(config: MonibucaConfig, rtmp_port: Optional[int] = None, http_port: Optional[int] = None,
+                  bind_ip: Optional[str] = None) -> MonibucaConfig:
+    """
+    Rewrite every listen address. Ports left as None keep their value;
+    bind_ip of None keeps the current host. Monibuca wants a host, so the
+    wildcard is written as 0.0.0.0 rather than dropped.
+    """
+    ports = {"rtmp": rtmp_port, "http": http_port}
+    for path, key in LISTEN_PATHS.items():
+        value = config.get(path)
+        if not value:
+            continue
+        host, port = split_listen(value)
+        port = ports[key] if ports[key] is not None else port
+        host = bind_ip if bind_ip is not None else (host or "0.0.0.0")
+        config.set(path, f"{host}:{port}")
+    return config
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM Monibuca config tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    show = sub.add_parser("show", help="Print listen addresses and latency-relevant settings")
+    show.add_argument("config", type=Path)
+    args = parser.parse_args()
+
+    config = MonibucaConfig.load(args.config)
+    for key, (host, port) in get_endpoints(config).items():
+        print(f"  {key:6} {host or '*'}:{port}")
+    for path in ("rtmp/chunk_size", "rtmp/gop_cache", "hls/enable", "hls/fragment", "hls/window",
+                 "engine/ring_size", "engine/gop_cache_len"):
+        value = config.get(path)
+        if value is not None:
+            print(f"  {path:22} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM Process Priority
+=========================
+Scheduling profiles for the streaming processes (SRS, the usbmux forwarder,
+the in-process bridge) so host load does not turn into frame jitter.
+
+A profile can set:
+- nice value (all threads of the process)
+- I/O priority class and level (ioprio_set)
+- SCHED_FIFO / SCHED_RR with a real-time priority
+- CPU affinity
+- cgroup v2 cpu.weight (a child group per role under /sys/fs/cgroup/iosvcam)
+
+Everything is applied with system calls from this process, no helper tools
+are spawned. Settings the user is not allowed to make (negative nice and
+real-time classes need root or CAP_SYS_NICE) are reported and skipped.
+On Windows only the priority class (mapped from nice) and affinity apply.
+
+Usage:
+    python process_priority.py presets
+    python process_priority.py apply low-latency --pid 1234
+    python process_priority.py bench --preset realtime --contention 8 --duration 10
+"""
+
+import ctypes
+import os
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+CGROUP_GROUP = "iosvcam"
+
+IOPRIO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+# ioprio_set is not wrapped by libc or the os module
+IOPRIO_SET_SYSCALL = {"x86_64": 251, "i386": 289, "i686": 289, "aarch64": 30, "armv7l": 314}
+
+
+@dataclass(frozen=True)
+class PriorityProfile:
+    nice: Optional[int] = None
+    ionice_class: Optional[str] = None      # realtime, best-effort, idle
+    ionice_level: int = 4                   # 0 (highest) .. 7
+    policy: Optional[str] = None            # fifo, rr, other
+    rt_priority: int = 10                   # 1 .. 99 for fifo/rr
+    cpus: Optional[Sequence[int]] = None
+    cpu_weight: Optional[int] = None        # cgroup v2, 1 .. 10000 (default 100)
+
+    def is_empty(self) -> bool:
+        return self == PriorityProfile()
+
+
+def _last_cpus(count: int) -> List[int]:
+    """The last count CPUs: the kernel tends to put IRQs and housekeeping on CPU 0."""
+    total = os.cpu_count() or 1
+    return list(range(max(0, total - count), total)) if total > count else list(range(total))
+
+
+PRESETS: Dict[str, PriorityProfile] = {
+    "default": PriorityProfile(),
+    "balanced": PriorityProfile(nice=-5, ionice_class="best-effort", ionice_level=2, cpu_weight=200),
+    "low-latency": PriorityProfile(nice=-10, ionice_class="best-effort", ionice_level=0,
+                                   policy="rr", rt_priority=10, cpu_weight=500),
+    "realtime": PriorityProfile(nice=-15, ionice_class="realtime", ionice_level=2,
+                                policy="fifo", rt_priority=40, cpus=tuple(_last_cpus(2)), cpu_weight=1000),
+}
+
+
+def get_preset(name: str) -> PriorityProfile:
+    try:
+        return PRESETS[name]
+    except KeyError:
+        raise ValueError(f"unknown priority preset '{name}' (choose from {', '.join(PRESETS)})") from None
+
+
+# =============================================================================
+# APPLYING PROFILES
+# =============================================================================
+
+def _tasks(pid: int) -> List[int]:
+    """Thread ids of pid; nice, policy and affinity are per thread on Linux."""
+    try:
+        return [int(t) for t in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        return [pid]
+
+
+def _ioprio_set(pid: int, klass: str, level: int) -> None:
+    number = IOPRIO_SET_SYSCALL.get(platform.machine())
+    if number is None:
+        raise OSError(f"ioprio_set syscall number unknown on {platform.machine()}")
+    libc = ctypes.CDLL(None, use_errno=True)
+    value = (IOPRIO_CLASSES[klass] << IOPRIO_CLASS_SHIFT) | (0 if klass == "idle" else level)
+    if libc.syscall(number, IOPRIO_WHO_PROCESS, pid, value) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def _cgroup_weight(pid: int, role: str, weight: int) -> Path:
+    """Move pid into /sys/fs/cgroup/iosvcam/<role> with the given cpu.weight."""
+    if not (CGROUP_ROOT / "cgroup.controllers").exists():
+        raise OSError("cgroup v2 not mounted at /sys/fs/cgroup")
+    parent = CGROUP_ROOT / CGROUP_GROUP
+    group = parent / role
+    group.mkdir(parents=True, exist_ok=True)
+    # The cpu controller must be enabled for the children of every level
+    for level in (CGROUP_ROOT, parent):
+        control = level / "cgroup.subtree_control"
+        if "cpu" not in control.read_text().split():
+            control.write_text("+cpu")
+    (group / "cpu.weight").write_text(str(weight))
+    (group / "cgroup.procs").write_text(str(pid))
+    return group
+
+
+def _apply_windows(pid: int, profile: PriorityProfile) -> List[str]:
+    report = []
+    kernel32 = ctypes.windll.kernel32
+    PROCESS_SET_INFORMATION = 0x0200
+    handle = kernel32.OpenProcess(PROCESS_SET_INFORMATION, False, pid)
+    if not handle:
+        return [f"FAILED open process {pid}"]
+    try:
+        if profile.nice is not None:
+            # HIGH for real-time-ish presets, ABOVE_NORMAL for small boosts
+            if profile.nice <= -10 or profile.policy in ("fifo", "rr"):
+                priority_class, name = 0x00000080, "HIGH"
+            elif profile.nice < 0:
+                priority_class, name = 0x00008000, "ABOVE_NORMAL"
+            elif profile.nice > 0:
+                priority_class, name = 0x00004000, "BELOW_NORMAL"
+            else:
+                priority_class, name = 0x00000020, "NORMAL"
+            ok = kernel32.SetPriorityClass(handle, priority_class)
+            report.append(f"{'ok' if ok else 'FAILED'} priority class {name}")
+        if profile.cpus:
+            mask = sum(1 << cpu for cpu in profile.cpus)
+            ok = kernel32.SetProcessAffinityMask(handle, ctypes.c_size_t(mask))
+            report.append(f"{'ok' if ok else 'FAILED'} affinity {list(profile.cpus)}")
+    finally:
+        kernel32.CloseHandle(handle)
+    return report
+
+
+def apply_profile(pid: int, profile: PriorityProfile, role: str = "srs") -> List[str]:
+    """
+    Apply profile to every thread of pid. Returns one line per setting,
+    prefixed 'ok' or 'FAILED', so callers can log what actually took.
+    """
+    if profile.is_empty():
+        return []
+    if sys.platform == "win32":
+        return _apply_windows(pid, profile)
+
+    report = []
+
+    def attempt(label: str, action) -> None:
+        try:
+            action()
+            report.append(f"ok {label}")
+        except (OSError, ValueError) as e:
+            report.append(f"FAILED {label}: {e}")
+
+    tasks = _tasks(pid)
+    if profile.nice is not None:
+        attempt(f"nice {profile.nice}",
+                lambda: [os.setpriority(os.PRIO_PROCESS, tid, profile.nice) for tid in tasks])
+    if profile.ionice_class:
+        attempt(f"ionice {profile.ionice_class}/{profile.ionice_level}",
+                lambda: _ioprio_set(pid, profile.ionice_class, profile.ionice_level))
+    if profile.policy:
+        policies = {"fifo": os.SCHED_FIFO, "rr": os.SCHED_RR, "other": os.SCHED_OTHER}
+        priority = profile.rt_priority if profile.policy in ("fifo", "rr") else 0
+        attempt(f"policy {profile.policy}/{priority}",
+                lambda: [os.sched_setscheduler(tid, policies[profile.policy], os.sched_param(priority))
+                         for tid in tasks])
+    if profile.cpus:
+        attempt(f"affinity {list(profile.cpus)}",
+                lambda: [os.sched_setaffinity(tid, profile.cpus) for tid in tasks])
+    if profile.cpu_weight is not None:
+        attempt(f"cgroup {CGROUP_GROUP}/{role} cpu.weight {profile.cpu_weight}",
+                lambda: _cgroup_weight(pid, role, profile.cpu_weight))
+    return report
+
+
+def describe(profile: PriorityProfile) -> str:
+    parts = []
+    if profile.nice is not None:
+        parts.append(f"nice {profile.nice}")
+    if profile.ionice_class:
+        parts.append(f"ionice {profile.ionice_class}/{profile.ionice_level}")
+    if profile.policy:
+        parts.append(f"SCHED_{profile.policy.upper()} {profile.rt_priority}")
+    if profile.cpus:
+        parts.append(f"cpus {','.join(map(str, profile.cpus))}")
+    if profile.cpu_weight is not None:
+        parts.append(f"cpu.weight {profile.cpu_weight}")
+    return ", ".join(parts) or "inherit"
+
+
+# =============================================================================
+# JITTER BENCHMARK
+# =============================================================================
+
+def _burn(stop_at: float) -> None:
+    x = 0
+    while time.time() < stop_at:
+        x = (x * 1103515245 + 12345) & 0x7FFFFFFF
+
+
+def _pacer(period_ms: float, duration: float, conn) -> None:
+    """Wake every period_ms like a 30/60 fps frame pump and report lateness."""
+    period = period_ms / 1000.0
+    late: List[float] = []
+    next_at = time.perf_counter() + period
+    end = time.perf_counter() + duration
+    while next_at < end:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        late.append((time.perf_counter() - next_at) * 1000.0)
+        next_at += period
+    conn.send(late)
+    conn.close()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure_jitter(profile: PriorityProfile, contention: int, duration: float,
+                   period_ms: float = 16.7) -> Dict[str, object]:
+    """
+    Run a frame pacer under profile while contention busy-loop processes
+    compete at default priority; return its wakeup lateness distribution.
+    """
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    stop_at = time.time() + duration + 2.0
+    burners = [ctx.Process(target=_burn, args=(stop_at,), daemon=True) for _ in range(contention)]
+    for burner in burners:
+        burner.start()
+    pacer = ctx.Process(target=_pacer, args=(period_ms, duration, child_conn), daemon=True)
+    pacer.start()
+    report = apply_profile(pacer.pid, profile, role="bench")
+    late = parent_conn.recv()
+    pacer.join()
+    for burner in burners:
+        burner.terminate()
+        burner.join()
+    if profile.cpu_weight is not None:
+        try:
+            (CGROUP_ROOT / CGROUP_GROUP / "bench").rmdir()
+        except OSError:
+            pass
+    return {
+        "applied": report,
+        "samples": len(late),
+        "p50_ms": _percentile(late, 50),
+        "p99_ms": _percentile(late, 99),
+        "max_ms": max(late) if late else 0.0,
+        "over_period": sum(1 for v in late if v > period_ms),
+    }
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM process priority profiles")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("presets", help="List presets")
+    apply_cmd = sub.add_parser("apply", help="Apply a preset to a running process")
+    apply_cmd.add_argument("preset", choices=sorted(PRESETS))
+    apply_cmd.add_argument("--pid", type=int, required=True)
+    apply_cmd.add_argument("--role", default="srs", help="cgroup name (srs, forwarder, bridge)")
+    bench = sub.add_parser("bench", help="Frame-pacing jitter under CPU contention, default vs preset")
+    bench.add_argument("--preset", default="low-latency", choices=sorted(PRESETS))
+    bench.add_argument("--contention", type=int, default=os.cpu_count() or 4,
+                       help="Busy-loop processes competing for CPU (default: one per CPU)")
+    bench.add_argument("--duration", type=float, default=10.0)
+    bench.add_argument("--period-ms", type=float, default=16.7, help="Pacer period (16.7 = 60 fps)")
+    args = parser.parse_args()
+
+    if args.cmd == "presets":
+        for name, profile in PRESETS.items():
+            print(f"  {name:12} {describe(profile)}")
+        return 0
+
+    if args.cmd == "apply":
+        for line in apply_profile(args.pid, PRESETS[args.preset], role=args.role):
+            print(f"  {line}")
+        return 0
+
+    print(f"Pacer every {args.period_ms} ms for {args.duration:.0f}s against {args.contention} busy processes")
+    print(f"{'profile':14} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'late>period':>12}")
+    results = {}
+    for name in ("default", args.preset):
+        result = measure_jitter(PRESETS[name], args.contention, args.duration, args.period_ms)
+        results[name] = result
+        print(f"{name:14} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} {result['max_ms']:8.2f} "
+              f"{result['over_period']:12d}")
+        for line in result["applied"]:
+            print(f"    {line}")
+    base, tuned = results["default"], results[args.preset]
+    if tuned["p99_ms"] > 0:
+        print(f"\np99 lateness {base['p99_ms'] / tuned['p99_ms']:.1f}x lower with {args.preset}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM RTMP Chunk Stream Tools
+================================
+Incremental RTMP chunk parsing and writing, shared by the in-process relay
+(rtmp_relay.py) and the bridge's re-chunking transform.
+
+The phone publishes with whatever chunk size its RTMP client picks, often
+the 128-byte default, so SRS parses a chunk header for every 128 bytes of
+video. Rechunker sits in the bridge's upstream pipe: it passes the
+handshake through, sends Set Chunk Size to SRS, then re-fragments each
+message at the larger size (client Set Chunk Size / Abort messages are
+consumed, since the bridge now owns the outbound chunking). SRS's
+acknowledgements count the re-chunked bytes, which publishers ignore.
+
+Usage:
+    python rtmp_chunking.py bench --srs-home .. --streams 4 --duration 20
+    python rtmp_chunking.py bench --srs-home .. --phone-chunk 128 --chunk-size 60000
+"""
+
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+MSG_SET_CHUNK_SIZE = 1
+MSG_ABORT = 2
+
+HANDSHAKE_SIZE = 1536
+DEFAULT_CHUNK_SIZE = 128
+DEFAULT_RECHUNK_SIZE = 60000
+MAX_CHUNK_SIZE = 65536  # SRS rejects larger
+PROTOCOL_CSID = 2
+
+
+class RTMPMessage(NamedTuple):
+    csid: int
+    type_id: int
+    timestamp: int
+    stream_id: int
+    payload: bytes
+
+
+class _InState:
+    __slots__ = ("timestamp", "delta", "length", "type_id", "stream_id", "extended", "payload")
+
+    def __init__(self):
+        self.timestamp = 0
+        self.delta = 0
+        self.length = 0
+        self.type_id = 0
+        self.stream_id = 0
+        self.extended = False
+        self.payload: Optional[bytearray] = None
+
+
+class ChunkParser:
+    """
+    Turns a received chunk stream (after the handshake) into messages.
+    Set Chunk Size and Abort are applied as soon as they complete, and are
+    returned like any other message.
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.chunks = 0
+        self._states: Dict[int, _InState] = {}
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[RTMPMessage]:
+        buf = self._buffer
+        buf += data
+        messages = []
+        pos = 0
+        end = len(buf)
+        while pos < end:
+            start = pos
+            first = buf[pos]
+            fmt, csid = first >> 6, first & 0x3F
+            pos += 1
+            if csid == 0:
+                if pos + 1 > end:
+                    pos = start
+                    break
+                csid = 64 + buf[pos]
+                pos += 1
+            elif csid == 1:
+                if pos + 2 > end:
+                    pos = start
+                    break
+                csid = 64 + buf[pos] + buf[pos + 1] * 256
+                pos += 2
+
+            state = self._states.get(csid)
+            if state is None:
+                if fmt != 0:
+                    raise ValueError(f"chunk stream {csid} starts with fmt {fmt}")
+                state = self._states[csid] = _InState()
+
+            header_size = (11, 7, 3, 0)[fmt]
+            if pos + header_size > end:
+                pos = start
+                break
+            if fmt <= 2:
+                ts = int.from_bytes(buf[pos:pos + 3], "big")
+                extended = ts == 0xFFFFFF
+            else:
+                ts, extended = 0, state.extended
+            if extended:
+                if pos + header_size + 4 > end:
+                    pos = start
+                    break
+                ext = struct.unpack_from(">I", buf, pos + header_size)[0]
+            new_message = fmt <= 2 or state.payload is None
+            length = int.from_bytes(buf[pos + 3:pos + 6], "big") if fmt <= 1 else state.length
+            have = len(state.payload) if not new_message else 0
+            need = min(self.chunk_size, length - have)
+            body = pos + header_size + (4 if extended else 0)
+            if body + need > end:
+                pos = start
+                break
+
+            # The whole chunk is buffered; commit it to the state
+            if fmt <= 1:
+                state.length = length
+                state.type_id = buf[pos + 6]
+            if fmt == 0:
+                state.stream_id = struct.unpack_from("<I", buf, pos + 7)[0]
+            if fmt <= 2:
+                state.extended = extended
+                value = ext if extended else ts
+                if fmt == 0:
+                    state.timestamp = value
+                    # Per spec a following fmt 3 message repeats this as its delta
+                    state.delta = value
+                else:
+                    state.delta = value
+                    state.timestamp = (state.timestamp + value) & 0xFFFFFFFF
+                state.payload = bytearray()
+            elif state.payload is None:
+                state.timestamp = (state.timestamp + state.delta) & 0xFFFFFFFF
+                state.payload = bytearray()
+
+            state.payload += buf[body:body + need]
+            pos = body + need
+            self.chunks += 1
+            if len(state.payload) >= state.length:
+                message = RTMPMessage(csid, state.type_id, state.timestamp, state.stream_id, bytes(state.payload))
+                state.payload = None
+                messages.append(message)
+                if message.type_id == MSG_SET_CHUNK_SIZE and len(message.payload) >= 4:
+                    self.chunk_size = struct.unpack(">I", message.payload[:4])[0] & 0x7FFFFFFF
+                elif message.type_id == MSG_ABORT and len(message.payload) >= 4:
+                    aborted = self._states.get(struct.unpack(">I", message.payload[:4])[0])
+                    if aborted:
+                        aborted.payload = None
+        del buf[:pos]
+        return messages
+
+
+class _OutState:
+    __slots__ = ("timestamp", "delta", "length", "type_id", "stream_id", "fmt")
+
+    def __init__(self, timestamp: int, delta: int, length: int, type_id: int, stream_id: int, fmt: int):
+        self.timestamp = timestamp
+        self.delta = delta
+        self.length = length
+        self.type_id = type_id
+        self.stream_id = stream_id
+        self.fmt = fmt
+
+
+class ChunkWriter:
+    """
+    Serialises messages at a fixed chunk size, compressing headers the
+    way RTMP allows (fmt 1/2/3 when stream, length/type or delta repeat).
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.chunks = 0
+        self._states: Dict[int, _OutState] = {}
+
+    @staticmethod
+    def _basic_header(fmt: int, csid: int) -> bytes:
+        if csid < 64:
+            return bytes([fmt << 6 | csid])
+        if csid < 320:
+            return bytes([fmt << 6, csid - 64])
+        return bytes([fmt << 6 | 1, (csid - 64) & 0xFF, (csid - 64) >> 8])
+
+    def set_chunk_size(self, chunk_size: int) -> bytes:
+        """The Set Chunk Size message for chunk_size; applies to what is written after it."""
+        out = self.write(PROTOCOL_CSID, MSG_SET_CHUNK_SIZE, 0, 0, struct.pack(">I", chunk_size))
+        self.chunk_size = chunk_size
+        return out
+
+    def write(self, csid: int, type_id: int, timestamp: int, stream_id: int, payload: bytes) -> bytes:
+        length = len(payload)
+        prev = self._states.get(csid)
+        delta = (timestamp - prev.timestamp) & 0xFFFFFFFF if prev else 0
+        if prev is None or prev.stream_id != stream_id or delta >= 0x80000000:
+            fmt, value = 0, timestamp
+        elif prev.length != length or prev.type_id != type_id:
+            fmt, value = 1, delta
+        elif prev.delta != delta or prev.fmt == 0:
+            # fmt 3 after fmt 0 is read inconsistently by servers; restate the delta
+            fmt, value = 2, delta
+        else:
+            fmt, value = 3, delta
+        extended = value >= 0xFFFFFF
+        if fmt == 3:
+            extended = prev.delta >= 0xFFFFFF
+
+        header = bytearray(self._basic_header(fmt, csid))
+        if fmt <= 2:
+            header += (0xFFFFFF if extended else value).to_bytes(3, "big")
+        if fmt <= 1:
+            header += length.to_bytes(3, "big") + bytes([type_id])
+        if fmt == 0:
+            header += struct.pack("<I", stream_id)
+        ext = struct.pack(">I", value) if extended else b""
+        header += ext
+
+        if fmt == 0:
+            self._states[csid] = _OutState(timestamp, timestamp, length, type_id, stream_id, 0)
+        else:
+            prev.timestamp, prev.delta, prev.length, prev.type_id, prev.fmt = timestamp, delta, length, type_id, fmt
+
+        size = self.chunk_size
+        if length <= size:
+            self.chunks += 1
+            return bytes(header) + payload
+        continuation = self._basic_header(3, csid) + ext
+        parts = [bytes(header), payload[:size]]
+        for pos in range(size, length, size):
+            parts.append(continuation)
+            parts.append(payload[pos:pos + size])
+        self.chunks += (length + size - 1) // size
+        return b"".join(parts)
+
+
+class Rechunker:
+    """
+    Upstream (phone -> SRS) transform for the bridge. feed() takes raw bytes
+    from the phone and returns the bytes to send to SRS.
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_RECHUNK_SIZE):
+        if not DEFAULT_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"chunk size must be {DEFAULT_CHUNK_SIZE}..{MAX_CHUNK_SIZE}")
+        self.out_chunk_size = chunk_size
+        self.parser = ChunkParser()
+        self.writer = ChunkWriter()
+        self.messages = 0
+        self._handshake_left = 1 + 2 * HANDSHAKE_SIZE  # C0 + C1 + C2
+
+    @property
+    def chunks_in(self) -> int:
+        return self.parser.chunks
+
+    @property
+    def chunks_out(self) -> int:
+        return self.writer.chunks
+
+    def feed(self, data: bytes) -> bytes:
+        out = []
+        if self._handshake_left:
+            passthrough = data[:self._handshake_left]
+            data = data[len(passthrough):]
+            self._handshake_left -= len(passthrough)
+            out.append(passthrough)
+            if self._handshake_left:
+                return passthrough
+            out.append(self.writer.set_chunk_size(self.out_chunk_size))
+        if data:
+            write = self.writer.write
+            for message in self.parser.feed(data):
+                if message.type_id in (MSG_SET_CHUNK_SIZE, MSG_ABORT):
+                    continue
+                self.messages += 1
+                out.append(write(*message))
+        return b"".join(out)
+
+    def stats(self) -> dict:
+        return {"chunk_size": self.out_chunk_size, "messages": self.messages,
+                "chunks_in": self.chunks_in, "chunks_out": self.chunks_out,
+                "in_chunk_size": self.parser.chunk_size}
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+class _BenchProxy:
+    """
+    publisher -> [re-chunk to phone_chunk] -> [optional Rechunker] -> SRS.
+    The first stage makes ffmpeg look like a phone using small chunks.
+    """
+
+    def __init__(self, srs_port: int, phone_chunk: int, chunk_size: Optional[int]):
+        self.srs_port = srs_port
+        self.phone_chunk = phone_chunk
+        self.chunk_size = chunk_size
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+        self.transforms: List[Rechunker] = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(("127.0.0.1", self.srs_port))
+            stages = [Rechunker(self.phone_chunk)]
+            if self.chunk_size:
+                stages.append(Rechunker(self.chunk_size))
+                self.transforms.append(stages[-1])
+            threading.Thread(target=self._pipe, args=(client, upstream, stages), daemon=True).start()
+            threading.Thread(target=self._pipe, args=(upstream, client, []), daemon=True).start()
+
+    @staticmethod
+    def _pipe(src: socket.socket, dst: socket.socket, stages: List[Rechunker]):
+        try:
+            while True:
+                data = src.recv(16384)
+                if not data:
+                    break
+                for stage in stages:
+                    data = stage.feed(data)
+                dst.sendall(data)
+        except Exception:
+            pass
+        finally:
+            for sock in (src, dst):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def close(self):
+        self.server.close()
+
+
+def bench(srs_home, streams: int, duration: float, phone_chunk: int, chunk_size: int,
+          settle: float = 3.0) -> List[dict]:
+    from media_server_bench import ProcessSampler
+    from synthetic_publisher import SyntheticPublisher
+    from usb_tethering_monitor import SRSServerManager
+
+    results = []
+    for label, size in (("phone chunks", None), (f"re-chunked to {chunk_size}", chunk_size)):
+        manager = SRSServerManager(srs_home, log_forward_rate=0)
+        proxy = None
+        publishers = []
+        try:
+            if not manager.start(config_path=manager.render_runtime_config(manager.get_usb_config(),
+                                                                           bind_ip="0.0.0.0")) \
+                    or not manager.wait_until_ready():
+                raise RuntimeError("SRS did not start")
+            proxy = _BenchProxy(manager.endpoints.rtmp_port, phone_chunk, size)
+            for index in range(streams):
+                publisher = SyntheticPublisher(f"rtmp://127.0.0.1:{proxy.port}/live/chunk{index}")
+                if not publisher.start():
+                    raise RuntimeError("synthetic publisher did not start")
+                publishers.append(publisher)
+            time.sleep(settle)
+            sampler = ProcessSampler(manager.process.pid)
+            sampler.start()
+            time.sleep(duration)
+            sampler.stop()
+            cpu = sum(sampler.cpu_samples) / len(sampler.cpu_samples) if sampler.cpu_samples else None
+            result = {"mode": label, "streams": streams, "srs_cpu_pct": cpu,
+                      "cpu_per_stream": cpu / streams if cpu is not None else None}
+            if proxy.transforms:
+                chunks_in = sum(t.chunks_in for t in proxy.transforms)
+                result["chunks_in"] = chunks_in
+                result["chunks_out"] = sum(t.chunks_out for t in proxy.transforms)
+            results.append(result)
+        except Exception as e:
+            results.append({"mode": label, "streams": streams, "error": str(e)})
+        finally:
+            for publisher in publishers:
+                publisher.stop()
+            if proxy:
+                proxy.close()
+            manager.stop()
+    return results
+
+
+def main() -> int:
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="iOS VCAM RTMP re-chunking benchmark")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("bench", help="SRS CPU per stream with phone-sized vs re-chunked input")
+    b.add_argument("--srs-home", type=Path, default=Path(__file__).resolve().parent.parent)
+    b.add_argument("--streams", type=int, default=4)
+    b.add_argument("--duration", type=float, default=20.0)
+    b.add_argument("--phone-chunk", type=int, default=DEFAULT_CHUNK_SIZE,
+                   help="Chunk size the emulated phone publishes with (default: 128)")
+    b.add_argument("--chunk-size", type=int, default=DEFAULT_RECHUNK_SIZE)
+    args = parser.parse_args()
+
+    results = bench(args.srs_home, args.streams, args.duration, args.phone_chunk, args.chunk_size)
+    for r in results:
+        if "error" in r:
+            print(f"  {r['mode']:<28} ERROR: {r['error']}")
+            continue
+        cpu = f"{r['srs_cpu_pct']:.1f}%" if r["srs_cpu_pct"] is not None else "-"
+        per = f"{r['cpu_per_stream']:.2f}%" if r["cpu_per_stream"] is not None else "-"
+        chunks = f"  chunks {r['chunks_in']} -> {r['chunks_out']}" if "chunks_in" in r else ""
+        print(f"  {r['mode']:<28} SRS CPU {cpu:>7} total, {per:>7} per stream{chunks}")
+    return 0 if all("error" not in r for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM In-Process RTMP -> HTTP-FLV Relay
+==========================================
+A minimal RTMP ingest plus HTTP-FLV egress for the one-phone, one-viewer
+case, so the bridge can skip SRS: no extra process hop, no queue_length /
+mw_latency buffering and no HLS work.
+
+Only what a publisher needs is implemented: simple handshake, chunk
+stream parsing (rtmp_chunking.py), connect / createStream / publish, and audio, video and
+metadata messages. Each message becomes one FLV tag, written straight to
+every viewer's socket from the ingest loop.
+
+Buffering is GOP-aware and as shallow as possible:
+  - metadata and the AVC/AAC sequence headers are kept for new viewers
+  - a new viewer starts at the next keyframe (start="keyframe"), or at the
+    cached current GOP (start="gop") for faster but later first frames
+  - a viewer whose socket stops draining beyond max_buffer_bytes has its
+    backlog left to flush and skips ahead to the next keyframe instead of
+    falling further behind
+
+Usage:
+    python rtmp_relay.py --rtmp-port 19360 --http-port 8090
+    ffmpeg -re -i in.mp4 -c copy -f flv rtmp://127.0.0.1:19360/live/srs
+    ffplay http://127.0.0.1:8090/live/srs.flv
+"""
+
+import asyncio
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from rtmp_chunking import HANDSHAKE_SIZE, PROTOCOL_CSID, ChunkParser, ChunkWriter
+
+DEFAULT_RELAY_RTMP_PORT = 19360
+DEFAULT_RELAY_HTTP_PORT = 8090
+DEFAULT_MAX_BUFFER_BYTES = 256 * 1024
+# Fixed kernel send buffer for viewers, so a backlog shows up in the
+# transport (where it can be skipped) instead of in autotuned socket memory
+VIEWER_SNDBUF = 128 * 1024
+OUT_CHUNK_SIZE = 4096
+WINDOW_ACK_SIZE = 2500000
+
+MSG_ACK = 3
+MSG_WINDOW_ACK_SIZE = 5
+MSG_SET_PEER_BANDWIDTH = 6
+MSG_AUDIO = 8
+MSG_VIDEO = 9
+MSG_DATA_AMF0 = 18
+MSG_COMMAND_AMF0 = 20
+
+FLV_HEADER = b"FLV\x01\x05\x00\x00\x00\x09\x00\x00\x00\x00"
+
+
+# =============================================================================
+# AMF0
+# =============================================================================
+
+class _Undefined:
+    pass
+
+
+UNDEFINED = _Undefined()
+
+
+def amf0_decode(data: bytes) -> List[object]:
+    """Decode a sequence of AMF0 values (what command/data messages carry)."""
+    values = []
+    pos = 0
+    while pos < len(data):
+        value, pos = _amf0_value(data, pos)
+        values.append(value)
+    return values
+
+
+def _amf0_value(data: bytes, pos: int) -> Tuple[object, int]:
+    marker = data[pos]
+    pos += 1
+    if marker == 0x00:
+        return struct.unpack_from(">d", data, pos)[0], pos + 8
+    if marker == 0x01:
+        return data[pos] != 0, pos + 1
+    if marker == 0x02:
+        length = struct.unpack_from(">H", data, pos)[0]
+        return data[pos + 2:pos + 2 + length].decode("utf-8", "replace"), pos + 2 + length
+    if marker == 0x0C:
+        length = struct.unpack_from(">I", data, pos)[0]
+        return data[pos + 4:pos + 4 + length].decode("utf-8", "replace"), pos + 4 + length
+    if marker in (0x03, 0x08):
+        if marker == 0x08:
+            pos += 4  # ECMA array count, unreliable; the end marker terminates
+        obj = {}
+        while pos + 3 <= len(data):
+            length = struct.unpack_from(">H", data, pos)[0]
+            if length == 0 and data[pos + 2] == 0x09:
+                return obj, pos + 3
+            key = data[pos + 2:pos + 2 + length].decode("utf-8", "replace")
+            obj[key], pos = _amf0_value(data, pos + 2 + length)
+        return obj, len(data)
+    if marker == 0x0A:
+        count = struct.unpack_from(">I", data, pos)[0]
+        pos += 4
+        items = []
+        for _ in range(count):
+            item, pos = _amf0_value(data, pos)
+            items.append(item)
+        return items, pos
+    if marker == 0x05:
+        return None, pos
+    if marker == 0x06:
+        return UNDEFINED, pos
+    raise ValueError(f"unsupported AMF0 marker 0x{marker:02x}")
+
+
+def amf0_encode(*values: object) -> bytes:
+    out = bytearray()
+    for value in values:
+        if value is None:
+            out += b"\x05"
+        elif value is UNDEFINED:
+            out += b"\x06"
+        elif isinstance(value, bool):
+            out += b"\x01" + (b"\x01" if value else b"\x00")
+        elif isinstance(value, (int, float)):
+            out += b"\x00" + struct.pack(">d", float(value))
+        elif isinstance(value, str):
+            raw = value.encode("utf-8")
+            out += b"\x02" + struct.pack(">H", len(raw)) + raw
+        elif isinstance(value, dict):
+            out += b"\x03"
+            for key, item in value.items():
+                raw = key.encode("utf-8")
+                out += struct.pack(">H", len(raw)) + raw + amf0_encode(item)
+            out += b"\x00\x00\x09"
+        else:
+            raise TypeError(f"cannot AMF0-encode {type(value).__name__}")
+    return bytes(out)
+
+
+# =============================================================================
+# FLV
+# =============================================================================
+
+def flv_tag(tag_type: int, timestamp: int, payload: bytes) -> bytes:
+    timestamp &= 0xFFFFFFFF
+    header = (bytes([tag_type]) + len(payload).to_bytes(3, "big") + (timestamp & 0xFFFFFF).to_bytes(3, "big")
+              + bytes([timestamp >> 24]) + b"\x00\x00\x00")
+    return header + payload + struct.pack(">I", 11 + len(payload))
+
+
+def is_keyframe(payload: bytes) -> bool:
+    return len(payload) > 0 and payload[0] >> 4 == 1
+
+
+def is_sequence_header(tag_type: int, payload: bytes) -> bool:
+    """AVC decoder config (codec 7, packet type 0) or AAC AudioSpecificConfig."""
+    if len(payload) < 2:
+        return False
+    if tag_type == MSG_VIDEO:
+        return payload[0] & 0x0F == 7 and payload[1] == 0
+    return payload[0] >> 4 == 10 and payload[1] == 0
+
+
+# =============================================================================
+# RELAY STATE
+# =============================================================================
+
+class FLVViewer:
+    """One HTTP-FLV connection; written to directly by the ingest loop."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.waiting_keyframe = True
+        self.base: Optional[int] = None
+        self.offset = 0
+        self.last_ts = 0
+        self.bytes_sent = 0
+        self.skips = 0
+        self.connected_at = time.time()
+
+    def write_tag(self, tag_type: int, timestamp: int, payload: bytes, control: bool = False) -> None:
+        """Timestamps are rebased so each viewer starts at 0 on its first frame."""
+        if self.base is None and not control:
+            self.base = timestamp
+        if self.base is not None:
+            self.last_ts = max(0, timestamp - self.base) + self.offset
+        data = flv_tag(tag_type, self.last_ts, payload)
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+    def buffered(self) -> int:
+        transport = self.writer.transport
+        return transport.get_write_buffer_size() if transport else 0
+
+
+class RelayStream:
+    """Publisher state plus viewers of one app/stream."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.publishing = False
+        self.metadata: Optional[bytes] = None
+        self.video_header: Optional[bytes] = None
+        self.audio_header: Optional[bytes] = None
+        # (type, timestamp, payload) since the last keyframe, for start="gop"
+        self.gop: List[Tuple[int, int, bytes]] = []
+        self.viewers: Set[FLVViewer] = set()
+        self.frames = 0
+        self.keyframes = 0
+        self.publish_since: Optional[float] = None
+
+    def begin_publish(self) -> None:
+        self.publishing = True
+        self.publish_since = time.time()
+        self.metadata = self.video_header = self.audio_header = None
+        self.gop = []
+        for viewer in self.viewers:
+            # Timestamps restart with a new publish; keep each viewer's monotonic
+            viewer.offset = viewer.last_ts + 1
+            viewer.base = None
+            viewer.waiting_keyframe = True
+
+    def end_publish(self) -> None:
+        self.publishing = False
+        self.publish_since = None
+
+
+class RTMPRelay:
+    """
+    RTMP ingest and HTTP-FLV egress on one asyncio loop in a background
+    thread. Publishers arrive on the optional RTMP port or as sockets handed
+    over by connect() (the USBMux bridge); viewers on the HTTP port.
+    """
+
+    def __init__(self, http_host: str = "127.0.0.1", http_port: int = DEFAULT_RELAY_HTTP_PORT,
+                 rtmp_host: str = "127.0.0.1", rtmp_port: Optional[int] = None,
+                 start: str = "keyframe", max_buffer_bytes: int = DEFAULT_MAX_BUFFER_BYTES):
+        if start not in ("keyframe", "gop"):
+            raise ValueError("start must be 'keyframe' or 'gop'")
+        self.http_host = http_host
+        self.http_port = http_port
+        self.rtmp_host = rtmp_host
+        self.rtmp_port = rtmp_port
+        self.start_mode = start
+        self.max_buffer_bytes = max_buffer_bytes
+        self.streams: Dict[str, RelayStream] = {}
+        self.bytes_in = 0
+        self.publish_sessions = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._servers: list = []
+        self._attached: Set[asyncio.Task] = set()
+        self._sessions: Set["_RTMPSession"] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    # ---- lifecycle -------------------------------------------------------
+
+    def start(self, timeout: float = 5.0) -> bool:
+        self._thread = threading.Thread(target=self._run_loop, name="rtmp-relay", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        if self._error:
+            print(f"WARNING: RTMP relay not started: {self._error}")
+            return False
+        return self._ready.is_set()
+
+    def stop(self) -> None:
+        loop, self.loop = self.loop, None
+        if loop and loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    async def _shutdown(self) -> None:
+        for server in self._servers:
+            server.close()
+        # Closing the transports lets every handler run to its end
+        for session in list(self._sessions):
+            session.writer.close()
+        for stream in self.streams.values():
+            for viewer in list(stream.viewers):
+                viewer.writer.close()
+        await asyncio.sleep(0.1)
+        asyncio.get_running_loop().stop()
+
+    def _run_loop(self) -> None:
+        loop = self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._start_servers())
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def _start_servers(self) -> None:
+        self._servers.append(await asyncio.start_server(self._handle_http, self.http_host, self.http_port))
+        if self.rtmp_port:
+            self._servers.append(await asyncio.start_server(self._handle_rtmp, self.rtmp_host, self.rtmp_port))
+
+    def connect(self) -> socket.socket:
+        """
+        A connected socket whose other end is an RTMP session of this relay;
+        lets the bridge hand over the phone's stream without a TCP hop.
+        """
+        if not self.loop:
+            raise RuntimeError("relay not started")
+        ours, theirs = socket.socketpair()
+        theirs.setblocking(False)
+
+        async def attach():
+            reader, writer = await asyncio.open_connection(sock=theirs)
+            await self._handle_rtmp(reader, writer)
+
+        def spawn():
+            # The loop only holds tasks weakly; keep handed-over sessions alive
+            task = self.loop.create_task(attach())
+            self._attached.add(task)
+            task.add_done_callback(self._attached.discard)
+
+        self.loop.call_soon_threadsafe(spawn)
+        return ours
+
+    def flv_url(self, stream: str = "srs", app: str = "live") -> str:
+        return f"http://{self.http_host}:{self.http_port}/{app}/{stream}.flv"
+
+    def status(self) -> dict:
+        return {
+            "flv": f"http://{self.http_host}:{self.http_port}/",
+            "rtmp_port": self.rtmp_port,
+            "start": self.start_mode,
+            "bytes_in": self.bytes_in,
+            "publish_sessions": self.publish_sessions,
+            "streams": {
+                key: {
+                    "publishing": s.publishing,
+                    "frames": s.frames,
+                    "keyframes": s.keyframes,
+                    "viewers": [{"bytes": v.bytes_sent, "buffered": v.buffered(), "skips": v.skips}
+                                for v in list(s.viewers)],
+                }
+                for key, s in list(self.streams.items())
+            },
+        }
+
+    def _stream(self, key: str) -> RelayStream:
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = RelayStream(key)
+        return stream
+
+    # ---- egress ----------------------------------------------------------
+
+    def _dispatch(self, stream: RelayStream, tag_type: int, timestamp: int, payload: bytes) -> None:
+        """Fan one message out to every viewer; never waits on a slow one."""
+        if tag_type == MSG_DATA_AMF0:
+            stream.metadata = payload
+        elif is_sequence_header(tag_type, payload):
+            if tag_type == MSG_VIDEO:
+                stream.video_header = payload
+            else:
+                stream.audio_header = payload
+        elif tag_type == MSG_VIDEO and is_keyframe(payload):
+            stream.keyframes += 1
+            stream.gop = [(tag_type, timestamp, payload)]
+        elif stream.gop:
+            stream.gop.append((tag_type, timestamp, payload))
+        stream.frames += tag_type != MSG_DATA_AMF0
+
+        keyframe = tag_type == MSG_VIDEO and is_keyframe(payload)
+        control = tag_type == MSG_DATA_AMF0 or is_sequence_header(tag_type, payload)
+        for viewer in list(stream.viewers):
+            if viewer.writer.is_closing():
+                stream.viewers.discard(viewer)
+                continue
+            if not control and viewer.buffered() > self.max_buffer_bytes:
+                # Behind: let the socket drain and resume on a keyframe
+                if not viewer.waiting_keyframe:
+                    viewer.waiting_keyframe = True
+                    viewer.skips += 1
+                continue
+            if viewer.waiting_keyframe and not control:
+                if not keyframe:
+                    continue
+                viewer.waiting_keyframe = False
+            viewer.write_tag(tag_type, timestamp, payload, control)
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, VIEWER_SNDBUF)
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            writer.close()
+            return
+        parts = head.split(b"\r\n", 1)[0].decode("latin-1").split()
+        path = parts[1].split("?", 1)[0] if len(parts) >= 2 else ""
+
+        if path == "/status":
+            body = json.dumps(self.status()).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                         b"Content-Length: %d\r\n\r\n" % len(body) + body)
+            await writer.drain()
+            writer.close()
+            return
+        if parts[:1] != ["GET"] or not path.endswith(".flv") or path.count("/") != 2:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            writer.close()
+            return
+
+        stream = self._stream(path[1:-4])
+        viewer = FLVViewer(writer)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: video/x-flv\r\nConnection: close\r\n"
+                     b"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n\r\n" + FLV_HEADER)
+        for tag_type, payload in ((MSG_DATA_AMF0, stream.metadata), (MSG_VIDEO, stream.video_header),
+                                  (MSG_AUDIO, stream.audio_header)):
+            if payload is not None:
+                viewer.write_tag(tag_type, 0, payload, control=True)
+        if self.start_mode == "gop" and stream.gop:
+            for tag_type, timestamp, payload in stream.gop:
+                viewer.write_tag(tag_type, timestamp, payload)
+            viewer.waiting_keyframe = False
+        stream.viewers.add(viewer)
+        try:
+            # Viewers send nothing; EOF means they went away
+            while await reader.read(4096):
+                pass
+        except OSError:
+            pass
+        finally:
+            stream.viewers.discard(viewer)
+            writer.close()
+
+    # ---- ingest ----------------------------------------------------------
+
+    async def _handle_rtmp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = _RTMPSession(self, reader, writer)
+        self._sessions.add(session)
+        try:
+            await session.run()
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self._sessions.discard(session)
+            session.close()
+
+
+class _RTMPSession:
+    """Server side of one publishing connection."""
+
+    def __init__(self, relay: RTMPRelay, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.relay = relay
+        self.reader = reader
+        self.writer = writer
+        self.parser = ChunkParser()
+        self.chunk_writer = ChunkWriter()
+        self.ack_window = 0
+        self.received = 0
+        self.acked = 0
+        self.app = "live"
+        self.stream: Optional[RelayStream] = None
+
+    async def run(self) -> None:
+        sock = self.writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        await self._handshake()
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                return
+            self.received += len(data)
+            self.relay.bytes_in += len(data)
+            for message in self.parser.feed(data):
+                self._on_message(message.type_id, message.timestamp, message.stream_id, message.payload)
+            if self.ack_window and self.received - self.acked >= self.ack_window:
+                self.acked = self.received
+                self._send(PROTOCOL_CSID, MSG_ACK, 0, struct.pack(">I", self.received & 0xFFFFFFFF))
+
+    async def _handshake(self) -> None:
+        # Simple (non-digest) handshake: publishers do not verify S1
+        c0c1 = await self.reader.readexactly(1 + HANDSHAKE_SIZE)
+        if c0c1[0] != 3:
+            raise ValueError(f"unsupported RTMP version {c0c1[0]}")
+        s1 = struct.pack(">II", 0, 0) + os.urandom(HANDSHAKE_SIZE - 8)
+        self.writer.write(b"\x03" + s1 + c0c1[1:])
+        await self.writer.drain()
+        await self.reader.readexactly(HANDSHAKE_SIZE)
+        self.received += 1 + 2 * HANDSHAKE_SIZE
+
+    def _on_message(self, type_id: int, timestamp: int, stream_id: int, payload: bytes) -> None:
+        # Set Chunk Size and Abort are applied by the parser
+        if type_id == MSG_WINDOW_ACK_SIZE:
+            self.ack_window = struct.unpack(">I", payload[:4])[0]
+        elif type_id == MSG_COMMAND_AMF0:
+            self._on_command(amf0_decode(payload), stream_id)
+        elif type_id in (MSG_AUDIO, MSG_VIDEO, MSG_DATA_AMF0) and self.stream and self.stream.publishing:
+            if type_id == MSG_DATA_AMF0:
+                payload = self._metadata(payload)
+                if payload is None:
+                    return
+            self.relay._dispatch(self.stream, type_id, timestamp, payload)
+
+    @staticmethod
+    def _metadata(payload: bytes) -> Optional[bytes]:
+        """onMetaData as an FLV script tag: drop the @setDataFrame wrapper."""
+        prefix = amf0_encode("@setDataFrame")
+        if payload.startswith(prefix):
+            payload = payload[len(prefix):]
+        return payload if payload.startswith(amf0_encode("onMetaData")) else None
+
+    def _on_command(self, values: List[object], stream_id: int) -> None:
+        if not values:
+            return
+        name, txn = values[0], values[1] if len(values) > 1 else 0
+        if name == "connect":
+            props = values[2] if len(values) > 2 and isinstance(values[2], dict) else {}
+            self.app = str(props.get("app") or "live").strip("/")
+            self._send(PROTOCOL_CSID, MSG_WINDOW_ACK_SIZE, 0, struct.pack(">I", WINDOW_ACK_SIZE))
+            self._send(PROTOCOL_CSID, MSG_SET_PEER_BANDWIDTH, 0, struct.pack(">IB", WINDOW_ACK_SIZE, 2))
+            self.writer.write(self.chunk_writer.set_chunk_size(OUT_CHUNK_SIZE))
+            self._command(0, "_result", txn, {"fmsVer": "FMS/3,0,1,123", "capabilities": 31},
+                          {"level": "status", "code": "NetConnection.Connect.Success",
+                           "description": "Connection succeeded.", "objectEncoding": 0})
+        elif name in ("releaseStream", "FCPublish"):
+            self._command(0, "_result", txn, None, UNDEFINED)
+        elif name == "createStream":
+            self._command(0, "_result", txn, None, 1)
+        elif name == "publish":
+            stream_name = str(values[3] if len(values) > 3 else "").split("?", 1)[0]
+            self.stream = self.relay._stream(f"{self.app}/{stream_name}")
+            self.stream.begin_publish()
+            self.relay.publish_sessions += 1
+            self._command(stream_id, "onStatus", 0, None,
+                          {"level": "status", "code": "NetStream.Publish.Start",
+                           "description": f"{stream_name} is now published."})
+        elif name in ("FCUnpublish", "deleteStream", "closeStream") and self.stream:
+            self.stream.end_publish()
+
+    def _command(self, stream_id: int, *values: object) -> None:
+        self._send(3, MSG_COMMAND_AMF0, stream_id, amf0_encode(*values))
+
+    def _send(self, csid: int, type_id: int, stream_id: int, payload: bytes) -> None:
+        self.writer.write(self.chunk_writer.write(csid, type_id, 0, stream_id, payload))
+
+    def close(self) -> None:
+        if self.stream and self.stream.publishing:
+            self.stream.end_publish()
+        self.writer.close()
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM in-process RTMP -> HTTP-FLV relay")
+    parser.add_argument("--rtmp-host", default="127.0.0.1")
+    parser.add_argument("--rtmp-port", type=int, default=DEFAULT_RELAY_RTMP_PORT)
+    parser.add_argument("--http-host", default="127.0.0.1")
+    parser.add_argument("--http-port", type=int, default=DEFAULT_RELAY_HTTP_PORT)
+    parser.add_argument("--start", choices=("keyframe", "gop"), default="keyframe",
+                        help="New viewers wait for the next keyframe, or get the cached GOP (default: keyframe)")
+    parser.add_argument("--max-buffer-kb", type=int, default=DEFAULT_MAX_BUFFER_BYTES // 1024,
+                        help="Per-viewer send backlog before skipping to the next keyframe")
+    args = parser.parse_args()
+
+    relay = RTMPRelay(http_host=args.http_host, http_port=args.http_port, rtmp_host=args.rtmp_host,
+                      rtmp_port=args.rtmp_port, start=args.start, max_buffer_bytes=args.max_buffer_kb * 1024)
+    if not relay.start():
+        return 1
+    print(f"RTMP ingest: rtmp://{args.rtmp_host}:{args.rtmp_port}/live/<stream>")
+    print(f"HTTP-FLV:    {relay.flv_url('<stream>')}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        relay.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM SRS Config Tools
+=========================
+Parses SRS .conf files into a directive tree so runtime copies can be
+rendered with different listen ports, pid files and addresses without
+hand-editing the profiles in config/active/.
+
+Also compiles a config from a target latency budget, and scores existing
+profiles with a static estimate of the latency their buffers add.
+
+Usage:
+    python srs_config.py show config/active/srs_iphone_ultra_smooth_dynamic.conf
+    python srs_config.py score
+    python srs_config.py compile --budget-ms 500 --bind-ip auto -o objs/runtime/srs_500ms.conf
+"""
+
+import glob
+import ipaddress
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# =============================================================================
+# DIRECTIVE TREE
+# =============================================================================
+
+@dataclass
+class Directive:
+    """One SRS directive; blocks (vhost, play, hls...) carry children."""
+    name: str
+    args: List[str] = field(default_factory=list)
+    children: Optional[List["Directive"]] = None
+
+    @property
+    def value(self) -> Optional[str]:
+        return self.args[0] if self.args else None
+
+    def is_block(self) -> bool:
+        return self.children is not None
+
+
+class SRSConfigError(ValueError):
+    """Raised for malformed or invalid SRS configuration."""
+
+
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[{};]|[^\s{};]+')
+
+
+def _tokenize(text: str) -> List[str]:
+    tokens = []
+    for line in text.splitlines():
+        # Strip comments that are not inside quotes
+        out = []
+        quote = None
+        for ch in line:
+            if quote:
+                if ch == quote:
+                    quote = None
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "#":
+                break
+            out.append(ch)
+        tokens.extend(_TOKEN_RE.findall("".join(out)))
+    return tokens
+
+
+class SRSConfig:
+    """
+    In-memory SRS configuration.
+
+    Directives are addressed with slash paths, e.g. "http_api/listen" or
+    "vhost/play/queue_length"; block names match the first block of that name
+    (SRS profiles here only ever define __defaultVhost__).
+    """
+
+    def __init__(self, directives: Optional[List[Directive]] = None):
+        self.directives: List[Directive] = directives or []
+
+    # -------------------------------------------------------------------------
+    # Parsing / rendering
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def parse(cls, text: str) -> "SRSConfig":
+        tokens = _tokenize(text)
+        pos = 0
+
+        def parse_block(depth: int) -> List[Directive]:
+            nonlocal pos
+            items: List[Directive] = []
+            words: List[str] = []
+            while pos < len(tokens):
+                tok = tokens[pos]
+                pos += 1
+                if tok == ";":
+                    if not words:
+                        continue
+                    items.append(Directive(words[0], words[1:]))
+                    words = []
+                elif tok == "{":
+                    if not words:
+                        raise SRSConfigError("Block without a directive name")
+                    children = parse_block(depth + 1)
+                    items.append(Directive(words[0], words[1:], children))
+                    words = []
+                elif tok == "}":
+                    if depth == 0:
+                        raise SRSConfigError("Unbalanced '}'")
+                    if words:
+                        raise SRSConfigError(f"Missing ';' after '{' '.join(words)}'")
+                    return items
+                else:
+                    words.append(tok)
+            if depth != 0:
+                raise SRSConfigError("Unexpected end of config (missing '}')")
+            if words:
+                raise SRSConfigError(f"Missing ';' after '{' '.join(words)}'")
+            return items
+
+        return cls(parse_block(0))
+
+    @classmethod
+    def load(cls, path: Path) -> "SRSConfig":
+        return cls.parse(Path(path).read_text(encoding="utf-8-sig"))
+
+    def render(self, header: Optional[str] = None) -> str:
+        lines: List[str] = []
+        if header:
+            lines.extend(f"# {h}" if h else "#" for h in header.splitlines())
+            lines.append("")
+
+        def emit(items: List[Directive], indent: int):
+            pad = "    " * indent
+            for d in items:
+                if d.is_block():
+                    head = " ".join([d.name] + d.args)
+                    lines.append(f"{pad}{head} {{")
+                    emit(d.children, indent + 1)
+                    lines.append(f"{pad}}}")
+                else:
+                    head = " ".join([d.name.ljust(16)] + d.args) if d.args else d.name
+                    lines.append(f"{pad}{head};")
+
+        emit(self.directives, 0)
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: Path, header: Optional[str] = None) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.render(header), encoding="utf-8")
+        return path
+
+    # -------------------------------------------------------------------------
+    # Access
+    # -------------------------------------------------------------------------
+
+    def _container(self, parts: List[str], create: bool) -> Optional[List[Directive]]:
+        items = self.directives
+        for part in parts:
+            block = next((d for d in items if d.name == part and d.is_block()), None)
+            if block is None:
+                if not create:
+                    return None
+                block = Directive(part, ["__defaultVhost__"] if part == "vhost" else [], [])
+                items.append(block)
+            items = block.children
+        return items
+
+    def find(self, path: str) -> Optional[Directive]:
+        parts = path.strip("/").split("/")
+        items = self._container(parts[:-1], create=False)
+        if items is None:
+            return None
+        return next((d for d in items if d.name == parts[-1]), None)
+
+    def get(self, path: str, default: Optional[str] = None) -> Optional[str]:
+        d = self.find(path)
+        return d.value if d and d.args else default
+
+    def get_int(self, path: str, default: Optional[int] = None) -> Optional[int]:
+        v = self.get(path)
+        try:
+            return int(v) if v is not None else default
+        except ValueError:
+            raise SRSConfigError(f"{path} must be an integer, got '{v}'")
+
+    def get_bool(self, path: str, default: bool = False) -> bool:
+        v = self.get(path)
+        if v is None:
+            return default
+        return v.lower() in ("on", "true", "yes", "1")
+
+    def set(self, path: str, *args) -> Directive:
+        """Set (or create) a simple directive; blocks on the path are created as needed."""
+        parts = path.strip("/").split("/")
+        items = self._container(parts[:-1], create=True)
+        d = next((d for d in items if d.name == parts[-1]), None)
+        if d is None:
+            d = Directive(parts[-1])
+            items.append(d)
+        d.args = [str(a) for a in args]
+        return d
+
+    def remove(self, path: str) -> bool:
+        parts = path.strip("/").split("/")
+        items = self._container(parts[:-1], create=False)
+        if items is None:
+            return False
+        for i, d in enumerate(items):
+            if d.name == parts[-1]:
+                del items[i]
+                return True
+        return False
+
+
+# =============================================================================
+# LISTEN ENDPOINTS
+# =============================================================================
+
+LISTEN_PATHS = {
+    "rtmp": "listen",
+    "api": "http_api/listen",
+    "http": "http_server/listen",
+}
+
+
+def split_listen(value: str) -> Tuple[Optional[str], int]:
+    """'1935' -> (None, 1935); '192.168.50.9:1935' -> ('192.168.50.9', 1935)."""
+    host, sep, port = value.rpartition(":")
+    try:
+        return (host if sep else None), int(port)
+    except ValueError:
+        raise SRSConfigError(f"Invalid listen value '{value}'")
+
+
+def get_endpoints(config: SRSConfig) -> dict:
+    """Return {'rtmp': (host, port), 'api': ..., 'http': ...} for the listeners present."""
+    result = {}
+    for key, path in LISTEN_PATHS.items():
+        value = config.get(path)
+        if value is not None:
+            result[key] = split_listen(value)
+    return result
+
+
+def set_endpoints(config: SRSConfig, rtmp_port: Optional[int] = None, api_port: Optional[int] = None,
+                  http_port: Optional[int] = None, bind_ip: Optional[str] = None) -> SRSConfig:
+    """
+    Rewrite the listen directives. Ports left as None keep their current
+    value; bind_ip of None keeps the current address, "0.0.0.0" drops it.
+    """
+    ports = {"rtmp": rtmp_port, "api": api_port, "http": http_port}
+    current = get_endpoints(config)
+    for key, path in LISTEN_PATHS.items():
+        if key not in current and ports[key] is None:
+            continue
+        host, port = current.get(key, (None, None))
+        port = ports[key] if ports[key] is not None else port
+        if bind_ip is not None:
+            host = None if bind_ip == "0.0.0.0" else bind_ip
+        config.set(path, f"{host}:{port}" if host else port)
+    return config
+
+
+# =============================================================================
+# LATENCY ESTIMATE
+# =============================================================================
+
+# Assumed stream shape when nothing better is known (iPhone VCAM defaults)
+DEFAULT_FPS = 30
+DEFAULT_GOP_SECONDS = 2.0
+DEFAULT_BITRATE_KBPS = 4000
+AUDIO_MSGS_PER_SECOND = 47      # AAC 48 kHz, 1024 samples per frame
+NAGLE_DELAY_MS = 40
+
+# SRS defaults for directives a profile leaves out
+SRS_DEFAULTS = {
+    "vhost/min_latency": "off",
+    "vhost/tcp_nodelay": "off",
+    "vhost/play/gop_cache": "on",
+    "vhost/play/queue_length": "10",
+    "vhost/play/mw_latency": "350",
+    "vhost/play/mw_msgs": "8",
+    "vhost/publish/mr": "off",
+    "vhost/publish/mr_latency": "350",
+    "vhost/chunk_size": "60000",
+    "vhost/hls/enabled": "off",
+    "vhost/hls/hls_fragment": "10",
+    "vhost/hls/hls_window": "60",
+}
+
+
+@dataclass
+class LatencyEstimate:
+    """
+    Static buffering-latency estimate for one config.
+
+    flv_ms is the standing delay a steady HTTP-FLV/RTMP viewer sees;
+    flv_worst_ms adds the play queue SRS lets a lagging viewer build up.
+    """
+    flv_ms: float
+    flv_worst_ms: float
+    hls_ms: Optional[float]
+    breakdown: Dict[str, float] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+
+def _knob(config: SRSConfig, path: str) -> str:
+    return config.get(path, SRS_DEFAULTS.get(path))
+
+
+def estimate_latency(config: SRSConfig, fps: float = DEFAULT_FPS,
+                     gop_seconds: float = DEFAULT_GOP_SECONDS,
+                     bitrate_kbps: float = DEFAULT_BITRATE_KBPS) -> LatencyEstimate:
+    """Estimate how much latency the buffering knobs of a config add."""
+    on = lambda path: _knob(config, path).lower() == "on"
+    num = lambda path: float(_knob(config, path))
+    breakdown: Dict[str, float] = {}
+    warnings: List[str] = []
+
+    if on("vhost/publish/mr"):
+        breakdown["mr_latency"] = num("vhost/publish/mr_latency")
+
+    # Merged write: with min_latency SRS flushes once mw_msgs are queued,
+    # otherwise it always sleeps the full mw_latency.
+    mw_latency = num("vhost/play/mw_latency")
+    msg_interval_ms = 1000.0 / (fps + AUDIO_MSGS_PER_SECOND)
+    if on("vhost/min_latency"):
+        breakdown["mw_latency"] = min(mw_latency, num("vhost/play/mw_msgs") * msg_interval_ms)
+    else:
+        breakdown["mw_latency"] = mw_latency
+
+    # A GOP-cached viewer starts at the last keyframe and never catches up
+    if on("vhost/play/gop_cache"):
+        breakdown["gop_cache"] = gop_seconds * 1000.0 / 2
+
+    if not on("vhost/tcp_nodelay"):
+        breakdown["nagle"] = NAGLE_DELAY_MS
+
+    # One chunk of the largest size has to be on the wire before the next message
+    chunk_size = num("vhost/chunk_size")
+    breakdown["chunk"] = chunk_size * 8 / bitrate_kbps
+
+    flv_ms = sum(breakdown.values())
+    queue_ms = num("vhost/play/queue_length") * 1000.0
+    if on("vhost/play/gop_cache"):
+        warnings.append(f"gop_cache on: new viewers start up to {gop_seconds * 1000:.0f} ms behind live")
+    if queue_ms >= 5000:
+        warnings.append(f"queue_length {queue_ms / 1000:.0f}s lets a lagging viewer drift {queue_ms / 1000:.0f}s behind")
+    if mw_latency >= 1000:
+        warnings.append(f"mw_latency {mw_latency:.0f} ms batches a second or more of media per write")
+
+    hls_ms = None
+    if on("vhost/hls/enabled"):
+        # hls_window is in seconds; players buffer ~3 segments plus the one being written
+        fragment = num("vhost/hls/hls_fragment")
+        window = num("vhost/hls/hls_window")
+        segments = max(1, min(3, int(window // fragment) if fragment else 1))
+        hls_ms = (segments + 1) * fragment * 1000.0
+
+    return LatencyEstimate(flv_ms, flv_ms + queue_ms, hls_ms, breakdown, warnings)
+
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
+
+def validate_config(config: SRSConfig) -> List[str]:
+    """Return a list of problems that would make SRS misbehave or refuse the config."""
+    errors: List[str] = []
+    seen_ports: Dict[int, str] = {}
+    try:
+        endpoints = get_endpoints(config)
+    except SRSConfigError as e:
+        return [str(e)]
+    if "rtmp" not in endpoints:
+        errors.append("missing top-level 'listen' (RTMP port)")
+    for key, (host, port) in endpoints.items():
+        if not 0 < port < 65536:
+            errors.append(f"{LISTEN_PATHS[key]}: port {port} out of range")
+        if port in seen_ports:
+            errors.append(f"{LISTEN_PATHS[key]}: port {port} already used by {seen_ports[port]}")
+        seen_ports[port] = LISTEN_PATHS[key]
+        if host:
+            try:
+                ipaddress.IPv4Address(host)
+            except ValueError:
+                errors.append(f"{LISTEN_PATHS[key]}: invalid bind address '{host}'")
+
+    ranges = {
+        "vhost/chunk_size": (128, 65536),
+        "vhost/play/queue_length": (0, 3600),
+        "vhost/play/mw_latency": (0, 10000),
+        "vhost/play/mw_msgs": (0, 256),
+        "vhost/publish/mr_latency": (0, 10000),
+        "vhost/hls/hls_fragment": (1, 3600),
+        "vhost/hls/hls_window": (1, 86400),
+    }
+    for path, (low, high) in ranges.items():
+        try:
+            value = config.get_int(path)
+        except SRSConfigError as e:
+            errors.append(str(e))
+            continue
+        if value is not None and not low <= value <= high:
+            errors.append(f"{path} = {value} outside {low}..{high}")
+
+    fragment = config.get_int("vhost/hls/hls_fragment") if not errors else None
+    window = config.get_int("vhost/hls/hls_window") if not errors else None
+    if fragment and window and window < fragment:
+        errors.append(f"hls_window ({window}s) shorter than hls_fragment ({fragment}s)")
+    return errors
+
+
+# =============================================================================
+# LATENCY-BUDGET COMPILER
+# =============================================================================
+
+def compile_config(budget_ms: float, bind_ip: Optional[str] = None, fps: float = DEFAULT_FPS,
+                   gop_seconds: float = DEFAULT_GOP_SECONDS, bitrate_kbps: float = DEFAULT_BITRATE_KBPS,
+                   hls: bool = True) -> SRSConfig:
+    """
+    Build an SRS config whose estimated HTTP-FLV buffering fits budget_ms.
+    Knobs are spent smoothest-first; raises SRSConfigError if the budget
+    cannot be met or the result does not validate.
+    """
+    msg_interval_ms = 1000.0 / (fps + AUDIO_MSGS_PER_SECOND)
+    low_latency = budget_ms < 1000
+
+    # Largest chunk that still leaves the wire within 5% of the budget
+    chunk_size = int(bitrate_kbps * budget_ms * 0.05 / 8)
+    chunk_size = max(4096, min(60000, chunk_size // 1024 * 1024))
+
+    # Spend a quarter of the budget on write batching
+    mw_latency = max(0, min(1000, int(round(budget_ms * 0.25, -1))))
+    mw_msgs = max(1, min(8, int(mw_latency / msg_interval_ms))) if low_latency else 8
+    mr = budget_ms >= 2000
+    gop_cache = budget_ms >= gop_seconds * 1000 * 1.5
+    queue_length = max(1, int(budget_ms // 1000))
+
+    config = SRSConfig.parse(f"""
+        listen              1935;
+        max_connections     1000;
+        daemon              off;
+        srs_log_tank        console;
+        http_api {{ enabled on; listen 1985; }}
+        http_server {{ enabled on; listen 8080; dir ./objs/nginx/html; }}
+        vhost __defaultVhost__ {{
+            hls {{
+                enabled         {"on" if hls else "off"};
+                hls_fragment    {1 if budget_ms < 6000 else 2};
+                hls_window      {3 if budget_ms < 6000 else 6};
+                hls_path        ./objs/nginx/html;
+                hls_m3u8_file   [app]/[stream].m3u8;
+                hls_ts_file     [app]/[stream]-[seq].ts;
+            }}
+            http_remux {{ enabled on; mount [vhost]/[app]/[stream].flv; }}
+            tcp_nodelay     on;
+            min_latency     {"on" if low_latency else "off"};
+            play {{
+                gop_cache       {"on" if gop_cache else "off"};
+                queue_length    {queue_length};
+                mw_latency      {mw_latency};
+                mw_msgs         {mw_msgs};
+                time_jitter     {"off" if low_latency else "full"};
+            }}
+            publish {{
+                parse_sps       on;
+                mr              {"on" if mr else "off"};
+                mr_latency      {min(350, int(budget_ms * 0.15))};
+            }}
+            chunk_size      {chunk_size};
+        }}
+    """)
+    if bind_ip:
+        set_endpoints(config, bind_ip=bind_ip)
+
+    errors = validate_config(config)
+    if errors:
+        raise SRSConfigError("; ".join(errors))
+    estimate = estimate_latency(config, fps, gop_seconds, bitrate_kbps)
+    if estimate.flv_ms > budget_ms:
+        raise SRSConfigError(f"budget {budget_ms:.0f} ms too small: best achievable is ~{estimate.flv_ms:.0f} ms")
+    return config
+
+
+def describe_estimate(estimate: LatencyEstimate) -> str:
+    parts = ", ".join(f"{k}={v:.0f}" for k, v in estimate.breakdown.items())
+    hls = f"{estimate.hls_ms:.0f} ms" if estimate.hls_ms is not None else "off"
+    return (f"FLV ~{estimate.flv_ms:.0f} ms (worst {estimate.flv_worst_ms:.0f} ms), "
+            f"HLS {hls} [{parts}]")
+
+
+def detect_bind_ip() -> Optional[str]:
+    """PC-side address of the USB tethering adapter, if one is up."""
+    from usb_tethering_monitor import USBTetheringMonitor
+    info = USBTetheringMonitor().detect_tethering_adapter()
+    return info.pc_ip if info else None
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM SRS config tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    show = sub.add_parser("show", help="Parse a config and print it normalised")
+    show.add_argument("config", type=Path)
+
+    score = sub.add_parser("score", help="Estimate buffering latency of existing configs")
+    score.add_argument("configs", nargs="*", type=Path,
+                       help="Config files (default: config/active/*.conf and conf/*.conf)")
+    score.add_argument("--max-ms", type=float, default=None,
+                       help="Exit non-zero if any config's FLV estimate exceeds this")
+
+    comp = sub.add_parser("compile", help="Render a config for a latency budget")
+    comp.add_argument("--budget-ms", type=float, required=True)
+    comp.add_argument("--bind-ip", default=None,
+                      help="Listen address, or 'auto' for the USB tethering adapter (default: all)")
+    comp.add_argument("--no-hls", action="store_true", help="Disable HLS output")
+    comp.add_argument("-o", "--output", type=Path, default=None, help="Write here instead of stdout")
+
+    for p in (score, comp):
+        p.add_argument("--fps", type=float, default=DEFAULT_FPS)
+        p.add_argument("--gop-seconds", type=float, default=DEFAULT_GOP_SECONDS)
+        p.add_argument("--bitrate-kbps", type=float, default=DEFAULT_BITRATE_KBPS)
+
+    args = parser.parse_args()
+
+    if args.command == "show":
+        try:
+            config = SRSConfig.load(args.config)
+        except SRSConfigError as e:
+            print(f"ERROR: {args.config}: {e}")
+            return 1
+        print(config.render())
+
+    elif args.command == "score":
+        paths = args.configs
+        if not paths:
+            root = Path(__file__).resolve().parent.parent
+            paths = sorted(Path(p) for pattern in ("config/active/*.conf", "conf/*.conf")
+                           for p in glob.glob(str(root / pattern)))
+        over = 0
+        for path in paths:
+            try:
+                config = SRSConfig.load(path)
+            except (OSError, SRSConfigError) as e:
+                print(f"{path.name:<40} ERROR: {e}")
+                over += 1
+                continue
+            estimate = estimate_latency(config, args.fps, args.gop_seconds, args.bitrate_kbps)
+            print(f"{path.name:<40} {describe_estimate(estimate)}")
+            for problem in validate_config(config):
+                print(f"{'':<40} invalid: {problem}")
+            for warning in estimate.warnings:
+                print(f"{'':<40} warning: {warning}")
+            if args.max_ms is not None and estimate.flv_ms > args.max_ms:
+                over += 1
+        return 1 if over else 0
+
+    elif args.command == "compile":
+        bind_ip = args.bind_ip
+        if bind_ip == "auto":
+            bind_ip = detect_bind_ip()
+            if not bind_ip:
+                print("ERROR: no USB tethering adapter found for --bind-ip auto")
+                return 1
+        try:
+            config = compile_config(args.budget_ms, bind_ip, args.fps, args.gop_seconds,
+                                    args.bitrate_kbps, hls=not args.no_hls)
+        except SRSConfigError as e:
+            print(f"ERROR: {e}")
+            return 1
+        estimate = estimate_latency(config, args.fps, args.gop_seconds, args.bitrate_kbps)
+        header = (f"Compiled by srs_config.py for a {args.budget_ms:.0f} ms latency budget\n"
+                  f"Estimate: {describe_estimate(estimate)}")
+        if args.output:
+            config.save(args.output, header=header)
+            print(f"Wrote {args.output}: {describe_estimate(estimate)}")
+        else:
+            print(config.render(header=header))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM Multi-Viewer Load Test
+===============================
+Ramps up concurrent HTTP-FLV and HLS viewers against a locally started SRS
+(one profile at a time, fed by the synthetic publisher) and reports the
+viewer count at which per-viewer latency or stall rate degrades.
+
+All viewers run as asyncio tasks in this process. The event-loop lag of
+the load generator itself is reported so client-side saturation is not
+mistaken for a server limit.
+
+Usage:
+    python srs_load_test.py --profiles
+    python srs_load_test.py --profiles config/active/srs_iphone_ultra_smooth.conf --steps 1,10,50,100
+    python srs_load_test.py --flv-url http://127.0.0.1:8080/live/srs.flv --steps 1,5,10
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+import urllib.parse
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flv_probe import DEFAULT_STALL_MS, ChunkedDecoder, _percentile, probe_flv, profile_harness
+
+DEFAULT_STEPS = [1, 5, 10, 25, 50, 100, 200]
+DEFAULT_STEP_DURATION = 15.0
+DEFAULT_LAG_THRESHOLD_MS = 500.0
+DEFAULT_STALL_THRESHOLD = 1.0      # stalls per viewer-minute
+DEFAULT_ERROR_THRESHOLD = 0.05
+LOOP_LAG_WARN_MS = 100.0
+
+
+# =============================================================================
+# HLS VIEWER
+# =============================================================================
+
+async def http_get(url: str, timeout: float = 5.0) -> Tuple[int, bytes]:
+    """Minimal HTTP/1.1 GET returning (status, body)."""
+    parts = urllib.parse.urlsplit(url)
+    host = parts.hostname or "127.0.0.1"
+    port = parts.port or 80
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+        status = int(head.split(b" ", 2)[1])
+        body = await asyncio.wait_for(reader.read(), timeout)
+        if b"transfer-encoding: chunked" in head.lower():
+            body = ChunkedDecoder().feed(body)
+        return status, body
+    finally:
+        writer.close()
+
+
+@dataclass
+class ViewerResult:
+    """Outcome for one simulated viewer over one ramp step."""
+    kind: str                   # flv or hls
+    lag_p95_ms: float = 0.0
+    stalls: int = 0
+    stall_ms: float = 0.0
+    duration_s: float = 0.0
+    fps: Optional[float] = None
+    error: Optional[str] = None
+
+
+async def consume_hls(url: str, duration: float) -> ViewerResult:
+    """
+    Poll an HLS playlist like a player and download each new segment.
+
+    Lag is the time from a segment first appearing in a fetched playlist to
+    its download completing; a stall is a gap between new segments longer
+    than 1.5x the target duration. A failed fetch only counts against the
+    viewer if no segment is downloaded after it.
+    """
+    result = ViewerResult("hls")
+    base = url.rsplit("/", 1)[0] + "/"
+    last_seq = -1
+    last_new: Optional[float] = None
+    first_seen: Dict[int, float] = {}   # sequence number -> first playlist it was listed in
+    lags: List[float] = []
+    start = time.monotonic()
+    deadline = start + duration
+
+    while time.monotonic() < deadline:
+        try:
+            status, body = await http_get(url)
+        except (OSError, asyncio.TimeoutError, ValueError, asyncio.IncompleteReadError) as e:
+            result.error = str(e) or type(e).__name__
+            break
+        if status != 200:
+            result.error = f"HTTP {status}"
+            await asyncio.sleep(1.0)
+            continue
+
+        target = 1.0
+        seq = 0
+        segments: List[Tuple[int, str]] = []
+        for line in body.decode("utf-8", "replace").splitlines():
+            if line.startswith("#EXT-X-TARGETDURATION:"):
+                target = float(line.split(":", 1)[1])
+            elif line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+                seq = int(line.split(":", 1)[1])
+            elif line and not line.startswith("#"):
+                segments.append((seq, line))
+                seq += 1
+
+        now = time.monotonic()
+        for seg_seq, _ in segments:
+            first_seen.setdefault(seg_seq, now)
+        for seg_seq, uri in segments:
+            if seg_seq <= last_seq:
+                continue
+            if last_seq < 0 and seg_seq != segments[-1][0]:
+                continue    # join at the live edge like a low-latency player
+            try:
+                status, _ = await http_get(urllib.parse.urljoin(base, uri))
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                result.error = str(e) or type(e).__name__
+                continue
+            if status == 200:
+                lags.append((time.monotonic() - first_seen[seg_seq]) * 1000)
+                result.error = None     # recovered
+            else:
+                result.error = f"HTTP {status}"
+            last_seq = seg_seq
+            if last_new is not None and now - last_new > 1.5 * target:
+                result.stalls += 1
+                result.stall_ms += (now - last_new) * 1000
+            last_new = now
+        if last_new is None:
+            last_new = now
+        for old_seq in [n for n in first_seen if n <= last_seq]:
+            del first_seen[old_seq]
+        await asyncio.sleep(max(0.1, target / 2))
+
+    result.duration_s = time.monotonic() - start
+    result.lag_p95_ms = _percentile(lags, 95)
+    if not lags and not result.error:
+        result.error = "no segments received"
+    return result
+
+
+async def consume_flv(url: str, duration: float, stall_ms: float) -> ViewerResult:
+    rep = await probe_flv(url, duration, stall_ms)
+    return ViewerResult("flv", rep.lag_p95_ms, rep.stalls, rep.stall_ms, rep.duration_s, rep.fps,
+                        rep.error if not rep.video_frames else None)
+
+
+# =============================================================================
+# RAMP
+# =============================================================================
+
+@dataclass
+class LoadStep:
+    """Aggregate of all viewers at one concurrency level."""
+    profile: str
+    viewers: int
+    flv_viewers: int
+    hls_viewers: int
+    lag_p95_ms: float = 0.0
+    stalls_per_min: float = 0.0
+    error_rate: float = 0.0
+    fps_mean: Optional[float] = None
+    loop_lag_ms: float = 0.0
+    degraded: bool = False
+    reasons: List[str] = field(default_factory=list)
+
+
+async def _loop_lag_monitor(stop: asyncio.Event, samples: List[float], interval: float = 0.05):
+    while not stop.is_set():
+        before = time.monotonic()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, (time.monotonic() - before - interval) * 1000))
+
+
+async def run_step(profile: str, viewers: int, flv_url: Optional[str], hls_url: Optional[str],
+                   hls_ratio: float, duration: float, stall_ms: float) -> LoadStep:
+    hls_count = int(round(viewers * hls_ratio)) if hls_url else 0
+    flv_count = viewers - hls_count if flv_url else 0
+    step = LoadStep(profile, flv_count + hls_count, flv_count, hls_count)
+
+    stop = asyncio.Event()
+    loop_lag: List[float] = []
+    monitor = asyncio.create_task(_loop_lag_monitor(stop, loop_lag))
+    tasks = [consume_flv(flv_url, duration, stall_ms) for _ in range(flv_count)]
+    tasks += [consume_hls(hls_url, duration) for _ in range(hls_count)]
+    results: List[ViewerResult] = await asyncio.gather(*tasks)
+    stop.set()
+    await monitor
+
+    ok = [r for r in results if not r.error]
+    step.error_rate = (len(results) - len(ok)) / len(results) if results else 0.0
+    if ok:
+        step.lag_p95_ms = _percentile([r.lag_p95_ms for r in ok], 95)
+        viewer_minutes = sum(r.duration_s for r in ok) / 60.0
+        step.stalls_per_min = sum(r.stalls for r in ok) / viewer_minutes if viewer_minutes else 0.0
+        fps = [r.fps for r in ok if r.fps]
+        step.fps_mean = statistics.fmean(fps) if fps else None
+    step.loop_lag_ms = _percentile(loop_lag, 95)
+    return step
+
+
+def evaluate(step: LoadStep, baseline: Optional[LoadStep], lag_threshold_ms: float,
+             stall_threshold: float, error_threshold: float):
+    """Mark a step degraded relative to the single-viewer baseline."""
+    base_lag = baseline.lag_p95_ms if baseline else 0.0
+    if step.lag_p95_ms > base_lag + lag_threshold_ms:
+        step.reasons.append(f"lag p95 {step.lag_p95_ms:.0f} ms > baseline {base_lag:.0f} + {lag_threshold_ms:.0f}")
+    if step.stalls_per_min > stall_threshold:
+        step.reasons.append(f"{step.stalls_per_min:.1f} stalls/viewer-min > {stall_threshold}")
+    if step.error_rate > error_threshold:
+        step.reasons.append(f"{step.error_rate:.0%} viewers failed")
+    step.degraded = bool(step.reasons)
+
+
+def format_step(step: LoadStep) -> str:
+    fps = f"{step.fps_mean:5.1f}" if step.fps_mean else "  -  "
+    line = (f"  N={step.viewers:<4d} (flv {step.flv_viewers}, hls {step.hls_viewers}) "
+            f"lag p95={step.lag_p95_ms:6.0f}ms stalls/min={step.stalls_per_min:5.2f} "
+            f"errors={step.error_rate:4.0%} fps={fps} loop-lag={step.loop_lag_ms:4.0f}ms")
+    if step.loop_lag_ms > LOOP_LAG_WARN_MS:
+        line += " [load generator saturated]"
+    if step.degraded:
+        line += "  DEGRADED: " + "; ".join(step.reasons)
+    return line
+
+
+def ramp(profile: str, flv_url: Optional[str], hls_url: Optional[str], args) -> List[LoadStep]:
+    steps: List[LoadStep] = []
+    baseline = None
+    for viewers in args.steps:
+        step = asyncio.run(run_step(profile, viewers, flv_url, hls_url, args.hls_ratio,
+                                    args.step_duration, args.stall_ms))
+        evaluate(step, baseline, args.lag_threshold_ms, args.stall_threshold, args.error_threshold)
+        if baseline is None and not step.degraded:
+            baseline = step
+        print(format_step(step))
+        steps.append(step)
+        if step.degraded and not args.keep_going:
+            break
+    good = [s.viewers for s in steps if not s.degraded]
+    capacity = max(good) if good else 0
+    print(f"  -> {profile}: holds {capacity} viewers"
+          + ("" if any(s.degraded for s in steps) else " (no degradation within ramp)"))
+    return steps
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM multi-viewer load test")
+    parser.add_argument("--profiles", nargs="*", type=Path, default=None,
+                        help="Start SRS per profile (default: all of config/active/*.conf)")
+    parser.add_argument("--flv-url", default=None, help="Test an already running stream instead")
+    parser.add_argument("--hls-url", default=None, help="HLS playlist of an already running stream")
+    parser.add_argument("--srs-home", type=Path, default=Path(__file__).resolve().parent.parent)
+    parser.add_argument("--steps", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_STEPS,
+                        help="Comma-separated viewer counts (default: 1,5,10,25,50,100,200)")
+    parser.add_argument("--step-duration", type=float, default=DEFAULT_STEP_DURATION)
+    parser.add_argument("--hls-ratio", type=float, default=0.2, help="Fraction of viewers using HLS")
+    parser.add_argument("--stall-ms", type=float, default=DEFAULT_STALL_MS)
+    parser.add_argument("--lag-threshold-ms", type=float, default=DEFAULT_LAG_THRESHOLD_MS,
+                        help="Degraded when lag p95 exceeds the 1-viewer baseline by this much")
+    parser.add_argument("--stall-threshold", type=float, default=DEFAULT_STALL_THRESHOLD,
+                        help="Degraded above this many stalls per viewer-minute")
+    parser.add_argument("--error-threshold", type=float, default=DEFAULT_ERROR_THRESHOLD)
+    parser.add_argument("--keep-going", action="store_true", help="Continue the ramp past degradation")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results as JSON")
+    args = parser.parse_args()
+
+    results: List[LoadStep] = []
+    if args.profiles is not None:
+        configs = args.profiles or sorted((args.srs_home / "config" / "active").glob("*.conf"))
+        for config_path in configs:
+            print(f"Profile {config_path.name}:")
+            try:
+                with profile_harness(args.srs_home, config_path) as urls:
+                    results += ramp(config_path.name, urls.flv_url, urls.hls_url, args)
+            except Exception as e:
+                print(f"  ERROR: {e}")
+    elif args.flv_url or args.hls_url:
+        results = ramp(args.flv_url or args.hls_url, args.flv_url, args.hls_url, args)
+    else:
+        parser.print_help()
+        return 1
+
+    if args.json:
+        args.json.write_text(json.dumps([asdict(s) for s in results], indent=2), encoding="utf-8")
+        print(f"Wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
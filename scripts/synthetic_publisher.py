@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+iOS VCAM Synthetic Publisher
+============================
+Publishes a generated test pattern to SRS over RTMP so profiles can be
+compared without an iPhone. Wraps ffmpeg's lavfi sources and paces output
+in real time (-re), mimicking the phone's 30 fps / 2 s GOP stream.
+
+Usage:
+    python synthetic_publisher.py rtmp://127.0.0.1:1935/live/probe
+    python synthetic_publisher.py rtmp://127.0.0.1:1935/live/probe --fps 60 --bitrate 4000
+"""
+
+import shutil
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+
+class SyntheticPublisher:
+    """
+    Runs ffmpeg publishing testsrc2 video and a sine tone to an RTMP URL.
+    """
+
+    def __init__(self, url: str, fps: int = 30, gop_seconds: float = 2.0, bitrate_kbps: int = 2500,
+                 size: str = "1280x720", ffmpeg: str = "ffmpeg"):
+        self.url = url
+        self.fps = fps
+        self.gop_seconds = gop_seconds
+        self.bitrate_kbps = bitrate_kbps
+        self.size = size
+        self.ffmpeg = ffmpeg
+        self.proc: Optional[subprocess.Popen] = None
+        self.start_time: Optional[float] = None
+
+    def command(self) -> List[str]:
+        gop = max(1, int(self.fps * self.gop_seconds))
+        return [
+            self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin",
+            "-re", "-f", "lavfi", "-i", f"testsrc2=size={self.size}:rate={self.fps}",
+            "-re", "-f", "lavfi", "-i", "sine=frequency=1000:sample_rate=48000",
+            "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency",
+            "-pix_fmt", "yuv420p", "-g", str(gop), "-keyint_min", str(gop),
+            "-b:v", f"{self.bitrate_kbps}k", "-maxrate", f"{self.bitrate_kbps}k",
+            "-bufsize", f"{self.bitrate_kbps}k",
+            "-c:a", "aac", "-b:a", "128k",
+            "-f", "flv", self.url,
+        ]
+
+    def start(self) -> bool:
+        if self.is_running():
+            return True
+        if not shutil.which(self.ffmpeg):
+            print(f"ERROR: {self.ffmpeg} not found on PATH (needed for the synthetic publisher)")
+            return False
+        # Output is discarded rather than piped so ffmpeg can never block on it
+        self.proc = subprocess.Popen(
+            self.command(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.start_time = time.time()
+        time.sleep(0.5)
+        if self.proc.poll() is not None:
+            print(f"ERROR: ffmpeg exited with code {self.proc.returncode} publishing to {self.url}")
+            return False
+        return True
+
+    def stop(self) -> None:
+        if self.proc and self.proc.poll() is None:
+            try:
+                self.proc.terminate()
+                self.proc.wait(timeout=5)
+            except Exception:
+                self.proc.kill()
+        self.proc = None
+
+    def is_running(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="iOS VCAM synthetic RTMP publisher")
+    parser.add_argument("url", help="RTMP URL, e.g. rtmp://127.0.0.1:1935/live/probe")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--gop", type=float, default=2.0, help="Keyframe interval in seconds")
+    parser.add_argument("--bitrate", type=int, default=2500, help="Video bitrate in kbps")
+    parser.add_argument("--size", default="1280x720")
+    args = parser.parse_args()
+
+    publisher = SyntheticPublisher(args.url, args.fps, args.gop, args.bitrate, args.size)
+    if not publisher.start():
+        return 1
+    print(f"Publishing to {args.url} (Ctrl+C to stop)")
+    try:
+        while publisher.is_running():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
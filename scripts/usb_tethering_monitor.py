@@ -21,14 +21,28 @@ import subprocess
 import time
 import logging
 import json
+import re
 import sys
 import threading
 import os
+import shutil
+import signal
+import urllib.request
+from collections import deque
 from pathlib import Path
-from typing import Optional, Callable
-from dataclasses import dataclass
+from typing import Optional, Callable, Dict, List
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 
+from control_api import CONTROLLER_CONTROL_PORT, LISTENER_CONTROL_PORT, ControlServer
+from control_api import request as control_request
+from link_stats import LinkStatsCollector, format_stats
+from monibuca_config import MonibucaConfig
+from monibuca_config import get_endpoints as get_monibuca_endpoints, set_endpoints as set_monibuca_endpoints
+from process_priority import PRESETS, PriorityProfile, apply_profile, get_preset
+from srs_config import (DEFAULT_BITRATE_KBPS, SRSConfig, SRSConfigError, compile_config, describe_estimate,
+                        estimate_latency, get_endpoints, set_endpoints)
+
 # =============================================================================
 # LOGGING CONFIGURATION
 # =============================================================================
@@ -93,6 +107,181 @@ class USBTetheringInfo:
     gateway: str
 
 
+@dataclass
+class DeviceSession:
+    """Per-phone health state tracked when several iPhones are tethered at once."""
+    info: USBTetheringInfo
+    stream_key: str
+    state: ConnectionState = ConnectionState.CONNECTED
+    connected_since: float = field(default_factory=time.time)
+    last_seen: float = field(default_factory=time.time)
+    lost_since: Optional[float] = None
+    reconnects: int = 0
+    probe_ms: Optional[float] = None
+
+    @property
+    def adapter_name(self) -> str:
+        return self.info.adapter_name
+
+
+@dataclass(frozen=True)
+class SRSEndpoints:
+    """Ports one SRS instance listens on."""
+    rtmp_port: int = 1935
+    api_port: int = 1985
+    http_port: int = 8080
+
+    def alternate(self) -> "SRSEndpoints":
+        """The other port set, used by the warm-standby instance during a hot swap."""
+        return _ALTERNATE_ENDPOINTS.get(self, PRIMARY_ENDPOINTS)
+
+
+PRIMARY_ENDPOINTS = SRSEndpoints()
+STANDBY_ENDPOINTS = SRSEndpoints(rtmp_port=19350, api_port=19850, http_port=18080)
+# Monibuca serves its API and HTTP-FLV on the same port
+MONIBUCA_ENDPOINTS = SRSEndpoints(rtmp_port=1935, api_port=8081, http_port=8081)
+MONIBUCA_STANDBY_ENDPOINTS = SRSEndpoints(rtmp_port=19350, api_port=18081, http_port=18081)
+_ALTERNATE_ENDPOINTS = {
+    PRIMARY_ENDPOINTS: STANDBY_ENDPOINTS,
+    STANDBY_ENDPOINTS: PRIMARY_ENDPOINTS,
+    MONIBUCA_ENDPOINTS: MONIBUCA_STANDBY_ENDPOINTS,
+    MONIBUCA_STANDBY_ENDPOINTS: MONIBUCA_ENDPOINTS,
+}
+
+
+# =============================================================================
+# ADAPTIVE POLLING
+# =============================================================================
+
+class AdaptivePoller:
+    """
+    Picks the delay before the next tethering/connectivity probe.
+
+    While samples look healthy the interval grows geometrically up to
+    max_interval. A failed probe, or jitter in the probe round-trip above
+    jitter_threshold_ms, drops straight to min_interval and holds there for
+    settle_samples healthy probes before backing off again.
+
+    probe_budget caps the fraction of wall time spent inside probes (the
+    PowerShell adapter query and the TCP/ICMP checks) over budget_window.
+    Slow polling on a stable link leaves headroom for bursts of fast
+    polling; once that is used up the next probe waits for old ones to
+    age out of the window.
+    """
+
+    def __init__(self, min_interval: float = 0.5, base_interval: float = 2.0,
+                 max_interval: float = 15.0, backoff: float = 1.5,
+                 jitter_threshold_ms: float = 50.0, settle_samples: int = 5,
+                 probe_budget: float = 0.10, budget_window: float = 60.0):
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter_threshold_ms = jitter_threshold_ms
+        self.settle_samples = settle_samples
+        self.probe_budget = probe_budget
+        self.budget_window = budget_window
+
+        self.interval = base_interval
+        self.jitter_ms = 0.0
+        self._calm = settle_samples
+        self._last_rtt: Optional[float] = None
+        self._last_healthy: Optional[bool] = None
+        self._last_probe_at: Optional[float] = None
+        self._costs: deque = deque()
+        self._started = time.monotonic()
+
+        self.probes = 0
+        self.probe_seconds = 0.0
+        self.throttled = 0
+        self.transitions = 0
+        self.detection_ms: deque = deque(maxlen=100)
+
+    def record(self, healthy: bool, cost: float, rtt: Optional[float] = None,
+               cap: Optional[float] = None) -> float:
+        """
+        Record one probe and return the interval to wait before the next.
+        cost is the probe's wall time, rtt the connectivity round-trip when
+        known (jitter falls back to the variation in cost). cap limits the
+        backoff for this call only; the budget still applies.
+        """
+        now = time.monotonic()
+        self.probes += 1
+        self.probe_seconds += cost
+        self._costs.append((now, cost))
+
+        # RFC 3550 style smoothed jitter
+        sample = rtt if rtt is not None else cost
+        if self._last_rtt is not None:
+            self.jitter_ms += (abs(sample - self._last_rtt) * 1000 - self.jitter_ms) / 16
+        self._last_rtt = sample
+
+        # A change happened somewhere since the previous probe: that gap is
+        # the worst case detection latency for it
+        if self._last_healthy is not None and healthy != self._last_healthy:
+            self.transitions += 1
+            self.detection_ms.append((now - self._last_probe_at) * 1000)
+        self._last_healthy = healthy
+        self._last_probe_at = now
+
+        if not healthy or self.jitter_ms > self.jitter_threshold_ms:
+            self._calm = 0
+            self.interval = self.min_interval
+        else:
+            self._calm += 1
+            if self._calm >= self.settle_samples:
+                self.interval = min(self.max_interval, max(self.base_interval, self.interval * self.backoff))
+
+        interval = self.interval if cap is None else min(self.interval, cap)
+        return self._apply_budget(now, interval)
+
+    def _apply_budget(self, now: float, interval: float) -> float:
+        while self._costs and now - self._costs[0][0] > self.budget_window:
+            self._costs.popleft()
+        if self.probe_budget <= 0:
+            return interval
+
+        allowed = self.probe_budget * self.budget_window
+        spent = sum(cost for _, cost in self._costs)
+        if spent < allowed:
+            return interval
+
+        # Wait until enough old probes leave the window to fit another
+        needed = interval
+        for at, cost in self._costs:
+            spent -= cost
+            if spent < allowed:
+                needed = at + self.budget_window - now
+                break
+        if needed > interval:
+            self.throttled += 1
+            return needed
+        return interval
+
+    def metrics(self) -> Dict[str, float]:
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        detections = list(self.detection_ms)
+        return {
+            "probes": self.probes,
+            "probe_cost_ms": self.probe_seconds / self.probes * 1000 if self.probes else 0.0,
+            "probe_duty_pct": self.probe_seconds / elapsed * 100,
+            "throttled": self.throttled,
+            "interval_s": self.interval,
+            "jitter_ms": self.jitter_ms,
+            "transitions": self.transitions,
+            "detection_avg_ms": sum(detections) / len(detections) if detections else 0.0,
+            "detection_max_ms": max(detections) if detections else 0.0,
+        }
+
+    def describe(self) -> str:
+        m = self.metrics()
+        return (f"{m['probes']} probes, {m['probe_cost_ms']:.0f} ms avg cost, "
+                f"{m['probe_duty_pct']:.1f}% of wall time, {m['throttled']} budget-throttled; "
+                f"interval {m['interval_s']:.1f}s, jitter {m['jitter_ms']:.0f} ms; "
+                f"{m['transitions']} transitions detected within "
+                f"{m['detection_avg_ms']:.0f} ms avg / {m['detection_max_ms']:.0f} ms worst")
+
+
 # =============================================================================
 # USB TETHERING MONITOR
 # =============================================================================
@@ -113,15 +302,30 @@ class USBTetheringMonitor:
     # Expected IP range for Personal Hotspot
     HOTSPOT_SUBNET = "172.20.10."
 
-    def __init__(self):
+    # Grace period before a lost phone is declared disconnected
+    RECONNECT_GRACE_PERIOD = 30  # seconds
+
+    def __init__(self, poller: Optional[AdaptivePoller] = None):
         self.state = ConnectionState.DISCONNECTED
         self.tethering_info: Optional[USBTetheringInfo] = None
         self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        # One poller for every probe loop so the budget is global
+        self.poller = poller or AdaptivePoller()
+        self.devices: Dict[str, DeviceSession] = {}
+        self._stream_slots: Dict[str, int] = {}
 
     def detect_tethering_adapter(self) -> Optional[USBTetheringInfo]:
         """
         Detect iPhone USB tethering adapter using PowerShell.
-        Returns USBTetheringInfo if found, None otherwise.
+        Returns USBTetheringInfo for the first one found, None otherwise.
+        """
+        adapters = self.detect_tethering_adapters()
+        return adapters[0] if adapters else None
+
+    def detect_tethering_adapters(self) -> List[USBTetheringInfo]:
+        """
+        Detect every iPhone USB tethering adapter that is up.
         """
         try:
             # Get network adapter information via PowerShell
@@ -154,7 +358,7 @@ class USBTetheringMonitor:
 
             if result.returncode != 0 or not result.stdout.strip():
                 logger.debug("No Apple network adapter found")
-                return None
+                return []
 
             adapters = json.loads(result.stdout)
 
@@ -162,45 +366,57 @@ class USBTetheringMonitor:
             if isinstance(adapters, dict):
                 adapters = [adapters]
 
+            found: List[USBTetheringInfo] = []
             for adapter in adapters:
                 ip = adapter.get("IP", "")
+                # An adapter with several addresses serialises IP as a list
+                if isinstance(ip, list):
+                    ip = next((a for a in ip if a.startswith(self.HOTSPOT_SUBNET)), "")
                 if ip.startswith(self.HOTSPOT_SUBNET):
                     # Calculate iPhone IP (usually .1)
                     ip_parts = ip.split(".")
                     iphone_ip = f"{ip_parts[0]}.{ip_parts[1]}.{ip_parts[2]}.1"
 
                     # Calculate subnet mask from prefix length
-                    prefix = int(adapter.get("PrefixLength", 24))
+                    prefix = adapter.get("PrefixLength", 24)
+                    prefix = int(prefix[0] if isinstance(prefix, list) else prefix)
                     subnet_mask = self._prefix_to_netmask(prefix)
 
-                    return USBTetheringInfo(
+                    found.append(USBTetheringInfo(
                         adapter_name=adapter.get("Name", "Unknown"),
                         pc_ip=ip,
                         iphone_ip=iphone_ip,
                         subnet_mask=subnet_mask,
-                        gateway=adapter.get("Gateway", iphone_ip)
-                    )
+                        gateway=adapter.get("Gateway") or iphone_ip
+                    ))
 
-            return None
+            pc_ips = [info.pc_ip for info in found]
+            if len(set(pc_ips)) != len(pc_ips):
+                logger.warning("Several tethered phones handed out the same PC address; "
+                               "they cannot be told apart until one is reconnected")
+            return found
 
         except json.JSONDecodeError as e:
             logger.debug(f"JSON decode error: {e}")
-            return None
+            return []
         except subprocess.TimeoutExpired:
             logger.warning("PowerShell command timed out")
-            return None
+            return []
         except Exception as e:
             logger.error(f"Error detecting tethering adapter: {e}")
-            return None
+            return []
 
     def _prefix_to_netmask(self, prefix: int) -> str:
         """Convert CIDR prefix to dotted netmask."""
         mask = (0xffffffff >> (32 - prefix)) << (32 - prefix)
         return f"{(mask >> 24) & 0xff}.{(mask >> 16) & 0xff}.{(mask >> 8) & 0xff}.{mask & 0xff}"
 
-    def test_iphone_connectivity(self, iphone_ip: str, timeout: float = 2.0) -> bool:
+    def test_iphone_connectivity(self, iphone_ip: str, timeout: float = 2.0,
+                                 source_ip: Optional[str] = None) -> bool:
         """
         Test TCP connectivity to iPhone on expected ports.
+        Every hotspot phone answers on 172.20.10.1, so with several phones
+        attached source_ip pins the probe to one adapter.
         """
         test_ports = [62078, 22, 44, 80]  # lockdownd, SSH, checkra1n SSH, HTTP
 
@@ -208,6 +424,8 @@ class USBTetheringMonitor:
             try:
                 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 sock.settimeout(timeout)
+                if source_ip:
+                    sock.bind((source_ip, 0))
                 result = sock.connect_ex((iphone_ip, port))
                 sock.close()
                 if result == 0:
@@ -218,8 +436,9 @@ class USBTetheringMonitor:
 
         # Try ICMP ping as fallback
         try:
+            source_args = ["-S", source_ip] if source_ip else []
             result = subprocess.run(
-                ["ping", "-n", "1", "-w", str(int(timeout * 1000)), iphone_ip],
+                ["ping", "-n", "1", "-w", str(int(timeout * 1000))] + source_args + [iphone_ip],
                 capture_output=True,
                 timeout=timeout + 2
             )
@@ -227,10 +446,18 @@ class USBTetheringMonitor:
         except Exception:
             return False
 
-    def wait_for_connection(self, poll_interval: float = 2.0) -> USBTetheringInfo:
+    def _next_interval(self, poll_interval: Optional[float], healthy: bool, started: float,
+                       rtt: Optional[float] = None, cap: Optional[float] = None) -> float:
+        """Fixed poll_interval if given, otherwise ask the adaptive poller."""
+        adaptive = self.poller.record(healthy, time.monotonic() - started, rtt, cap)
+        return adaptive if poll_interval is None else poll_interval
+
+    def wait_for_connection(self, poll_interval: Optional[float] = None) -> USBTetheringInfo:
         """
         Block until USB tethering connection is detected.
         Returns USBTetheringInfo when connected.
+        poll_interval=None polls adaptively: slowly while no adapter is
+        present, sub-second once one appears but the phone is not answering.
         """
         self.state = ConnectionState.DETECTING
         logger.info("Waiting for iPhone USB tethering connection...")
@@ -244,12 +471,14 @@ class USBTetheringMonitor:
 
         dots = 0
         while not self._stop_event.is_set():
+            started = time.monotonic()
             info = self.detect_tethering_adapter()
 
             if info:
                 # Verify connectivity
                 logger.debug(f"Adapter found: {info.adapter_name}, testing connectivity...")
                 if self.test_iphone_connectivity(info.iphone_ip):
+                    self.poller.record(True, time.monotonic() - started)
                     self.tethering_info = info
                     self.state = ConnectionState.CONNECTED
                     logger.info("")
@@ -264,65 +493,376 @@ class USBTetheringMonitor:
             # Progress indicator
             dots = (dots + 1) % 4
             print(f"\r  Scanning{'.' * dots}{'   ' * (3 - dots)}", end="", flush=True)
-            time.sleep(poll_interval)
+            # No adapter is a steady state, but someone is about to plug a
+            # phone in, so don't back off past base_interval. An adapter
+            # without a reachable phone means it is coming up: look again soon.
+            interval = self._next_interval(poll_interval, info is None, started,
+                                           cap=self.poller.base_interval)
+            self._sleep(interval)
 
         raise InterruptedError("Connection wait interrupted")
 
-    def monitor_connection(self, callback: Optional[Callable] = None, poll_interval: float = 5.0):
+    def stream_key_for(self, adapter_name: str) -> str:
+        """
+        Stream key for a phone, stable for the whole session. The first phone
+        keeps the historical 'srs' key; later ones get srs2, srs3, ...
+        """
+        slot = self._stream_slots.setdefault(adapter_name, len(self._stream_slots))
+        return "srs" if slot == 0 else f"srs{slot + 1}"
+
+    def poll_devices(self) -> List[DeviceSession]:
         """
-        Continuously monitor connection status.
-        Calls callback(connected: bool, info: USBTetheringInfo) on state changes.
+        One detection pass over all tethered adapters.
+        Updates self.devices and returns the sessions whose state changed.
         """
-        last_connected = False
-        reconnect_start_time = None
-        RECONNECT_GRACE_PERIOD = 30  # seconds
+        now = time.time()
+        reachable: Dict[str, USBTetheringInfo] = {}
+        probe_ms: Dict[str, float] = {}
+        for info in self.detect_tethering_adapters():
+            started = time.monotonic()
+            if self.test_iphone_connectivity(info.iphone_ip, source_ip=info.pc_ip):
+                reachable[info.adapter_name] = info
+                probe_ms[info.adapter_name] = (time.monotonic() - started) * 1000
+        changed: List[DeviceSession] = []
+
+        for name, info in reachable.items():
+            session = self.devices.get(name)
+            if session is None:
+                session = DeviceSession(info=info, stream_key=self.stream_key_for(name),
+                                        probe_ms=probe_ms[name])
+                self.devices[name] = session
+                changed.append(session)
+                continue
+            session.info = info
+            session.probe_ms = probe_ms[name]
+            session.last_seen = now
+            if session.state in (ConnectionState.RECONNECTING, ConnectionState.DISCONNECTED):
+                if session.state == ConnectionState.DISCONNECTED:
+                    session.connected_since = now
+                session.state = ConnectionState.CONNECTED
+                session.lost_since = None
+                session.reconnects += 1
+                changed.append(session)
+
+        for name, session in self.devices.items():
+            if name in reachable:
+                continue
+            session.probe_ms = None
+            if session.state in (ConnectionState.CONNECTED, ConnectionState.STREAMING):
+                session.state = ConnectionState.RECONNECTING
+                session.lost_since = now
+                changed.append(session)
+            elif (session.state == ConnectionState.RECONNECTING
+                  and now - session.lost_since >= self.RECONNECT_GRACE_PERIOD):
+                session.state = ConnectionState.DISCONNECTED
+                changed.append(session)
+
+        # Keep the single-phone view pointing at the first live device
+        live = [s for s in self.devices.values()
+                if s.state in (ConnectionState.CONNECTED, ConnectionState.STREAMING)]
+        if live:
+            self.tethering_info = live[0].info
+            self.state = ConnectionState.CONNECTED
+        elif any(s.state == ConnectionState.RECONNECTING for s in self.devices.values()):
+            self.state = ConnectionState.RECONNECTING
+        else:
+            self.tethering_info = None
+            self.state = ConnectionState.DISCONNECTED
+        return changed
 
+    def monitor_devices(self, callback: Optional[Callable[[DeviceSession], None]] = None,
+                        poll_interval: Optional[float] = None, on_poll: Optional[Callable[[], None]] = None):
+        """
+        Continuously monitor every tethered phone.
+        Calls callback(session) whenever one device changes state, and
+        on_poll() after every pass. poll_interval=None polls adaptively.
+        """
         while not self._stop_event.is_set():
-            info = self.detect_tethering_adapter()
-            connected = info is not None and self.test_iphone_connectivity(info.iphone_ip)
+            started = time.monotonic()
+            changed = self.poll_devices()
+            for session in changed:
+                if callback:
+                    callback(session)
+            healthy = not changed and all(s.state in (ConnectionState.CONNECTED, ConnectionState.STREAMING)
+                                          for s in self.devices.values())
+            rtts = [s.probe_ms for s in self.devices.values() if s.probe_ms is not None]
+            interval = self._next_interval(poll_interval, healthy, started, max(rtts) / 1000 if rtts else None)
+            if changed:
+                logger.debug(f"Probe metrics: {self.poller.describe()}")
+            if on_poll:
+                on_poll()
+            self._sleep(interval)
+
+    def _sleep(self, interval: float):
+        """Wait between probes; returns early on stop() or wake()."""
+        self._wake_event.wait(interval)
+        self._wake_event.clear()
+
+    def wake(self):
+        """Probe again now and sample quickly until the link looks healthy."""
+        self.poller.interval = self.poller.min_interval
+        self.poller._calm = 0
+        self._wake_event.set()
 
-            if connected != last_connected:
-                if connected:
-                    # Connection restored
-                    self.state = ConnectionState.CONNECTED
-                    self.tethering_info = info
-                    reconnect_start_time = None
+    def stop(self):
+        """Stop monitoring."""
+        self._stop_event.set()
+        self._wake_event.set()
 
-                    if callback:
-                        callback(True, info)
 
-                    logger.info(f"USB Tethering: CONNECTED (PC: {info.pc_ip}, iPhone: {info.iphone_ip})")
-                else:
-                    # Connection lost - start grace period
-                    if reconnect_start_time is None:
-                        reconnect_start_time = time.time()
-                        self.state = ConnectionState.RECONNECTING
-                        logger.warning("USB connection interrupted, attempting reconnect...")
+# =============================================================================
+# SRS LOG CONSUMER
+# =============================================================================
 
-                    elapsed = time.time() - reconnect_start_time
-                    if elapsed < RECONNECT_GRACE_PERIOD:
-                        logger.debug(f"Reconnect attempt... ({int(elapsed)}s / {RECONNECT_GRACE_PERIOD}s)")
-                        # Don't update last_connected yet - give it time to reconnect
-                        time.sleep(poll_interval)
-                        continue
-                    else:
-                        # Grace period expired
-                        self.state = ConnectionState.DISCONNECTED
-                        self.tethering_info = None
-                        reconnect_start_time = None
+@dataclass
+class SRSLogEvent:
+    """Structured event parsed from one SRS console log line."""
+    timestamp: float
+    kind: str       # publish, unpublish, play, connect, error, warn, kbps
+    level: str
+    message: str
+    fields: Dict[str, str] = field(default_factory=dict)
 
-                        if callback:
-                            callback(False, None)
 
-                        logger.warning("USB Tethering: DISCONNECTED (grace period expired)")
+class SRSLogConsumer:
+    """
+    Continuously drains the SRS stdout pipe on a background thread.
 
-                last_connected = connected
+    SRS runs with `srs_log_tank console`, so if nobody reads the pipe it
+    eventually blocks on a log write and the whole media server stalls.
+    Lines are parsed into SRSLogEvent objects kept in a bounded ring buffer
+    and optionally forwarded (rate-limited) to our own log.
+    """
 
-            time.sleep(poll_interval)
+    # [2024-01-01 12:00:00.123][INFO][1234][k3x9e2a1] message
+    LINE_RE = re.compile(
+        r"^\[(?P<ts>[^\]]+)\]\[(?P<level>[A-Za-z]+)\]\[(?P<pid>\d+)\]"
+        r"\[(?P<cid>[^\]]*)\](?:\[\d+\])?\s?(?P<msg>.*)$"
+    )
+    # <- CPB time=120006, okbps=0,0,0, ikbps=2474,2461,0, ...
+    KBPS_RE = re.compile(
+        r"(?P<dir><-|->)\s*(?P<tag>[A-Z]+) time=(?P<time>\d+).*?"
+        r"okbps=(?P<okbps>\d+(?:,\d+)*), ikbps=(?P<ikbps>\d+(?:,\d+)*)"
+    )
+    CLIENT_RE = re.compile(r"RTMP client ip=(?P<ip>[\w.:]+?)(?::(?P<port>\d+))?, fd=(?P<fd>\d+)")
+    IDENTIFIED_RE = re.compile(
+        r"client identified, type=(?P<type>[\w-]+), vhost=(?P<vhost>[^,]*), "
+        r"app=(?P<app>[^,]*), stream=(?P<stream>[^,]*)"
+    )
 
-    def stop(self):
-        """Stop monitoring."""
-        self._stop_event.set()
+    LEVELS = {
+        "verb": logging.DEBUG,
+        "debug": logging.DEBUG,
+        "info": logging.DEBUG,
+        "trace": logging.DEBUG,
+        "warn": logging.WARNING,
+        "error": logging.ERROR,
+    }
+
+    def __init__(self, stream, max_events: int = 1000, forward_rate: float = 20.0, tail_lines: int = 50):
+        self.stream = stream
+        self.forward_rate = forward_rate
+        self._events: deque = deque(maxlen=max_events)
+        self._tail: deque = deque(maxlen=tail_lines)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._tokens = forward_rate
+        self._last_refill = time.monotonic()
+        self._suppressed = 0
+        self._srs_logger = logging.getLogger("srs")
+        self.lines_read = 0
+        self.counts: Dict[str, int] = {}
+        self.last_kbps: Optional[SRSLogEvent] = None
+
+    def start(self):
+        """Start draining the pipe."""
+        self._thread = threading.Thread(target=self._run, name="srs-log-consumer", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the pipe to reach EOF (i.e. SRS has exited)."""
+        if self._thread:
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            for line in iter(self.stream.readline, ""):
+                self._handle_line(line.rstrip("\r\n"))
+        except (ValueError, OSError):
+            # Pipe closed underneath us during shutdown
+            pass
+        finally:
+            self._flush_suppressed()
+
+    def _handle_line(self, line: str):
+        if not line:
+            return
+        event = self.parse_line(line)
+        with self._lock:
+            self.lines_read += 1
+            self._tail.append(line)
+            if event:
+                self._events.append(event)
+                self.counts[event.kind] = self.counts.get(event.kind, 0) + 1
+                if event.kind == "kbps":
+                    self.last_kbps = event
+        if self.forward_rate > 0:
+            self._forward(line, event.level if event else "info")
+
+    @classmethod
+    def parse_line(cls, line: str) -> Optional[SRSLogEvent]:
+        """Parse a single SRS log line; returns None for uninteresting lines."""
+        match = cls.LINE_RE.match(line)
+        if not match:
+            return None
+
+        level = match.group("level").lower()
+        message = match.group("msg")
+        fields = {"pid": match.group("pid"), "cid": match.group("cid"), "ts": match.group("ts")}
+        kind = None
+
+        kbps = cls.KBPS_RE.search(message)
+        client = cls.CLIENT_RE.search(message)
+        identified = cls.IDENTIFIED_RE.search(message)
+        if kbps:
+            kind = "kbps"
+            fields.update(kbps.groupdict())
+        elif identified:
+            fields.update(identified.groupdict())
+            kind = "publish" if "publish" in identified.group("type") else "play"
+        elif client:
+            kind = "connect"
+            fields.update({k: v for k, v in client.groupdict().items() if v is not None})
+        elif "unpublish" in message:
+            kind = "unpublish"
+        elif level == "error":
+            kind = "error"
+        elif level == "warn":
+            kind = "warn"
+
+        if kind is None:
+            return None
+        return SRSLogEvent(time.time(), kind, level, message, fields)
+
+    def _forward(self, line: str, level: str):
+        """Forward a line to our log using a token bucket of forward_rate lines/s."""
+        now = time.monotonic()
+        self._tokens = min(self.forward_rate, self._tokens + (now - self._last_refill) * self.forward_rate)
+        self._last_refill = now
+        if self._tokens < 1.0:
+            self._suppressed += 1
+            return
+        self._tokens -= 1.0
+        self._flush_suppressed()
+        self._srs_logger.log(self.LEVELS.get(level, logging.DEBUG), f"[SRS] {line}")
+
+    def _flush_suppressed(self):
+        if self._suppressed:
+            self._srs_logger.debug(f"[SRS] ({self._suppressed} log lines suppressed by rate limit)")
+            self._suppressed = 0
+
+    def events(self, kind: Optional[str] = None) -> List[SRSLogEvent]:
+        """Snapshot of buffered events, optionally filtered by kind."""
+        with self._lock:
+            return [e for e in self._events if kind is None or e.kind == kind]
+
+    def tail(self) -> List[str]:
+        """Most recent raw lines, for error reporting."""
+        with self._lock:
+            return list(self._tail)
+
+
+# =============================================================================
+# HLS RAM STORE
+# =============================================================================
+
+def default_ram_root() -> Optional[Path]:
+    """
+    RAM-backed directory to put HLS fragments in: IOSVCAM_RAMDISK (e.g. an
+    ImDisk drive like R:\\ on Windows) or /dev/shm where it exists.
+    """
+    env = os.environ.get("IOSVCAM_RAMDISK")
+    if env and os.path.isdir(env):
+        return Path(env)
+    if os.path.isdir("/dev/shm"):
+        return Path("/dev/shm")
+    return None
+
+
+class HLSRamStore:
+    """
+    Per-instance HLS output directory on a RAM disk.
+
+    The rendered config writes fragments there (hls_path) and serves them
+    through a vhost http_static mount on the app, so /live/<stream>.m3u8
+    keeps its URL while nothing touches objs/nginx/html. Capacity is checked
+    against hls_window x bitrate before the directory is used.
+    """
+
+    HEADROOM = 1.5      # VBR peaks, the fragment being written, the playlist
+    APP = "live"
+
+    def __init__(self, root: Path, name: str, max_streams: int = 1, bitrate_kbps: int = DEFAULT_BITRATE_KBPS):
+        self.root = root
+        self.path = root / f"iosvcam-hls-{name}"
+        self.max_streams = max_streams
+        self.bitrate_kbps = bitrate_kbps
+        self.required_bytes = 0
+
+    def size_for(self, config: SRSConfig) -> int:
+        """Bytes needed to hold hls_window (seconds) plus two fragments per stream."""
+        fragment = float(config.get("vhost/hls/hls_fragment") or 10)
+        window = float(config.get("vhost/hls/hls_window") or 60)
+        per_stream = (window + 2 * fragment) * self.bitrate_kbps * 1000 / 8
+        return int(per_stream * self.HEADROOM * self.max_streams)
+
+    def apply(self, config: SRSConfig, html_dir: Path) -> bool:
+        """
+        Create the directory and point config at it. Returns False (config
+        untouched) if the RAM disk is too small.
+        """
+        self.required_bytes = self.size_for(config)
+        free = shutil.disk_usage(self.root).free
+        if free < self.required_bytes:
+            logger.warning(f"RAM disk {self.root} has {free // 2**20} MiB free, HLS needs "
+                           f"{self.required_bytes // 2**20} MiB; keeping HLS on disk")
+            return False
+
+        app_dir = self.path / self.APP
+        app_dir.mkdir(parents=True, exist_ok=True)
+        # Keep the static pages that lived next to the fragments
+        static_dir = html_dir / self.APP
+        if static_dir.is_dir():
+            for item in static_dir.iterdir():
+                if item.is_file() and item.suffix not in (".ts", ".m3u8"):
+                    shutil.copy2(item, app_dir / item.name)
+        config.set("vhost/http_static/enabled", "on")
+        config.set("vhost/http_static/mount", f"/{self.APP}")
+        config.set("vhost/http_static/dir", str(app_dir))
+
+        config.set("vhost/hls/hls_path", str(self.path))
+        config.set("vhost/hls/hls_m3u8_file", "[app]/[stream].m3u8")
+        config.set("vhost/hls/hls_ts_file", "[app]/[stream]-[seq].ts")
+        # Let SRS delete fragments of finished streams instead of leaving them in RAM
+        config.set("vhost/hls/hls_cleanup", "on")
+        config.set("vhost/hls/hls_dispose", str(max(30, int(float(config.get("vhost/hls/hls_window") or 60) * 2))))
+        return True
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def used_bytes(self) -> int:
+        total = 0
+        for dirpath, _, files in os.walk(self.path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
 
 
 # =============================================================================
@@ -332,13 +872,43 @@ class USBTetheringMonitor:
 class SRSServerManager:
     """
     Manages SRS server process for USB streaming.
+
+    Also the media-server backend interface: subclasses swap the executable,
+    config format and HTTP API (see MonibucaServerManager) while start,
+    readiness, rebind and hot swap stay shared.
     """
 
-    def __init__(self, srs_home: Path):
+    name = "srs"
+    label = "SRS"
+    exe_name = "srs.exe"
+    default_endpoints = PRIMARY_ENDPOINTS
+    ready_path = "/api/v1/versions"
+    flv_path = "/{app}/{stream}.flv"
+
+    def __init__(self, srs_home: Path, log_forward_rate: float = 20.0,
+                 endpoints: Optional[SRSEndpoints] = None, hls_ram_root: Optional[Path] = None,
+                 priority: Optional[PriorityProfile] = None):
+        endpoints = endpoints or self.default_endpoints
         self.srs_home = srs_home
-        self.srs_exe = srs_home / "objs" / "srs.exe"
+        self.srs_exe = srs_home / "objs" / self.exe_name
         self.config_dir = srs_home / "config" / "active"
+        self.runtime_dir = srs_home / "objs" / "runtime"
         self.process: Optional[subprocess.Popen] = None
+        self.log_forward_rate = log_forward_rate
+        self.log_consumer: Optional[SRSLogConsumer] = None
+        self.endpoints = endpoints
+        self.config_path: Optional[Path] = None
+        self.launch_path: Optional[Path] = None
+        self.listen_host = "127.0.0.1"
+        # Address the RTMP listener is bound to, None when it listens on all
+        self.bind_host: Optional[str] = None
+        self._render_bind_ip: Optional[str] = None
+        self.hls_ram_root = hls_ram_root
+        self.hls_store = HLSRamStore(hls_ram_root, str(endpoints.rtmp_port)) if hls_ram_root else None
+        self.hls_in_ram = False
+        # None keeps the profile's hls enabled flag
+        self.hls_enabled: Optional[bool] = None
+        self.priority = priority
 
     def get_usb_config(self) -> Path:
         """Get or create USB-optimized config."""
@@ -359,69 +929,360 @@ class SRSServerManager:
 
         raise FileNotFoundError(f"No config files found in {self.config_dir}")
 
-    def start(self, bind_ip: str = "0.0.0.0") -> bool:
+    def render_runtime_config(self, config_path: Path, bind_ip: Optional[str] = None) -> Path:
+        """
+        Render a copy of config_path listening on this instance's ports, with
+        its own pid file so two SRS instances can run side by side.
+        bind_ip moves every listener to that address. The copy also enables
+        the raw API reload call so a later rebind can be applied in place.
         """
-        Start SRS server bound to specified IP.
+        config = SRSConfig.load(config_path)
+        set_endpoints(config, self.endpoints.rtmp_port, self.endpoints.api_port, self.endpoints.http_port,
+                      bind_ip=bind_ip)
+        config.set("pid", f"./objs/runtime/srs.{self.endpoints.rtmp_port}.pid")
+        if config.find("http_api"):
+            config.set("http_api/raw_api/enabled", "on")
+            config.set("http_api/raw_api/allow_reload", "on")
+        if self.hls_enabled is not None:
+            config.set("vhost/hls/enabled", "on" if self.hls_enabled else "off")
+        if self.hls_store and config.get_bool("vhost/hls/enabled"):
+            self.hls_in_ram = self.hls_store.apply(config, self.srs_home / "objs" / "nginx" / "html")
+        return config.save(
+            self.runtime_dir / f"{config_path.stem}.{self.endpoints.rtmp_port}.conf",
+            header=f"Generated from {config_path.name} by usb_tethering_monitor.py - do not edit",
+        )
+
+    def config_rtmp_host(self, config_path: Path) -> Optional[str]:
+        """Address the RTMP listener in config_path binds to, None for all."""
+        rtmp_host, _ = get_endpoints(SRSConfig.load(config_path)).get("rtmp", (None, 0))
+        return rtmp_host
+
+    def start(self, bind_ip: Optional[str] = None, config_path: Optional[Path] = None) -> bool:
+        """
+        Start SRS server bound to specified IP (None keeps the addresses the
+        config already has, "0.0.0.0" listens on every address).
         """
         if self.process and self.process.poll() is None:
-            logger.info("SRS already running (PID: {})".format(self.process.pid))
+            logger.info("{} already running (PID: {})".format(self.label, self.process.pid))
             return True
 
         if not self.srs_exe.exists():
-            logger.error(f"SRS executable not found: {self.srs_exe}")
+            logger.error(f"{self.label} executable not found: {self.srs_exe}")
             return False
 
         try:
-            config_path = self.get_usb_config()
-            logger.info(f"Starting SRS with config: {config_path.name}")
+            config_path = config_path or self.get_usb_config()
+            self.config_path = config_path
+            launch_path = config_path
+            self._render_bind_ip = bind_ip
+            if self.endpoints != self.default_endpoints or self._render_bind_ip or self.hls_store \
+                    or self.hls_enabled is not None:
+                launch_path = self.render_runtime_config(config_path, bind_ip=self._render_bind_ip)
+            self.launch_path = launch_path
+            rtmp_host = self.config_rtmp_host(launch_path)
+            self.bind_host = rtmp_host if rtmp_host not in (None, "0.0.0.0") else None
+            self.listen_host = self.bind_host or "127.0.0.1"
+            logger.info(f"Starting {self.label} with config: {config_path.name} "
+                        f"(RTMP port {self.endpoints.rtmp_port})")
 
             self.process = subprocess.Popen(
-                [str(self.srs_exe), "-c", str(config_path)],
+                [str(self.srs_exe), "-c", str(launch_path)],
                 cwd=str(self.srs_home),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 text=True,
+                bufsize=1,
                 creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
             )
 
+            # Drain stdout for the whole lifetime of the process
+            self.log_consumer = SRSLogConsumer(self.process.stdout, forward_rate=self.log_forward_rate)
+            self.log_consumer.start()
+
+            if self.priority:
+                for line in apply_profile(self.process.pid, self.priority, role=self.name):
+                    (logger.info if line.startswith("ok") else logger.warning)(f"{self.label} priority: {line}")
+
             # Wait a moment and check if started
             time.sleep(2)
             if self.process.poll() is not None:
-                # Process exited - read output for error
-                output, _ = self.process.communicate()
-                logger.error(f"SRS failed to start: {output[:500] if output else 'Unknown error'}")
+                # Process exited - the consumer holds the last output lines
+                self.log_consumer.join(timeout=2)
+                output = "\n".join(self.log_consumer.tail())
+                logger.error(f"{self.label} failed to start: {output[-500:] if output else 'Unknown error'}")
                 return False
 
-            logger.info(f"SRS server started (PID: {self.process.pid})")
+            logger.info(f"{self.label} server started (PID: {self.process.pid})")
             return True
 
         except FileNotFoundError as e:
             logger.error(f"Config error: {e}")
             return False
         except Exception as e:
-            logger.error(f"Failed to start SRS: {e}")
+            logger.error(f"Failed to start {self.label}: {e}")
             return False
 
     def stop(self):
         """Stop SRS server."""
         if self.process:
-            logger.info("Stopping SRS server...")
+            logger.info(f"Stopping {self.label} server...")
             try:
                 self.process.terminate()
                 self.process.wait(timeout=5)
-                logger.info("SRS server stopped")
+                logger.info(f"{self.label} server stopped")
             except subprocess.TimeoutExpired:
-                logger.warning("SRS did not stop gracefully, killing...")
+                logger.warning(f"{self.label} did not stop gracefully, killing...")
                 self.process.kill()
             except Exception as e:
-                logger.error(f"Error stopping SRS: {e}")
+                logger.error(f"Error stopping {self.label}: {e}")
             finally:
+                if self.log_consumer:
+                    self.log_consumer.join(timeout=2)
                 self.process = None
+                if self.hls_store:
+                    self.hls_store.cleanup()
 
     def is_running(self) -> bool:
         """Check if SRS is running."""
         return self.process is not None and self.process.poll() is None
 
+    def api_get(self, path: str, timeout: float = 1.0) -> Optional[dict]:
+        """GET a JSON resource from this instance's HTTP API, None on failure."""
+        url = f"http://{self.listen_host}:{self.endpoints.api_port}{path}"
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+        except Exception:
+            return None
+
+    def wait_until_ready(self, timeout: float = 10.0) -> bool:
+        """Block until both the HTTP API and the RTMP port answer."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if not self.is_running():
+                return False
+            if self.api_get(self.ready_path) is not None:
+                try:
+                    socket.create_connection((self.listen_host, self.endpoints.rtmp_port), timeout=1.0).close()
+                    return True
+                except OSError:
+                    pass
+            time.sleep(0.2)
+        return False
+
+    def health(self) -> dict:
+        """Backend-neutral health summary: process, API reachability, version, publishers."""
+        info = self.api_get(self.ready_path) if self.is_running() else None
+        published = self.published_streams() if info is not None else None
+        return {
+            "backend": self.name,
+            "running": self.is_running(),
+            "pid": self.process.pid if self.is_running() else None,
+            "api": info is not None,
+            "version": self._version(info) if info is not None else None,
+            "publishers": sorted(published) if published is not None else None,
+        }
+
+    def _version(self, info: dict) -> Optional[str]:
+        return (info.get("data") or {}).get("version")
+
+    def flv_url(self, stream: str = "srs", app: str = "live", host: Optional[str] = None) -> str:
+        """HTTP-FLV playback URL of a stream on this instance."""
+        path = self.flv_path.format(app=app, stream=stream)
+        return f"http://{host or self.listen_host}:{self.endpoints.http_port}{path}"
+
+    def rebind(self, bind_ip: str, timeout: float = 5.0) -> Optional[str]:
+        """
+        Move a running instance bound to one address over to bind_ip
+        ("0.0.0.0" for every address).
+
+        The runtime copy of the config is re-rendered with the new listen,
+        http_api and http_server addresses. If SRS was already launched from
+        that copy it is asked to reload it (raw API, or SIGHUP where signals
+        exist); when the new listener does not come up within timeout, or
+        SRS was launched from a shared config, it is restarted on the copy.
+        Returns "reload", "restart", or None if the rebind failed.
+        """
+        if not self.is_running() or not self.config_path:
+            return None
+        launched_from_copy = self._launched_from_copy()
+        launch_path = self.render_runtime_config(self.config_path, bind_ip=bind_ip)
+        self._render_bind_ip = bind_ip
+
+        if launched_from_copy and launch_path == self.launch_path:
+            if not self.reload():
+                logger.info(f"{self.label} cannot reload its config, restarting it on {bind_ip}")
+            elif self._wait_for_listener(self._local_address(bind_ip), timeout):
+                self.bind_host = bind_ip if bind_ip != "0.0.0.0" else None
+                self.listen_host = self._local_address(bind_ip)
+                return "reload"
+            else:
+                logger.warning(f"{self.label} did not pick up {bind_ip} on reload, restarting it")
+
+        self.stop()
+        if not self.start(bind_ip=bind_ip, config_path=self.config_path):
+            return None
+        return "restart"
+
+    @staticmethod
+    def _local_address(bind_ip: str) -> str:
+        # A wildcard listener is reached on loopback
+        return "127.0.0.1" if bind_ip == "0.0.0.0" else bind_ip
+
+    def _launched_from_copy(self) -> bool:
+        return self.launch_path is not None and self.launch_path.parent == self.runtime_dir
+
+    def reload(self) -> bool:
+        """Ask SRS to re-read its config: raw API first, SIGHUP where signals exist."""
+        # SRS answers 200 with a non-zero code when raw_api is disabled
+        if (self.api_get("/api/v1/raw?rpc=reload") or {}).get("code") == 0:
+            return True
+        if hasattr(signal, "SIGHUP"):
+            try:
+                os.kill(self.process.pid, signal.SIGHUP)
+                return True
+            except OSError:
+                pass
+        return False
+
+    def hls_consumers(self) -> Optional[int]:
+        """Number of HLS players SRS is tracking, None if the API is unreachable."""
+        clients = self.api_get("/api/v1/clients/?count=1000")
+        if clients is None:
+            return None
+        return sum(1 for c in clients.get("clients", []) if "hls" in str(c.get("type", "")).lower())
+
+    def set_hls(self, enabled: bool) -> bool:
+        """
+        Turn HLS output on or off on the running instance via a config
+        reload. Never restarts SRS for this: a dropped publisher costs more
+        than the disk churn. Returns True if SRS accepted the reload.
+        """
+        previous = self.hls_enabled
+        self.hls_enabled = enabled
+        if not self.is_running() or not self.config_path or not self._launched_from_copy():
+            # Takes effect on the next start, which renders a copy
+            return False
+        if self.render_runtime_config(self.config_path, bind_ip=self._render_bind_ip) != self.launch_path \
+                or not self.reload():
+            self.hls_enabled = previous
+            self.render_runtime_config(self.config_path, bind_ip=self._render_bind_ip)
+            return False
+        if not enabled and self.hls_store:
+            self.hls_store.cleanup()
+        return True
+
+    def _wait_for_listener(self, host: str, timeout: float) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline and self.is_running():
+            try:
+                socket.create_connection((host, self.endpoints.rtmp_port), timeout=0.5).close()
+                return True
+            except OSError:
+                time.sleep(0.1)
+        return False
+
+    def published_streams(self) -> Optional[set]:
+        """Names of actively published streams, None if the API is unreachable."""
+        streams = self.api_get("/api/v1/streams/")
+        if streams is None:
+            return None
+        return {s.get("name") for s in streams.get("streams", []) if s.get("publish", {}).get("active")}
+
+    def has_publisher(self) -> bool:
+        """True if the API reports at least one actively published stream."""
+        return bool(self.published_streams())
+
+    def drain_and_stop(self, timeout: float = 10.0):
+        """
+        Wait for the publisher to leave (it re-publishes to the new instance
+        once the bridge has been retargeted), then stop this instance.
+        """
+        deadline = time.time() + timeout
+        while self.is_running() and time.time() < deadline and self.has_publisher():
+            time.sleep(0.5)
+        self.stop()
+
+
+
+class MonibucaServerManager(SRSServerManager):
+    """
+    Runs objs/monibuca.exe with the YAML profiles in conf/.
+
+    Monibuca v4 serves its API, console and HTTP-FLV on one port (8081),
+    plays FLV under /hdl/ and has no config reload, so a rebind always
+    restarts it. HLS is left to the profile: the RAM store and idle-off
+    switch only know SRS directives.
+    """
+
+    name = "monibuca"
+    label = "Monibuca"
+    exe_name = "monibuca.exe"
+    default_endpoints = MONIBUCA_ENDPOINTS
+    ready_path = "/api/sysinfo"
+    flv_path = "/hdl/{app}/{stream}.flv"
+
+    def __init__(self, srs_home: Path, log_forward_rate: float = 20.0,
+                 endpoints: Optional[SRSEndpoints] = None, hls_ram_root: Optional[Path] = None,
+                 priority: Optional[PriorityProfile] = None):
+        super().__init__(srs_home, log_forward_rate=log_forward_rate, endpoints=endpoints,
+                         hls_ram_root=hls_ram_root, priority=priority)
+        self.config_dir = srs_home / "conf"
+        if self.hls_store:
+            logger.warning("HLS RAM store is SRS-only; Monibuca keeps the profile's hls path")
+            self.hls_store = None
+
+    def get_usb_config(self) -> Path:
+        for name in ("monibuca_iphone_optimized.yaml", "monibuca_iphone_low_latency.yaml"):
+            config_path = self.config_dir / name
+            if config_path.exists():
+                return config_path
+        conf_files = sorted(self.config_dir.glob("monibuca*.yaml"))
+        if conf_files:
+            return conf_files[0]
+        raise FileNotFoundError(f"No Monibuca configs found in {self.config_dir}")
+
+    def render_runtime_config(self, config_path: Path, bind_ip: Optional[str] = None) -> Path:
+        config = MonibucaConfig.load(config_path)
+        set_monibuca_endpoints(config, self.endpoints.rtmp_port, self.endpoints.http_port, bind_ip=bind_ip)
+        if self.hls_enabled is not None and config.get("hls/enable") is not None:
+            config.set("hls/enable", "true" if self.hls_enabled else "false")
+        return config.save(
+            self.runtime_dir / f"{config_path.stem}.{self.endpoints.rtmp_port}.yaml",
+            header=f"Generated from {config_path.name} by usb_tethering_monitor.py - do not edit",
+        )
+
+    def config_rtmp_host(self, config_path: Path) -> Optional[str]:
+        rtmp_host, _ = get_monibuca_endpoints(MonibucaConfig.load(config_path)).get("rtmp", (None, 0))
+        return rtmp_host
+
+    def _version(self, info: dict) -> Optional[str]:
+        return info.get("Version") or info.get("version")
+
+    def reload(self) -> bool:
+        return False
+
+    def published_streams(self) -> Optional[set]:
+        summary = self.api_get("/api/summary")
+        if summary is None:
+            return None
+        streams = summary.get("Streams") or summary.get("streams") or []
+        # Paths look like "live/srs"; the controller tracks the stream key
+        return {str(s.get("Path") or s.get("StreamPath") or "").rpartition("/")[2] for s in streams} - {""}
+
+    def hls_consumers(self) -> Optional[int]:
+        return None
+
+    def set_hls(self, enabled: bool) -> bool:
+        # Applied on the next start; never worth a restart
+        self.hls_enabled = enabled
+        return False
+
+
+SERVER_BACKENDS = {
+    SRSServerManager.name: SRSServerManager,
+    MonibucaServerManager.name: MonibucaServerManager,
+}
 
 # =============================================================================
 # USB STREAMING CONTROLLER
@@ -432,15 +1293,292 @@ class USBStreamingController:
     Main controller for USB streaming workflow.
     """
 
-    def __init__(self, srs_home: Path):
-        self.monitor = USBTetheringMonitor()
-        self.srs_manager = SRSServerManager(srs_home)
+    def __init__(self, srs_home: Path, srs_log_rate: float = 20.0, latency_budget_ms: Optional[float] = None,
+                 poll_interval: Optional[float] = None, probe_budget: float = 0.10,
+                 control_port: Optional[int] = CONTROLLER_CONTROL_PORT,
+                 link_stats_interval: float = 0.5, hls_ram_root: Optional[Path] = None,
+                 hls_idle_off: float = 0.0, priority: Optional[PriorityProfile] = None,
+                 server: str = "srs", bridge_control_port: Optional[int] = LISTENER_CONTROL_PORT):
+        self.srs_home = srs_home
+        self.srs_log_rate = srs_log_rate
+        self.latency_budget_ms = latency_budget_ms
+        # None polls adaptively; a number restores the old fixed cadence
+        self.poll_interval = poll_interval
+        self.monitor = USBTetheringMonitor(AdaptivePoller(probe_budget=probe_budget))
+        self.hls_ram_root = hls_ram_root
+        # Seconds without HLS players before HLS output is switched off, 0 never
+        self.hls_idle_off = hls_idle_off
+        self._hls_last_consumer = time.time()
+        self.priority = priority
+        self.server_class = SERVER_BACKENDS[server]
+        self.srs_manager = self.server_class(srs_home, log_forward_rate=srs_log_rate, hls_ram_root=hls_ram_root,
+                                             priority=priority)
+        # The port phones publish to. A hot swap moves SRS to the alternate
+        # port set behind the bridge; the advertised URL keeps this one.
+        self.rtmp_port = self.srs_manager.endpoints.rtmp_port
         self._running = False
+        # Serialises srs_manager changes (start, rebind, HLS reload, hot swap)
+        # between the monitor loop and control API commands
+        self._srs_lock = threading.RLock()
         self.current_rtmp_url = None
-
-    def generate_rtmp_url(self, tethering_info: USBTetheringInfo) -> str:
+        # usbmux bridge control API; a hot swap moves the bridge over first
+        self.bridge_control_port = bridge_control_port
+        self.last_switch: Optional[dict] = None
+        self._drain_thread: Optional[threading.Thread] = None
+        self.last_rebind: Optional[dict] = None
+        # Kernel counters of each tethered adapter, to tell USB link trouble
+        # apart from encoder/SRS stutter
+        self.link_stats = LinkStatsCollector(interval=link_stats_interval) if link_stats_interval > 0 else None
+        # Launcher health checks read this instead of spawning PowerShell
+        self.control: Optional[ControlServer] = None
+        if control_port:
+            self.control = ControlServer("usb_streaming_controller", port=control_port)
+            self.control.register("reconnect", self._cmd_reconnect)
+            self.control.register("switch-profile", self._cmd_switch_profile)
+            self.control.register("hls", self._cmd_hls)
+
+    def generate_rtmp_url(self, tethering_info: USBTetheringInfo, stream_key: str = "srs") -> str:
         """Generate RTMP URL for iPhone to connect to."""
-        return f"rtmp://{tethering_info.pc_ip}:1935/live/srs"
+        return f"rtmp://{tethering_info.pc_ip}:{self.rtmp_port}/live/{stream_key}"
+
+    def tethered_addresses(self) -> set:
+        """PC-side address of every phone still tracked (connected or within its grace period)."""
+        addresses = {session.info.pc_ip for session in self.monitor.devices.values()
+                     if session.state != ConnectionState.DISCONNECTED}
+        if not addresses and self.monitor.tethering_info:
+            addresses.add(self.monitor.tethering_info.pc_ip)
+        return addresses
+
+    def bind_address(self, addresses: set) -> str:
+        """The one tethered address, or "0.0.0.0" once several phones share the one SRS."""
+        return next(iter(addresses)) if len(addresses) == 1 else "0.0.0.0"
+
+    def compile_profile(self, tethering_info: USBTetheringInfo) -> Optional[Path]:
+        """Render an SRS config for the latency budget, bound to the tethering IP(s)."""
+        if self.server_class is not SRSServerManager:
+            logger.warning(f"Latency budgets compile SRS configs only; {self.srs_manager.label} keeps its profile")
+            return None
+        bind_ip = self.bind_address(self.tethered_addresses() or {tethering_info.pc_ip})
+        try:
+            config = compile_config(self.latency_budget_ms, bind_ip=bind_ip)
+        except SRSConfigError as e:
+            logger.error(f"Cannot compile config for {self.latency_budget_ms:.0f} ms budget: {e}")
+            return None
+        estimate = describe_estimate(estimate_latency(config))
+        path = config.save(
+            self.srs_manager.runtime_dir / f"srs_budget_{self.latency_budget_ms:.0f}ms.conf",
+            header=f"Compiled by usb_tethering_monitor.py for {bind_ip}\nEstimate: {estimate}",
+        )
+        logger.info(f"Compiled SRS config for {self.latency_budget_ms:.0f} ms budget: {estimate}")
+        return path
+
+    def retarget_bridge(self, host: str, rtmp_port: int, timeout: float = 5.0) -> bool:
+        """
+        Point the usbmux bridge at host:rtmp_port through its control API.
+        True once the bridge confirms; False if it is disabled or unreachable.
+        """
+        if not self.bridge_control_port:
+            return False
+        try:
+            reply = control_request("POST", "/command/retarget", {"host": host, "port": rtmp_port},
+                                    port=self.bridge_control_port, timeout=timeout)
+        except (OSError, ValueError) as e:
+            logger.warning(f"usbmux bridge not reachable on port {self.bridge_control_port}: {e}")
+            return False
+        if not reply.get("ok"):
+            logger.warning(f"usbmux bridge refused retarget to {host}:{rtmp_port}: {reply.get('error')}")
+            return False
+        logger.info(f"usbmux bridge now targets {reply.get('srs_target')}")
+        return True
+
+    def switch_profile(self, config_path: Path, drain_timeout: float = 10.0) -> bool:
+        """
+        Hot-swap SRS to another config without a stop/start gap.
+
+        A warm-standby SRS is started with the new config on the alternate
+        port set. The phone only ever sees the bridge's port, so the swap
+        needs the usbmux bridge: once the standby is ready the bridge is
+        retargeted and drops the live session, and the phone re-publishes
+        through it to the standby. The publisher reconnects once, costing
+        about one keyframe interval. The old instance is drained and stopped
+        in the background, so this returns as soon as the bridge has moved.
+        If the bridge cannot be retargeted the standby is stopped and the
+        current profile kept.
+        """
+        with self._srs_lock:
+            # The previous swap's old instance may still hold the alternate ports
+            if self._drain_thread:
+                self._drain_thread.join()
+                self._drain_thread = None
+            old = self.srs_manager
+            standby = self.server_class(self.srs_home, log_forward_rate=self.srs_log_rate,
+                                        endpoints=old.endpoints.alternate(), hls_ram_root=self.hls_ram_root,
+                                        priority=self.priority)
+            standby.hls_enabled = old.hls_enabled
+            logger.info(f"Hot swap: starting standby {standby.label} with {config_path.name}...")
+            if not standby.start(config_path=config_path) or not standby.wait_until_ready():
+                logger.error(f"Standby {standby.label} did not become ready; keeping current profile")
+                standby.stop()
+                return False
+            if not self.retarget_bridge(standby.listen_host, standby.endpoints.rtmp_port):
+                logger.error("Hot swap needs the usbmux bridge (usb_usbmux_listener.py) to move the phone over; "
+                             "keeping current profile")
+                standby.stop()
+                return False
+
+            cutover_start = time.time()
+            self.srs_manager = standby
+
+            if self.monitor.tethering_info:
+                self.current_rtmp_url = self.generate_rtmp_url(self.monitor.tethering_info)
+                logger.info(f"  RTMP URL: {self.current_rtmp_url}")
+            for session in self.monitor.devices.values():
+                logger.info(f"  {session.adapter_name}: {self.generate_rtmp_url(session.info, session.stream_key)}")
+
+            self.last_switch = {"config": str(config_path), "at": cutover_start, "drain_s": None}
+            # The old instance is no longer srs_manager; draining it needs no lock
+            self._drain_thread = threading.Thread(target=self._drain_old_instance,
+                                                  args=(old, config_path, cutover_start, drain_timeout),
+                                                  name="srs-drain", daemon=True)
+            self._drain_thread.start()
+        self.publish_status()
+        return True
+
+    def _drain_old_instance(self, old: SRSServerManager, config_path: Path, cutover_start: float,
+                            timeout: float):
+        old.drain_and_stop(timeout=timeout)
+        drain_s = round(time.time() - cutover_start, 2)
+        logger.info(f"Hot swap complete: {config_path.name} on port {self.srs_manager.endpoints.rtmp_port} "
+                    f"(old instance drained in {drain_s:.1f}s)")
+        if self.last_switch and self.last_switch["at"] == cutover_start:
+            self.last_switch["drain_s"] = drain_s
+        self.publish_status()
+
+    def check_bind_address(self):
+        """
+        Rebind SRS when its address no longer covers every tethered phone:
+        one phone that came back with a different PC address, or a second
+        phone on another adapter (SRS then moves to all addresses, and stays
+        there when phones leave). Only applies to configs listening on one
+        specific address; wildcard and loopback (usbmux bridge) listeners
+        are left alone.
+        """
+        with self._srs_lock:
+            srs = self.srs_manager
+            addresses = self.tethered_addresses()
+            if not addresses or not srs.is_running() or srs.bind_host is None:
+                return
+            if addresses == {srs.bind_host} or srs.bind_host.startswith("127."):
+                return
+
+            old_ip = srs.bind_host
+            new_ip = self.bind_address(addresses)
+            logger.info(f"Tethering addresses now {', '.join(sorted(addresses))} (SRS on {old_ip}), "
+                        f"rebinding SRS to {new_ip}...")
+            started = time.time()
+            method = srs.rebind(new_ip)
+            elapsed = time.time() - started
+            self.last_rebind = {"from": old_ip, "to": new_ip, "method": method, "at": started,
+                                "seconds": round(elapsed, 3)}
+            if method is None:
+                logger.error(f"SRS rebind to {new_ip} failed after {elapsed:.2f}s")
+                return
+
+            logger.info(f"SRS now listening on {new_ip} ({method}, changeover {elapsed:.2f}s)")
+            # Only matters when a bridge runs; it keeps its target otherwise
+            self.retarget_bridge(srs.listen_host, srs.endpoints.rtmp_port)
+            for session in self.monitor.devices.values():
+                logger.info(f"  {session.adapter_name}: {self.generate_rtmp_url(session.info, session.stream_key)}")
+
+    def status(self) -> dict:
+        """Current controller state as served by the control API."""
+        srs = self.srs_manager
+        info = self.monitor.tethering_info
+        return {
+            "state": self.monitor.state.value,
+            "rtmp_url": self.current_rtmp_url,
+            "pc_ip": info.pc_ip if info else None,
+            "iphone_ip": info.iphone_ip if info else None,
+            "srs": {
+                "backend": srs.name,
+                "pid": srs.process.pid if srs.is_running() else None,
+                "running": srs.is_running(),
+                "config": str(srs.config_path) if srs.config_path else None,
+                "bind_host": srs.bind_host,
+                "rtmp_port": srs.endpoints.rtmp_port,
+                "api_port": srs.endpoints.api_port,
+                "last_kbps": asdict(srs.log_consumer.last_kbps)
+                if srs.log_consumer and srs.log_consumer.last_kbps else None,
+                "hls_enabled": srs.hls_enabled,
+                "hls_dir": str(srs.hls_store.path) if srs.hls_in_ram else None,
+                "hls_ram_bytes": srs.hls_store.used_bytes() if srs.hls_in_ram else None,
+                "hls_ram_reserved": srs.hls_store.required_bytes if srs.hls_in_ram else None,
+            },
+            "devices": [
+                {
+                    "adapter": session.adapter_name,
+                    "state": session.state.value,
+                    "rtmp_url": self.generate_rtmp_url(session.info, session.stream_key),
+                    "probe_ms": session.probe_ms,
+                    "reconnects": session.reconnects,
+                    "lost_since": session.lost_since,
+                    "link": self.link_stats.recent(session.adapter_name) if self.link_stats else None,
+                }
+                for session in self.monitor.devices.values()
+            ],
+            "probes": self.monitor.poller.metrics(),
+            "last_switch": self.last_switch,
+            "last_rebind": self.last_rebind,
+        }
+
+    def publish_status(self):
+        if self.control:
+            self.control.update(self.status())
+
+    def _cmd_reconnect(self, args: dict) -> dict:
+        self.monitor.wake()
+        return {"ok": True, "state": self.monitor.state.value}
+
+    def _cmd_hls(self, args: dict) -> dict:
+        enabled = bool(args.get("enabled", True))
+        with self._srs_lock:
+            ok = self.srs_manager.set_hls(enabled)
+            self._hls_last_consumer = time.time()
+            return {"ok": ok, "hls_enabled": self.srs_manager.hls_enabled}
+
+    def check_hls_demand(self):
+        """Switch HLS output off once no HLS player has been seen for hls_idle_off seconds."""
+        with self._srs_lock:
+            srs = self.srs_manager
+            if not self.hls_idle_off or srs.hls_enabled is False or not srs.is_running():
+                return
+            consumers = srs.hls_consumers()
+            if consumers is None:
+                return
+            if consumers > 0:
+                self._hls_last_consumer = time.time()
+            elif time.time() - self._hls_last_consumer >= self.hls_idle_off:
+                if srs.set_hls(False):
+                    logger.info(f"No HLS players for {self.hls_idle_off:.0f}s, HLS output switched off "
+                                f"(re-enable with: python control_api.py hls)")
+                else:
+                    # Reload not possible on this instance; don't keep trying every poll
+                    self._hls_last_consumer = time.time()
+
+    def _cmd_switch_profile(self, args: dict) -> dict:
+        if args.get("config"):
+            config_path = Path(args["config"])
+            if not config_path.is_absolute():
+                config_path = self.srs_home / config_path
+        elif args.get("budget_ms") and self.monitor.tethering_info:
+            self.latency_budget_ms = float(args["budget_ms"])
+            config_path = self.compile_profile(self.monitor.tethering_info)
+        else:
+            raise ValueError("switch-profile needs 'config', or 'budget_ms' while a phone is connected")
+        if not config_path or not config_path.exists():
+            raise ValueError(f"config not found: {config_path}")
+        ok = self.switch_profile(config_path)
+        return {"ok": ok, "rtmp_url": self.current_rtmp_url}
 
     def copy_to_clipboard(self, text: str) -> bool:
         """Copy text to Windows clipboard."""
@@ -454,30 +1592,64 @@ class USBStreamingController:
         except Exception:
             return False
 
-    def on_connection_change(self, connected: bool, info: Optional[USBTetheringInfo]):
-        """Handle connection state changes."""
-        if connected and info:
-            self.current_rtmp_url = self.generate_rtmp_url(info)
+    def on_device_change(self, session: DeviceSession):
+        """Handle a state change of one phone when several are tethered."""
+        url = self.generate_rtmp_url(session.info, session.stream_key)
+        if self.link_stats:
+            if session.state == ConnectionState.CONNECTED and not self.link_stats.add(session.adapter_name):
+                logger.debug(f"No link counters for {session.adapter_name}: "
+                             f"{self.link_stats.errors.get(session.adapter_name)}")
+            self.link_stats.mark(session.adapter_name, session.state.value)
+            if session.state != ConnectionState.CONNECTED:
+                logger.info(f"{session.adapter_name} link before loss: "
+                            f"{format_stats(self.link_stats.recent(session.adapter_name, 10.0))}")
+        if session.state == ConnectionState.CONNECTED:
             logger.info("")
             logger.info("=" * 60)
-            logger.info("  USB STREAMING READY!")
-            logger.info(f"  RTMP URL: {self.current_rtmp_url}")
+            logger.info(f"  PHONE READY: {session.adapter_name} (iPhone {session.info.iphone_ip})")
+            logger.info(f"  RTMP URL: {url}")
             logger.info("=" * 60)
             logger.info("")
-
-            # Copy to clipboard
-            if self.copy_to_clipboard(self.current_rtmp_url):
-                logger.info("  RTMP URL copied to clipboard!")
-
-            logger.info("  Configure your iPhone VCAM app to connect to this URL")
-            logger.info("  Or use .deb with IP: {}".format(info.pc_ip.replace(".", "_")))
-            logger.info("")
-        else:
-            self.current_rtmp_url = None
-            logger.warning("")
-            logger.warning("USB connection lost - streaming may be interrupted")
-            logger.warning("Waiting for reconnection...")
-            logger.warning("")
+        elif session.state == ConnectionState.RECONNECTING:
+            logger.warning(f"{session.adapter_name}: connection interrupted, waiting for it to come back...")
+        elif session.state == ConnectionState.DISCONNECTED:
+            logger.warning(f"{session.adapter_name}: disconnected (grace period expired); "
+                           f"stream key '{session.stream_key}' is kept for its return")
+
+        if session.state == ConnectionState.CONNECTED:
+            self.check_bind_address()
+
+        # Single-phone view for callers that only know about one device
+        info = self.monitor.tethering_info
+        self.current_rtmp_url = self.generate_rtmp_url(info, self.monitor.devices[info.adapter_name].stream_key) \
+            if info and info.adapter_name in self.monitor.devices else None
+        self.publish_status()
+
+    def on_poll(self):
+        """After every monitor pass: catch silent address changes, refresh stream states."""
+        # A hot swap holds the lock while its standby starts; skip this pass
+        # rather than stall device polling behind it
+        if not self._srs_lock.acquire(blocking=False):
+            return
+        try:
+            self.check_bind_address()
+            self.check_hls_demand()
+            self.refresh_stream_states()
+        finally:
+            self._srs_lock.release()
+
+    def refresh_stream_states(self):
+        """Mark devices STREAMING/CONNECTED from the streams SRS reports as published."""
+        published = self.srs_manager.published_streams()
+        if published is not None:
+            for session in self.monitor.devices.values():
+                if session.state == ConnectionState.CONNECTED and session.stream_key in published:
+                    session.state = ConnectionState.STREAMING
+                    logger.info(f"{session.adapter_name}: streaming on /live/{session.stream_key}")
+                elif session.state == ConnectionState.STREAMING and session.stream_key not in published:
+                    session.state = ConnectionState.CONNECTED
+                    logger.warning(f"{session.adapter_name}: stream /live/{session.stream_key} stopped publishing")
+        self.publish_status()
 
     def run(self):
         """
@@ -498,28 +1670,39 @@ class USBStreamingController:
         print("=" * 60)
         print("")
 
+        if self.control and self.control.start():
+            logger.info(f"Control API: {self.control.address}/status")
+        if self.link_stats:
+            self.link_stats.start()
+        self.publish_status()
+
         try:
             while self._running:
                 # Wait for connection
                 try:
-                    info = self.monitor.wait_for_connection()
+                    info = self.monitor.wait_for_connection(self.poll_interval)
                 except InterruptedError:
                     break
 
                 # Start SRS if not running
-                if not self.srs_manager.is_running():
-                    if not self.srs_manager.start():
-                        logger.error("Failed to start SRS, retrying in 5s...")
-                        time.sleep(5)
-                        continue
-
-                # Show connection info
-                self.on_connection_change(True, info)
-
-                # Monitor connection (blocks until stop or disconnect)
-                self.monitor.monitor_connection(
-                    callback=self.on_connection_change,
-                    poll_interval=3.0
+                with self._srs_lock:
+                    started = self.srs_manager.is_running()
+                    if not started:
+                        config_path = self.compile_profile(info) if self.latency_budget_ms else None
+                        started = self.srs_manager.start(config_path=config_path)
+                if not started:
+                    logger.error("Failed to start SRS, retrying in 5s...")
+                    time.sleep(5)
+                    continue
+                self.check_bind_address()
+                self.publish_status()
+
+                # Monitor every tethered phone against the one SRS instance
+                # (blocks until stop)
+                self.monitor.monitor_devices(
+                    callback=self.on_device_change,
+                    poll_interval=self.poll_interval,
+                    on_poll=self.on_poll
                 )
 
         except KeyboardInterrupt:
@@ -533,6 +1716,20 @@ class USBStreamingController:
         self._running = False
         self.monitor.stop()
         self.srs_manager.stop()
+        if self._drain_thread:
+            # Don't leave a swapped-out instance running behind us
+            self._drain_thread.join()
+        logger.info(f"Probe metrics: {self.monitor.poller.describe()}")
+        if self.link_stats:
+            self.link_stats.stop()
+            for entry in self.link_stats.correlate():
+                bursts = sum(b["errors"] for b in entry["error_bursts"])
+                logger.info(f"Link around {entry['interface']} -> {entry['state']} at "
+                            f"{time.strftime('%H:%M:%S', time.localtime(entry['at']))}: "
+                            f"before [{format_stats(entry['before'])}], after [{format_stats(entry['after'])}], "
+                            f"{bursts} errors/drops in bursts")
+        if self.control:
+            self.control.stop()
         logger.info("USB Streaming Controller stopped")
 
 
@@ -577,6 +1774,88 @@ Setup Instructions:
         default="usb_tethering.log",
         help="Log file path (default: usb_tethering.log)"
     )
+    parser.add_argument(
+        "--srs-log-rate",
+        type=float,
+        default=20.0,
+        help="Max SRS log lines/s forwarded to the log file, 0 disables (default: 20)"
+    )
+
+    parser.add_argument(
+        "--latency-budget",
+        type=float,
+        default=None,
+        metavar="MS",
+        help="Compile an SRS config for this latency budget, bound to the tethering IP"
+    )
+
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Probe at a fixed interval instead of adapting to link stability"
+    )
+    parser.add_argument(
+        "--probe-budget",
+        type=float,
+        default=0.10,
+        metavar="FRACTION",
+        help="Max fraction of wall time spent probing the link, 0 disables (default: 0.10)"
+    )
+
+    parser.add_argument(
+        "--control-port",
+        type=int,
+        default=CONTROLLER_CONTROL_PORT,
+        help=f"Loopback port for the status/command API, 0 disables (default: {CONTROLLER_CONTROL_PORT})"
+    )
+
+    parser.add_argument(
+        "--bridge-control-port",
+        type=int,
+        default=LISTENER_CONTROL_PORT,
+        help=f"Control API port of the usbmux bridge, retargeted on hot swaps; 0 disables "
+             f"(default: {LISTENER_CONTROL_PORT})"
+    )
+
+    parser.add_argument(
+        "--link-stats-interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="Sample tethering adapter counters at this cadence, 0 disables (default: 0.5)"
+    )
+
+    parser.add_argument(
+        "--hls-ram",
+        nargs="?",
+        const="auto",
+        default=None,
+        metavar="PATH",
+        help="Write HLS fragments to a RAM disk (default location: IOSVCAM_RAMDISK or /dev/shm)"
+    )
+    parser.add_argument(
+        "--hls-idle-off",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Switch HLS output off after this long without HLS players, 0 never (default: 0)"
+    )
+
+    parser.add_argument(
+        "--priority",
+        choices=sorted(PRESETS),
+        default="default",
+        help="Scheduling preset for SRS (see process_priority.py presets)"
+    )
+
+    parser.add_argument(
+        "--server",
+        choices=sorted(SERVER_BACKENDS),
+        default="srs",
+        help="Media server to run: objs/srs.exe with config/active, or objs/monibuca.exe with conf/ (default: srs)"
+    )
 
     args = parser.parse_args()
 
@@ -584,18 +1863,19 @@ Setup Instructions:
     setup_logging(debug=args.debug, log_file=args.log_file)
 
     # Validate SRS installation
-    srs_exe = args.srs_home / "objs" / "srs.exe"
+    exe_name = SERVER_BACKENDS[args.server].exe_name
+    srs_exe = args.srs_home / "objs" / exe_name
     if not srs_exe.exists():
         # Try parent directories
         for parent in [args.srs_home.parent, args.srs_home.parent.parent]:
-            test_exe = parent / "objs" / "srs.exe"
+            test_exe = parent / "objs" / exe_name
             if test_exe.exists():
                 args.srs_home = parent
                 srs_exe = test_exe
                 break
 
     if not srs_exe.exists():
-        logger.error(f"SRS not found at: {srs_exe}")
+        logger.error(f"{SERVER_BACKENDS[args.server].label} not found at: {srs_exe}")
         logger.error("Please run from iOS-VCAM directory or specify --srs-home")
         logger.error("")
         logger.error("Example:")
@@ -604,8 +1884,25 @@ Setup Instructions:
 
     logger.info(f"SRS Home: {args.srs_home.absolute()}")
 
+    hls_ram_root = None
+    if args.hls_ram:
+        hls_ram_root = default_ram_root() if args.hls_ram == "auto" else Path(args.hls_ram)
+        if hls_ram_root is None or not hls_ram_root.is_dir():
+            logger.warning("No RAM disk found (set IOSVCAM_RAMDISK or pass --hls-ram PATH); HLS stays on disk")
+            hls_ram_root = None
+
     # Run controller
-    controller = USBStreamingController(args.srs_home)
+    controller = USBStreamingController(args.srs_home, srs_log_rate=args.srs_log_rate,
+                                        latency_budget_ms=args.latency_budget,
+                                        poll_interval=args.poll_interval,
+                                        probe_budget=args.probe_budget,
+                                        control_port=args.control_port,
+                                        bridge_control_port=args.bridge_control_port,
+                                        link_stats_interval=args.link_stats_interval,
+                                        hls_ram_root=hls_ram_root,
+                                        hls_idle_off=args.hls_idle_off,
+                                        priority=get_preset(args.priority),
+                                        server=args.server)
     controller.run()
 
 
@@ -8,10 +8,21 @@ local SRS (127.0.0.1:1935).
 This uses pymobiledevice3 to expose a local TCP port that forwards to a device
 port over usbmuxd. No SSH encryption.
 
+Bridge state (bytes/s, last stall, target) is served on a loopback control
+API, see control_api.py.
+
+With --relay the bridge feeds an in-process RTMP -> HTTP-FLV relay instead
+of SRS (one phone, one viewer, lowest latency), see rtmp_relay.py.
+With --rechunk the phone's RTMP chunks are re-fragmented at a larger size on
+the way to SRS, so SRS parses far fewer chunk headers, see rtmp_chunking.py.
+
 Usage:
   python usb_usbmux_listener.py
   python usb_usbmux_listener.py --device-port 62000 --local-port 62001
   python usb_usbmux_listener.py --no-usbmux-forward
+  python usb_usbmux_listener.py --relay --relay-http-port 8090
+  python usb_usbmux_listener.py --rechunk 60000
+  python control_api.py status --port 1991
 """
 
 import argparse
@@ -23,12 +34,19 @@ import threading
 import time
 from typing import Optional
 
+from control_api import LISTENER_CONTROL_PORT, ControlServer
+from process_priority import PRESETS, PriorityProfile, apply_profile, get_preset
+from rtmp_chunking import DEFAULT_RECHUNK_SIZE, Rechunker
+from rtmp_relay import DEFAULT_RELAY_HTTP_PORT, RTMPRelay
+
 DEFAULT_DEVICE_PORT = 62000
 DEFAULT_LOCAL_PORT = 62001
 DEFAULT_SRS_HOST = "127.0.0.1"
 DEFAULT_SRS_PORT = 1935
 RETRY_DELAY = 2.0
 CONNECT_TIMEOUT = 5.0
+STALL_THRESHOLD = 0.5  # seconds without data from the phone mid-stream
+STATUS_INTERVAL = 1.0
 
 
 def get_first_device_serial() -> Optional[str]:
@@ -51,11 +69,13 @@ def get_first_device_serial() -> Optional[str]:
 
 
 class USBMuxForwarder:
-    def __init__(self, local_port: int, device_port: int, python_exe: str, serial: Optional[str] = None):
+    def __init__(self, local_port: int, device_port: int, python_exe: str, serial: Optional[str] = None,
+                 priority: Optional[PriorityProfile] = None):
         self.local_port = local_port
         self.device_port = device_port
         self.python_exe = python_exe
         self.serial = serial
+        self.priority = priority
         self.proc: Optional[subprocess.Popen] = None
 
     def start(self) -> None:
@@ -89,6 +109,9 @@ class USBMuxForwarder:
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
+        if self.priority:
+            for line in apply_profile(self.proc.pid, self.priority, role="forwarder"):
+                print(f"Forwarder priority: {line}")
 
     def stop(self) -> None:
         if self.proc and self.proc.poll() is None:
@@ -112,6 +135,10 @@ class USBMuxListener:
         srs_port: int,
         use_usbmux_forward: bool,
         serial: Optional[str] = None,
+        control_port: Optional[int] = LISTENER_CONTROL_PORT,
+        priority: Optional[PriorityProfile] = None,
+        relay: Optional[RTMPRelay] = None,
+        rechunk: int = 0,
     ):
         self.local_port = local_port
         self.device_port = device_port
@@ -119,33 +146,136 @@ class USBMuxListener:
         self.srs_port = srs_port
         self.use_usbmux_forward = use_usbmux_forward
         self._stop = False
-        self.forwarder = USBMuxForwarder(local_port, device_port, sys.executable, serial)
+        self._active: tuple = ()
+        self.priority = priority
+        # Replaces SRS as the bridge target when set
+        self.relay = relay
+        # Chunk size the phone's stream is re-fragmented to for SRS, 0 passes it through
+        self.rechunk = rechunk if not relay else 0
+        self._rechunker: Optional[Rechunker] = None
+        self.forwarder = USBMuxForwarder(local_port, device_port, sys.executable, serial, priority)
+
+        # Bridge counters, only ever incremented by the pipe threads
+        self.bytes_up = 0
+        self.bytes_down = 0
+        self.sessions = 0
+        self.bridge_since: Optional[float] = None
+        self.last_stall: Optional[dict] = None
+        self._rates = {"up_bps": 0.0, "down_bps": 0.0}
+
+        self.control: Optional[ControlServer] = None
+        if control_port:
+            self.control = ControlServer("usbmux_listener", port=control_port)
+            self.control.register("reconnect", self._cmd_reconnect)
+            self.control.register("retarget", self._cmd_retarget)
 
     def stop(self) -> None:
         self._stop = True
         if self.forwarder:
             self.forwarder.stop()
+        if self.relay:
+            self.relay.stop()
+        if self.control:
+            self.control.stop()
+            self.control = None
+
+    def status(self) -> dict:
+        return {
+            "bridge_active": bool(self._active),
+            "bridge_since": self.bridge_since,
+            "srs_target": "relay" if self.relay else f"{self.srs_host}:{self.srs_port}",
+            "forwarder_running": self.forwarder.is_running() if self.use_usbmux_forward else None,
+            "sessions": self.sessions,
+            "bytes_up": self.bytes_up,
+            "bytes_down": self.bytes_down,
+            "up_bps": round(self._rates["up_bps"]),
+            "down_bps": round(self._rates["down_bps"]),
+            "last_stall": self.last_stall,
+            "relay": self.relay.status() if self.relay else None,
+            "rechunk": self._rechunker.stats() if self._rechunker else None,
+        }
+
+    def _publish_loop(self) -> None:
+        last = (time.monotonic(), self.bytes_up, self.bytes_down)
+        while not self._stop and self.control:
+            time.sleep(STATUS_INTERVAL)
+            now = (time.monotonic(), self.bytes_up, self.bytes_down)
+            elapsed = max(now[0] - last[0], 1e-6)
+            self._rates["up_bps"] = (now[1] - last[1]) / elapsed
+            self._rates["down_bps"] = (now[2] - last[2]) / elapsed
+            last = now
+            control = self.control
+            if control:
+                control.update(self.status())
+
+    def _cmd_reconnect(self, args: dict) -> dict:
+        self._drop_active()
+        return {"ok": True}
+
+    def _cmd_retarget(self, args: dict) -> dict:
+        if self.relay:
+            # The phone's stream ends in the relay, so moving SRS would not move it
+            return {"ok": False, "error": "bridge runs in --relay mode; SRS is not in the path"}
+        host = args.get("host") or self.srs_host
+        port = int(args.get("port") or self.srs_port)
+        self.retarget(host, port)
+        return {"ok": True, "srs_target": f"{host}:{port}"}
+
+    def _drop_active(self) -> None:
+        for sock in self._active:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+
+    def retarget(self, srs_host: str, srs_port: int) -> None:
+        """
+        Point the bridge at another SRS instance (hot swap). The active
+        session is dropped so the phone reconnects and re-publishes through
+        the bridge to the new target; the old instance is then left with no
+        publisher and drains at once.
+        """
+        self.srs_host = srs_host
+        self.srs_port = srs_port
+        print(f"SRS target switched to {srs_host}:{srs_port}"
+              + (" (reconnecting the active session)" if self._active else ""))
+        self._drop_active()
 
     def _connect_local(self) -> socket.socket:
         return socket.create_connection(("127.0.0.1", self.local_port), timeout=CONNECT_TIMEOUT)
 
     def _connect_srs(self) -> socket.socket:
+        if self.relay:
+            return self.relay.connect()
         return socket.create_connection((self.srs_host, self.srs_port), timeout=CONNECT_TIMEOUT)
 
-    @staticmethod
-    def _pipe(src: socket.socket, dst: socket.socket) -> None:
+    def _pipe(self, src: socket.socket, dst: socket.socket, upstream: bool,
+              transform: Optional[Rechunker] = None) -> None:
+        last_rx = None
         try:
             while True:
                 data = src.recv(16384)
                 if not data:
                     break
+                if upstream:
+                    now = time.monotonic()
+                    if last_rx is not None and now - last_rx >= STALL_THRESHOLD:
+                        self.last_stall = {"at": time.time(), "duration_ms": round((now - last_rx) * 1000)}
+                    last_rx = now
+                    self.bytes_up += len(data)
+                else:
+                    self.bytes_down += len(data)
+                if transform:
+                    data = transform.feed(data)
                 dst.sendall(data)
         except Exception:
             pass
 
     def _bridge(self, dev_sock: socket.socket, srs_sock: socket.socket) -> None:
-        t1 = threading.Thread(target=self._pipe, args=(dev_sock, srs_sock), daemon=True)
-        t2 = threading.Thread(target=self._pipe, args=(srs_sock, dev_sock), daemon=True)
+        # A fresh transform per session: it tracks the handshake and chunk state
+        self._rechunker = Rechunker(self.rechunk) if self.rechunk else None
+        t1 = threading.Thread(target=self._pipe, args=(dev_sock, srs_sock, True, self._rechunker), daemon=True)
+        t2 = threading.Thread(target=self._pipe, args=(srs_sock, dev_sock, False), daemon=True)
         t1.start()
         t2.start()
         t1.join()
@@ -155,7 +285,21 @@ class USBMuxListener:
         print("USBMux Listener starting...")
         print(f"Device port: {self.device_port}")
         print(f"Local forward port: {self.local_port}")
-        print(f"SRS target: {self.srs_host}:{self.srs_port}")
+        if self.relay:
+            if not self.relay.start():
+                return
+            print(f"Relay: HTTP-FLV at {self.relay.flv_url()} (SRS not used)")
+        else:
+            print(f"SRS target: {self.srs_host}:{self.srs_port}")
+            if self.rechunk:
+                print(f"Re-chunking phone stream to {self.rechunk} bytes for SRS")
+        if self.priority:
+            # Threads started from here on (the pipes) inherit these settings
+            for line in apply_profile(os.getpid(), self.priority, role="bridge"):
+                print(f"Bridge priority: {line}")
+        if self.control and self.control.start():
+            print(f"Control API: {self.control.address}/status")
+            threading.Thread(target=self._publish_loop, daemon=True).start()
         print("")
 
         while not self._stop:
@@ -178,11 +322,16 @@ class USBMuxListener:
                 if dev_sock is None:
                     continue
 
-                print("Connecting to local SRS...")
+                print("Connecting to relay..." if self.relay else "Connecting to local SRS...")
                 srs_sock = self._connect_srs()
 
                 print("Bridge active. Waiting for stream...")
+                self._active = (dev_sock, srs_sock)
+                self.sessions += 1
+                self.bridge_since = time.time()
                 self._bridge(dev_sock, srs_sock)
+                self._active = ()
+                self.bridge_since = None
                 print("Bridge ended. Reconnecting...")
 
             except KeyboardInterrupt:
@@ -192,6 +341,8 @@ class USBMuxListener:
                 print(f"Error: {exc}")
                 time.sleep(RETRY_DELAY)
             finally:
+                self._active = ()
+                self.bridge_since = None
                 try:
                     dev_sock.close()
                 except Exception:
@@ -221,6 +372,46 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Do not spawn pymobiledevice3 usbmux forward (assume already running)",
     )
+    parser.add_argument(
+        "--control-port",
+        type=int,
+        default=LISTENER_CONTROL_PORT,
+        help="Loopback port for the status/command API, 0 disables",
+    )
+    parser.add_argument(
+        "--priority",
+        choices=sorted(PRESETS),
+        default="default",
+        help="Scheduling preset for the forwarder and bridge (see process_priority.py presets)",
+    )
+    parser.add_argument(
+        "--relay",
+        action="store_true",
+        help="Serve HTTP-FLV from an in-process relay instead of bridging to SRS",
+    )
+    parser.add_argument(
+        "--rechunk",
+        type=int,
+        nargs="?",
+        const=DEFAULT_RECHUNK_SIZE,
+        default=0,
+        metavar="BYTES",
+        help=f"Re-fragment the phone's RTMP chunks to this size for SRS (default size: {DEFAULT_RECHUNK_SIZE})",
+    )
+    parser.add_argument("--relay-http-host", type=str, default="127.0.0.1")
+    parser.add_argument("--relay-http-port", type=int, default=DEFAULT_RELAY_HTTP_PORT)
+    parser.add_argument(
+        "--relay-rtmp-port",
+        type=int,
+        default=0,
+        help="Also accept RTMP publishers on this loopback port (default: bridge only)",
+    )
+    parser.add_argument(
+        "--relay-start",
+        choices=("keyframe", "gop"),
+        default="keyframe",
+        help="New viewers wait for the next keyframe, or get the cached GOP",
+    )
     return parser.parse_args()
 
 
@@ -243,6 +434,11 @@ def main() -> None:
         srs_port=args.srs_port,
         use_usbmux_forward=not args.no_usbmux_forward,
         serial=args.serial,
+        control_port=args.control_port,
+        priority=get_preset(args.priority),
+        relay=RTMPRelay(http_host=args.relay_http_host, http_port=args.relay_http_port,
+                        rtmp_port=args.relay_rtmp_port or None, start=args.relay_start) if args.relay else None,
+        rechunk=args.rechunk,
     )
 
     listener.run()
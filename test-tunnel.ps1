@@ -1,6 +1,14 @@
 # Test if SSH tunnel is working by checking what's listening on iPhone
 $plinkPath = ".\plink.exe"
 $sshPassword = "i55555"  # From your saved password
+. "$PSScriptRoot\control-status.ps1"
+
+# A stream already arriving on the PC proves the tunnel; no SSH needed
+Write-Host "Checking PC-side stream state..."
+if (Test-StreamFromControlApi) {
+    Write-Host "Tunnel is working (stream arriving on the PC)"
+    exit 0
+}
 
 Write-Host "Testing SSH connection and tunnel setup..."
 